@@ -0,0 +1,74 @@
+"""Compare how many concurrent graph runs one process sustains on the sync and async paths.
+
+The sync path runs `graph.invoke` on a fixed-size thread pool, the way the
+LangGraph server schedules sync nodes; the async path runs `graph.ainvoke`
+on the event loop. The LLM is replaced with a fake that has fixed latency.
+
+Usage:
+    python benchmarks/bench_async_concurrency.py [--latency 0.2] [--workers 8]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+for var in ("ANTHROPIC_API_KEY", "OPENAI_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(var, "fake")
+
+from fakes import FakeChatModel  # noqa: E402
+from langgraph.store.memory import InMemoryStore  # noqa: E402
+
+from agents import todos_manager, web_searcher  # noqa: E402
+from agents.utils import nodes  # noqa: E402
+
+
+def run_sync(graph, inputs, config, runs: int, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: graph.invoke(inputs, config), range(runs)))
+    return time.perf_counter() - start
+
+
+async def run_async(graph, inputs, config, runs: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(graph.ainvoke(inputs, config) for _ in range(runs)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--runs", type=int, nargs="+", default=[8, 32, 128, 512])
+    args = parser.parse_args()
+
+    fake = FakeChatModel(latency=args.latency)
+    nodes.llm = fake
+
+    graphs = {
+        "web_searcher": (web_searcher.builder.compile(), {}),
+        "todos_manager": (
+            todos_manager.builder.compile(store=InMemoryStore()),
+            {"configurable": {"user_id": "bench-user"}},
+        ),
+    }
+    inputs = {"messages": [("user", "hi")]}
+
+    print(f"llm latency={args.latency}s, sync thread pool={args.workers}")
+    print(
+        f"{'graph':<15}{'runs':>6}{'sync s':>10}{'sync r/s':>10}{'async s':>10}{'async r/s':>11}"
+    )
+    for name, (graph, config) in graphs.items():
+        for runs in args.runs:
+            sync_s = run_sync(graph, inputs, config, runs, args.workers)
+            async_s = asyncio.run(run_async(graph, inputs, config, runs))
+            print(
+                f"{name:<15}{runs:>6}{sync_s:>10.2f}{runs / sync_s:>10.1f}"
+                f"{async_s:>10.2f}{runs / async_s:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
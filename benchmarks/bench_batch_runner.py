@@ -0,0 +1,74 @@
+"""Measure batch runner throughput over a JSONL file, and how much a restarted job reruns.
+
+Writes `--items` joke requests to a temporary JSONL file and runs them
+through `agents.batch.run_batch` on the joke_generator graph (interrupts
+answered automatically) against a fake model with fixed latency, once per
+`--concurrency` value. Concurrency 1 is the same work as calling
+`graph.invoke` on each request in turn. Then it simulates a crash halfway
+through a job (the output file holds the first half of the results) and
+reports how many runs the restarted job executes.
+
+The process pool (`--processes`) needs a real provider: spawned workers
+don't see the fakes installed here.
+
+Usage:
+    python benchmarks/bench_batch_runner.py [--items 200] [--latency 0.1]
+        [--concurrency 1 8 32]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+
+from agents.batch import run_batch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    install_fakes(ScriptedChatModel(latency=args.latency), FakeSearchTool())
+    tmp = tempfile.mkdtemp()
+    input_path = os.path.join(tmp, "requests.jsonl")
+    with open(input_path, "w") as f:
+        for i in range(args.items):
+            f.write(json.dumps({"id": i, "message": f"Tell me a joke about {i}"}))
+            f.write("\n")
+
+    print(f"items={args.items} llm latency={args.latency}s")
+    print(f"{'concurrency':<13}{'seconds':>9}{'runs/s':>9}")
+    for concurrency in args.concurrency:
+        output_path = os.path.join(tmp, f"results-{concurrency}.jsonl")
+        options = {
+            "graph": "joke_generator",
+            "job": f"bench-{concurrency}",
+            "configurable": {"llm_cache": False},
+        }
+        start = time.perf_counter()
+        counts = asyncio.run(run_batch(input_path, output_path, options, concurrency))
+        elapsed = time.perf_counter() - start
+        assert counts["done"] == args.items, counts
+        print(f"{concurrency:<13}{elapsed:>9.2f}{args.items / elapsed:>9.1f}")
+
+    # crash halfway: keep the first half of a finished job's results and restart it
+    with open(output_path) as f:
+        lines = f.readlines()
+    with open(output_path, "w") as f:
+        f.writelines(lines[: len(lines) // 2])
+    counts = asyncio.run(run_batch(input_path, output_path, options, concurrency))
+    print(
+        f"restart after crash: {counts['skipped']} skipped, "
+        f"{sum(counts.values()) - counts['skipped']} run"
+    )
+
+
+if __name__ == "__main__":
+    main()
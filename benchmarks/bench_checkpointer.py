@@ -0,0 +1,131 @@
+"""Compare MemorySaver with SQLiteSaver on checkpoint bytes and write latency as threads grow.
+
+Drives the web_searcher graph turn after turn on one thread (each turn is a
+search tool call, the `human_review_node` interrupt resumed with
+"continue", and the answer) against zero-latency fakes, and after the given
+numbers of turns reports the bytes the saver holds and the latency of its
+`put` calls during the last stretch of turns. Variants:
+
+- memory: `MemorySaver`, a full copy of `messages` per new version.
+- sqlite-full: `SQLiteSaver` without delta encoding.
+- sqlite-delta: `SQLiteSaver` storing `messages` as appended deltas.
+- sqlite-compact: deltas plus compaction (every 100 checkpoints, keep 20).
+
+Usage:
+    python benchmarks/bench_checkpointer.py [--turns 10 50 200] [--dir /tmp]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from agents import graphs
+from agents.utils.checkpoint import SQLiteSaver
+
+
+def make_saver(variant: str, path: str):
+    if variant == "memory":
+        return MemorySaver()
+    if variant == "sqlite-full":
+        return SQLiteSaver(path, delta_channels=(), compact_every=None)
+    if variant == "sqlite-delta":
+        return SQLiteSaver(path, compact_every=None)
+    return SQLiteSaver(path, compact_every=100, keep_checkpoints=20)
+
+
+def stored_bytes(saver) -> int:
+    if isinstance(saver, SQLiteSaver):
+        size = saver.size()
+        return size["checkpoint_bytes"] + size["blob_bytes"] + size["write_bytes"]
+    return (
+        sum(len(b[1]) for b in saver.blobs.values())
+        + sum(
+            len(c[1]) + len(m[1])
+            for namespaces in saver.storage.values()
+            for checkpoints in namespaces.values()
+            for c, m, _ in checkpoints.values()
+        )
+        + sum(len(w[2][1]) for writes in saver.writes.values() for w in writes.values())
+    )
+
+
+def timed_puts(saver) -> list[float]:
+    """Record the duration of every `put` on this saver instance."""
+    durations = []
+    put = saver.put
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return put(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    saver.put = timed
+    return durations
+
+
+def bench(variant: str, turns: list[int], directory: str) -> list[dict]:
+    path = os.path.join(directory, f"{variant}.sqlite")
+    saver = make_saver(variant, path)
+    durations = timed_puts(saver)
+    graph = graphs["web_searcher"].builder.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "bench", "llm_cache": False}}
+
+    results, done, mark = [], 0, 0
+    for target in sorted(turns):
+        while done < target:
+            graph.invoke(
+                {"messages": [("user", f"What is the weather in city {done}?")]}, config
+            )
+            if graph.get_state(config).next:
+                graph.invoke(Command(resume={"action": "continue"}), config)
+            done += 1
+        window = durations[mark:]
+        mark = len(durations)
+        start = time.perf_counter()
+        graph.get_state(config)
+        results.append(
+            {
+                "turns": target,
+                "messages": len(graph.get_state(config).values["messages"]),
+                "kib": stored_bytes(saver) / 1024,
+                "put_p50_ms": percentile(window, 50) * 1000,
+                "put_p95_ms": percentile(window, 95) * 1000,
+                "read_ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+    if isinstance(saver, SQLiteSaver):
+        saver.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--dir", help="directory for the sqlite files (default: temp)")
+    args = parser.parse_args()
+
+    install_fakes(ScriptedChatModel(content="It is sunny."), FakeSearchTool())
+
+    directory = args.dir or tempfile.mkdtemp(prefix="bench-checkpointer-")
+    print(
+        f"{'variant':<16}{'turns':>6}{'msgs':>6}{'stored KiB':>12}"
+        f"{'put p50 ms':>12}{'put p95 ms':>12}{'read ms':>9}"
+    )
+    for variant in ("memory", "sqlite-full", "sqlite-delta", "sqlite-compact"):
+        for r in bench(variant, args.turns, directory):
+            print(
+                f"{variant:<16}{r['turns']:>6}{r['messages']:>6}{r['kib']:>12.0f}"
+                f"{r['put_p50_ms']:>12.3f}{r['put_p95_ms']:>12.3f}{r['read_ms']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
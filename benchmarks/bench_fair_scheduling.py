@@ -0,0 +1,157 @@
+"""Compare outbound LLM rate limiting strategies when one user floods the joke graph.
+
+One heavy user starts `--heavy-runs` joke_generator runs at once (each makes
+route, topic, subjects, one call per subject and a selection), and shortly
+after `--light-users` other users start one run each. All runs go up to the
+`human_feedback` interrupt on the async path against a fake model with fixed
+latency. Variants:
+
+- unlimited: no limiter; reports how many calls exceeded the global rate
+  (the requests a provider would answer with 429).
+- global bucket: LangChain's `InMemoryRateLimiter` at the global rate,
+  shared first come, first served.
+- fair: `FairScheduler` at the global rate, queueing per user in turns.
+- fair + per-user: also caps each user at `--user-rpm`.
+
+It reports p50/max run time of the light users and the heavy user, calls
+over the global rate, and the peak scheduler queue depth.
+
+Usage:
+    python benchmarks/bench_fair_scheduling.py [--rpm 1200] [--user-rpm 600]
+        [--heavy-runs 20] [--light-users 5] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langgraph.checkpoint.memory import MemorySaver
+
+from agents import graphs
+from agents.utils import nodes
+from agents.utils.scheduler import FairScheduler, RateLimit
+
+
+class CallTimes(BaseCallbackHandler):
+    """Record when each chat model call was sent."""
+
+    def __init__(self):
+        self.times: list[float] = []
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        self.times.append(time.monotonic())
+
+
+def over_limit(times: list[float], rpm: float) -> int:
+    # calls beyond the per-second share of the rate, second by second
+    per_second = Counter(int(t) for t in times)
+    return sum(max(0, n - int(rpm / 60)) for n in per_second.values())
+
+
+async def run(graph, user: str, i: int, delay: float, calls: CallTimes) -> float:
+    await asyncio.sleep(delay)
+    config = {
+        "configurable": {
+            "thread_id": f"{user}-{i}-{time.monotonic()}",
+            "user_id": user,
+            "llm_cache": False,
+        },
+        "callbacks": [calls],
+    }
+    start = time.perf_counter()
+    await graph.ainvoke({"messages": [("user", f"Tell me a joke about {i}")]}, config)
+    return time.perf_counter() - start
+
+
+async def scenario(graph, args, scheduler) -> dict:
+    calls = CallTimes()
+    peak = 0
+    done = asyncio.Event()
+
+    async def sample_depth():
+        nonlocal peak
+        while not done.is_set():
+            if scheduler is not None:
+                peak = max(peak, scheduler.stats()["queued"])
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_depth())
+    heavy = [run(graph, "heavy", i, 0.0, calls) for i in range(args.heavy_runs)]
+    light = [
+        run(graph, f"light-{j}", j, args.light_delay, calls)
+        for j in range(args.light_users)
+    ]
+    results = await asyncio.gather(*heavy, *light)
+    done.set()
+    await sampler
+    heavy_times, light_times = (
+        results[: args.heavy_runs],
+        results[args.heavy_runs :],
+    )
+    return {
+        "light_p50": percentile(light_times, 50),
+        "light_max": max(light_times),
+        "heavy_p50": percentile(heavy_times, 50),
+        "heavy_max": max(heavy_times),
+        "over": over_limit(calls.times, args.rpm),
+        "peak": peak,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rpm", type=float, default=1200)
+    parser.add_argument("--user-rpm", type=float, default=600)
+    parser.add_argument("--heavy-runs", type=int, default=20)
+    parser.add_argument("--light-users", type=int, default=5)
+    parser.add_argument("--light-delay", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    variants = {
+        "unlimited": (None, None),
+        "global bucket": (
+            InMemoryRateLimiter(
+                requests_per_second=args.rpm / 60,
+                check_every_n_seconds=0.01,
+                max_bucket_size=args.rpm / 60,
+            ),
+            None,
+        ),
+        "fair": (None, FairScheduler("llm", RateLimit(args.rpm))),
+        "fair + per-user": (
+            None,
+            FairScheduler("llm", RateLimit(args.rpm), RateLimit(args.user_rpm)),
+        ),
+    }
+    print(
+        f"rpm={args.rpm:.0f} user rpm={args.user_rpm:.0f} heavy runs={args.heavy_runs} "
+        f"light users={args.light_users} llm latency={args.latency}s"
+    )
+    print(
+        f"{'variant':<17}{'light p50':>10}{'light max':>10}{'heavy p50':>10}"
+        f"{'heavy max':>10}{'over rate':>10}{'peak queue':>11}"
+    )
+    for name, (limiter, scheduler) in variants.items():
+        install_fakes(
+            ScriptedChatModel(latency=args.latency, rate_limiter=limiter),
+            FakeSearchTool(),
+        )
+        nodes.llm_scheduler = scheduler
+        graph = graphs["joke_generator"].builder.compile(checkpointer=MemorySaver())
+        r = asyncio.run(scenario(graph, args, scheduler))
+        print(
+            f"{name:<17}{r['light_p50']:>10.2f}{r['light_max']:>10.2f}"
+            f"{r['heavy_p50']:>10.2f}{r['heavy_max']:>10.2f}{r['over']:>10}"
+            f"{r['peak']:>11}"
+        )
+    print("(run times in s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Drive all three graphs end to end offline and report latency, throughput and memory.
+
+The shared chat model and the Tavily tool are replaced with the fakes in
+`fakes.py`, using seeded latency distributions, so every run takes the same
+path a real one would:
+
+- web_searcher: search tool call, `human_review_node` interrupt resumed with
+  "continue", Tavily search, final answer.
+- joke_generator: routing, subjects, `Send` fan-out of `generate_joke`,
+  best joke selection, `human_feedback` interrupt resumed with "yes".
+- todos_manager: `UpdateMemory` tool call, trustcall todo extraction into an
+  `InMemoryStore`, final answer. Runs rotate over `--users` user ids.
+
+Per graph it reports end-to-end latency percentiles (including resumes),
+throughput and peak traced memory (a separate tracemalloc pass over
+`--memory-runs` runs), plus per-node latency percentiles. Results can be
+saved as a named baseline under `benchmarks/baselines/` and later runs
+compared against it.
+
+Usage:
+    python benchmarks/bench_graphs.py [--runs 50] [--concurrency 8] [--mode async]
+        [--llm-latency lognormal:0.2:0.5] [--search-latency lognormal:0.3:0.5]
+        [--graphs web_searcher joke_generator] [--save NAME] [--compare NAME]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+from uuid import UUID
+
+from fakes import FakeSearchTool, Latency, ScriptedChatModel, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+from langgraph.types import Command
+
+from agents import graphs
+
+BASELINES = Path(__file__).parent / "baselines"
+
+# graph name -> (input message, resume values for its interrupts, in order)
+SCENARIOS = {
+    "web_searcher": ("What is the weather like in city {i}?", [{"action": "continue"}]),
+    "joke_generator": ("Tell me a joke about topic {i}", [{"feedback": "yes"}]),
+    "todos_manager": ("Add a task to book the dentist, appointment {i}", []),
+}
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Collect wall time per graph node from the chain callbacks LangGraph emits per task."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = {}
+        self._started: dict[UUID, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(
+        self,
+        serialized: Optional[dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        # skip nodes of subgraphs (e.g. trustcall's), which run inside an outer node
+        nested = "|" in metadata.get("langgraph_checkpoint_ns", "")
+        if node is not None and kwargs.get("name") == node and not nested:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            with self._lock:
+                self.durations.setdefault(node, []).append(time.perf_counter() - start)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        # interrupted nodes end with an error; their time still counts
+        self._finish(run_id)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the nearest-rank `q` percentile (0-100) of `values`."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
+
+
+def compile_graph(name: str):
+    # the graph modules compile without persistence; runs here need it for interrupts
+    return graphs[name].builder.compile(
+        checkpointer=MemorySaver(), store=InMemoryStore()
+    )
+
+
+def _run_config(name: str, i: int, users: int, timer: NodeTimer) -> dict:
+    return {
+        "configurable": {"thread_id": f"{name}-{i}", "user_id": f"user-{i % users}"},
+        "callbacks": [timer],
+    }
+
+
+def run_sync(graph, name: str, i: int, users: int, timer: NodeTimer) -> float:
+    message, resumes = SCENARIOS[name]
+    config = _run_config(name, i, users, timer)
+    start = time.perf_counter()
+    graph.invoke({"messages": [("user", message.format(i=i))]}, config)
+    for resume in resumes:
+        if graph.get_state(config).next:
+            graph.invoke(Command(resume=resume), config)
+    return time.perf_counter() - start
+
+
+async def run_async(graph, name: str, i: int, users: int, timer: NodeTimer) -> float:
+    message, resumes = SCENARIOS[name]
+    config = _run_config(name, i, users, timer)
+    start = time.perf_counter()
+    await graph.ainvoke({"messages": [("user", message.format(i=i))]}, config)
+    for resume in resumes:
+        if (await graph.aget_state(config)).next:
+            await graph.ainvoke(Command(resume=resume), config)
+    return time.perf_counter() - start
+
+
+def run_many(name: str, runs: int, args, timer: NodeTimer) -> tuple[list[float], float]:
+    """Run `runs` scenarios with `args.concurrency` in flight; return latencies and total time."""
+    graph = compile_graph(name)
+    start = time.perf_counter()
+    if args.mode == "sync":
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(
+                pool.map(
+                    lambda i: run_sync(graph, name, i, args.users, timer), range(runs)
+                )
+            )
+    else:
+
+        async def bounded(semaphore: asyncio.Semaphore, i: int) -> float:
+            async with semaphore:
+                return await run_async(graph, name, i, args.users, timer)
+
+        async def gather() -> list[float]:
+            semaphore = asyncio.Semaphore(args.concurrency)
+            return await asyncio.gather(*(bounded(semaphore, i) for i in range(runs)))
+
+        latencies = asyncio.run(gather())
+    return latencies, time.perf_counter() - start
+
+
+def bench_graph(name: str, args) -> dict[str, Any]:
+    # warm up imports, registry entries and schema generation outside the measurement
+    run_many(name, 1, args, NodeTimer())
+
+    timer = NodeTimer()
+    latencies, elapsed = run_many(name, args.runs, args, timer)
+
+    tracemalloc.start()
+    run_many(name, args.memory_runs, args, NodeTimer())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        **_summary(latencies),
+        "throughput_rps": args.runs / elapsed,
+        "peak_mb": peak / 1024 / 1024,
+        "nodes": {
+            node: _summary(values) for node, values in sorted(timer.durations.items())
+        },
+    }
+
+
+def print_results(results: dict[str, Any]) -> None:
+    print(
+        f"{'graph':<16}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'runs/s':>10}{'peak MB':>10}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<16}{r['count']:>6}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['p99_ms']:>10.1f}{r['throughput_rps']:>10.1f}{r['peak_mb']:>10.2f}"
+        )
+    print()
+    print(f"{'graph / node':<36}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        for node, n in r["nodes"].items():
+            print(
+                f"{name + ' / ' + node:<36}{n['count']:>7}{n['p50_ms']:>10.1f}"
+                f"{n['p95_ms']:>10.1f}{n['p99_ms']:>10.1f}"
+            )
+
+
+def _delta(new: float, old: float) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def print_comparison(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f"compared with baseline {baseline['name']!r} ({baseline['created_at']})")
+    print(
+        f"{'graph':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'runs/s':>10}{'peak MB':>10}"
+    )
+    for name, r in results.items():
+        old = baseline["graphs"].get(name)
+        if old is None:
+            continue
+        print(
+            f"{name:<16}"
+            + "".join(
+                f"{_delta(r[key], old[key]):>10}"
+                for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_mb")
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--graphs", nargs="+", default=list(SCENARIOS))
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--memory-runs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--llm-latency", default="lognormal:0.2:0.5")
+    parser.add_argument("--search-latency", default="lognormal:0.3:0.5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="NAME", help="save results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="compare with a baseline")
+    args = parser.parse_args()
+
+    llm = ScriptedChatModel(
+        latency=Latency.parse(args.llm_latency, seed=args.seed),
+        content="Done.",
+        tool_args={"UpdateMemory": {"update_type": "todo", "todo_item_key": None}},
+    )
+    search = FakeSearchTool(latency=Latency.parse(args.search_latency, seed=args.seed))
+    install_fakes(llm, search)
+
+    print(
+        f"mode={args.mode} runs={args.runs} concurrency={args.concurrency} "
+        f"llm latency={args.llm_latency} search latency={args.search_latency}\n"
+    )
+    results = {name: bench_graph(name, args) for name in args.graphs}
+    print_results(results)
+
+    if args.compare:
+        baseline = json.loads((BASELINES / f"{args.compare}.json").read_text())
+        print()
+        print_comparison(results, baseline)
+
+    if args.save:
+        BASELINES.mkdir(exist_ok=True)
+        path = BASELINES / f"{args.save}.json"
+        baseline = {
+            "name": args.save,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "params": {
+                key: getattr(args, key)
+                for key in (
+                    "runs",
+                    "memory_runs",
+                    "concurrency",
+                    "mode",
+                    "users",
+                    "llm_latency",
+                    "search_latency",
+                    "seed",
+                )
+            },
+            "graphs": results,
+        }
+        path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nsaved baseline to {path}")
+
+
+if __name__ == "__main__":
+    main()
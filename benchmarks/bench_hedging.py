@@ -0,0 +1,164 @@
+"""Measure tail latency of the joke graph with and without hedged LLM calls.
+
+Runs the joke_generator graph up to its `human_feedback` interrupt on the
+async path against a fake model whose latency is `--latency` (a fakes
+`Latency` spec) except for a `--straggler-rate` fraction of calls that take
+`--straggler-latency`, and which fails `--error-rate` of calls. One slow
+`generate_joke` branch holds up `select_best_joke`, so stragglers set the
+run's tail. Variants:
+
+- off: no policy; a failed call fails its run.
+- hedged: `hedge_nodes` set to `--nodes`, with `llm_retries` retries.
+
+Each variant first runs `--warmup` runs so the nodes have latency samples to
+hedge at. It reports p50/p95/p99 run time, failed runs, LLM calls per run
+(hedges and retries included) and, for the hedged variant, the hedge rate
+and how many hedges answered first.
+
+Usage:
+    python benchmarks/bench_hedging.py [--runs 200] [--latency uniform:0.1:0.02]
+        [--straggler-rate 0.02] [--straggler-latency 1.5] [--error-rate 0.01]
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, Latency, ScriptedChatModel, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+
+from agents import graphs
+from agents.utils.hedging import hedger
+
+JOKE_NODES = [
+    "decide_joke_route",
+    "generate_subjects",
+    "generate_joke",
+    "select_best_joke",
+]
+
+
+class Stragglers(Latency):
+    """`base` latency, except `rate` of samples take `slow` seconds."""
+
+    def __init__(self, base: Latency, rate: float, slow: float, seed: int = 0):
+        super().__init__(base.mean)
+        self.base = base
+        self.rate = rate
+        self.slow = slow
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self._random.random() < self.rate:
+            return self.slow
+        return self.base.sample()
+
+
+class FlakyChatModel(ScriptedChatModel):
+    """Scripted model that fails `error_rate` of its calls right away."""
+
+    error_rate: float = 0.0
+
+    def _respond(self, messages, **kwargs):
+        if random.random() < self.error_rate:
+            raise RuntimeError("injected provider error")
+        return super()._respond(messages, **kwargs)
+
+
+class CallCounter(BaseCallbackHandler):
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, *args, **kwargs) -> None:
+        with self._lock:
+            self.calls += 1
+
+
+async def scenario(graph, args, configurable: dict) -> dict:
+    async def run(i: int, counter=None):
+        config = {
+            "configurable": {
+                "thread_id": f"hedging-{i}-{time.monotonic()}",
+                "llm_cache": False,
+                **configurable,
+            },
+            "callbacks": [counter] if counter else [],
+        }
+        start = time.perf_counter()
+        try:
+            await graph.ainvoke(
+                {"messages": [("user", f"Tell me a joke about {i}")]}, config
+            )
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    for i in range(args.warmup):
+        await run(-i - 1)
+    counter = CallCounter()
+    results = [await run(i, counter) for i in range(args.runs)]
+    durations = [r for r in results if r is not None]
+    return {
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "p99": percentile(durations, 99),
+        "failed": len(results) - len(durations),
+        "calls": counter.calls / args.runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--latency", default="uniform:0.1:0.02")
+    parser.add_argument("--straggler-rate", type=float, default=0.02)
+    parser.add_argument("--straggler-latency", type=float, default=1.5)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--nodes", nargs="+", default=JOKE_NODES)
+    args = parser.parse_args()
+
+    variants = {
+        "off": {},
+        "hedged": {"hedge_nodes": args.nodes, "llm_retries": args.retries},
+    }
+    print(
+        f"runs={args.runs} latency={args.latency} stragglers={args.straggler_rate:.0%} "
+        f"at {args.straggler_latency}s errors={args.error_rate:.0%} nodes={args.nodes}"
+    )
+    print(
+        f"{'variant':<8}{'p50':>7}{'p95':>7}{'p99':>7}{'failed':>8}{'calls/run':>11}"
+        f"{'hedge rate':>12}{'hedge wins':>12}"
+    )
+    for name, configurable in variants.items():
+        latency = Stragglers(
+            Latency.parse(args.latency), args.straggler_rate, args.straggler_latency
+        )
+        install_fakes(
+            FlakyChatModel(latency=latency, error_rate=args.error_rate),
+            FakeSearchTool(),
+        )
+        random.seed(0)
+        hedger.clear()
+        graph = graphs["joke_generator"].builder.compile(checkpointer=MemorySaver())
+        r = asyncio.run(scenario(graph, args, configurable))
+        stats = hedger.stats()
+        calls = sum(s["calls"] for s in stats.values())
+        hedges = sum(s["hedges"] for s in stats.values())
+        wins = sum(s["hedge_wins"] for s in stats.values())
+        print(
+            f"{name:<8}{r['p50']:>7.2f}{r['p95']:>7.2f}{r['p99']:>7.2f}"
+            f"{r['failed']:>8}{r['calls']:>11.2f}"
+            f"{(hedges / calls if calls else 0):>12.1%}{wins:>12}"
+        )
+    print("(times in s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Measure connection reuse and latency of the pooled HTTP clients against a local stub server.
+
+Starts a stub that speaks just enough of the OpenAI chat completions and
+Tavily search APIs, and simulates connection setup (TCP + TLS handshakes to
+a remote provider) by delaying the first response on every new connection
+by `--connect-latency`. It then sends `--calls` requests per provider, one
+after another on the sync path and `--concurrency` at a time on the async
+path, through:
+
+- stock: `ChatOpenAI` with its default clients, and `TavilySearchResults`
+  with its stock wrapper (a new `requests`/aiohttp connection per search).
+- pooled: `nodes.get_llm()` and the `web_search` tool's Tavily client, which
+  share `clients.http_clients`.
+
+It reports connections opened and p50/p95 latency per call. A stock
+`ChatOpenAI` already keeps its own connections alive; the pooled one shares
+them with every model variant in the process and takes the `HTTP_*` limits.
+
+Usage:
+    python benchmarks/bench_http_clients.py [--calls 200] [--concurrency 10]
+        [--connect-latency 0.03] [--latency 0.005]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_graphs import percentile
+from langchain_core.messages import HumanMessage
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, connect_latency: float, latency: float):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.connect_latency = connect_latency
+        self.latency = latency
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def connected(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive needs HTTP/1.1 and a Content-Length on every response
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connected()
+        self.handshake = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.handshake:
+            time.sleep(self.server.connect_latency)
+            self.handshake = False
+        time.sleep(self.server.latency)
+        if self.path.endswith("/chat/completions"):
+            payload = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "ok"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 5,
+                    "completion_tokens": 1,
+                    "total_tokens": 6,
+                },
+            }
+        else:
+            payload = {
+                "query": body["query"],
+                "results": [
+                    {
+                        "title": "Stub",
+                        "url": "https://example.com",
+                        "content": "Stub result.",
+                        "score": 1.0,
+                    }
+                ],
+            }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def clients(server: StubServer, pooled: bool):
+    """Return (chat model, tavily tool) for a variant."""
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_openai import ChatOpenAI
+
+    from agents.utils import nodes, tools
+
+    if pooled:
+        nodes.llm = None
+        # measure the transport, not the LLM cache
+        model = nodes.get_llm().model_copy(update={"cache": False})
+        return model, tools._tavily_search()
+    import langchain_community.utilities.tavily_search as stock
+
+    stock.TAVILY_API_URL = server.url
+    return ChatOpenAI(model="gpt-4o-mini"), TavilySearchResults(max_results=2)
+
+
+def run_sync(call, calls: int) -> list[float]:
+    durations = []
+    for i in range(calls):
+        start = time.perf_counter()
+        call(i)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def run_async(acall, calls: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    durations = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await acall(i)
+            durations.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--connect-latency", type=float, default=0.03)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    server = StubServer(args.connect_latency, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_API_BASE"] = server.url
+    os.environ["TAVILY_API_KEY"] = "stub"
+    os.environ["TAVILY_API_URL"] = server.url
+    messages = [HumanMessage(content="hi")]
+
+    print(
+        f"calls={args.calls} async concurrency={args.concurrency} "
+        f"connect latency={args.connect_latency * 1000:.0f} ms "
+        f"server latency={args.latency * 1000:.0f} ms"
+    )
+    print(
+        f"{'provider':<9}{'variant':<8}{'path':<7}{'connections':>12}"
+        f"{'p50 ms':>8}{'p95 ms':>8}"
+    )
+
+    for pooled in (False, True):
+        model, search = clients(server, pooled)
+        variant = "pooled" if pooled else "stock"
+        providers = {
+            "openai": (
+                lambda i: model.invoke(messages),
+                lambda i: model.ainvoke(messages),
+            ),
+            "tavily": (
+                lambda i: search.invoke({"query": f"q{i}"}),
+                lambda i: search.ainvoke({"query": f"q{i}"}),
+            ),
+        }
+        results = {}
+        for provider, (call, _) in providers.items():
+            before = server.connections
+            durations = run_sync(call, args.calls)
+            results[(provider, "sync")] = (durations, server.connections - before)
+
+        # one event loop for all async runs, as in a server process
+        async def async_runs():
+            for provider, (_, acall) in providers.items():
+                before = server.connections
+                durations = await run_async(acall, args.calls, args.concurrency)
+                results[(provider, "async")] = (
+                    durations,
+                    server.connections - before,
+                )
+
+        asyncio.run(async_runs())
+        for (provider, path), (durations, connections) in results.items():
+            print(
+                f"{provider:<9}{variant:<8}{path:<7}{connections:>12}"
+                f"{percentile(durations, 50) * 1000:>8.1f}"
+                f"{percentile(durations, 95) * 1000:>8.1f}"
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
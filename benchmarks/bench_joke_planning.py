@@ -0,0 +1,134 @@
+"""A/B the joke graph's planning modes on latency, LLM calls and tokens.
+
+Runs the joke_generator graph up to its `human_feedback` interrupt with each
+`joke_planning_mode` ("chain", "speculative", "fused") against a fake model
+with fixed latency, once with every request accepted and once with every
+request rejected, and reports p50/p95 latency per run and LLM calls and
+tokens per run (counted with a callback, so discarded speculative calls are
+included). Plan quality needs a real model: run the same comparison against
+a live provider with `--live`, which also prints the subjects each mode
+picked for the first few prompts.
+
+Usage:
+    python benchmarks/bench_joke_planning.py [--runs 20] [--latency 0.2] [--live]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+
+from agents import graphs
+
+MODES = ("chain", "speculative", "fused")
+
+PROMPTS = {
+    "generate_joke": [
+        "Tell me a joke about {i} cats",
+        "I need something funny about airports, version {i}",
+        "Make me laugh about programmers ({i})",
+    ],
+    "reject_joke_request": [
+        "What is the capital of country {i}?",
+        "How do I reset my password, attempt {i}?",
+    ],
+}
+
+
+class CallCounter(BaseCallbackHandler):
+    """Count chat model calls and the tokens they report."""
+
+    def __init__(self):
+        self.calls = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, *args, **kwargs) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        tokens = sum(
+            (getattr(g, "message", None).usage_metadata or {}).get("total_tokens", 0)
+            for generations in response.generations
+            for g in generations
+            if getattr(g, "message", None) is not None
+        )
+        with self._lock:
+            self.tokens += tokens
+
+
+async def run(graph, mode: str, route: str, runs: int) -> dict:
+    counter = CallCounter()
+    durations, subjects = [], []
+    prompts = PROMPTS[route]
+    for i in range(runs):
+        config = {
+            "configurable": {
+                "thread_id": f"{mode}-{route}-{i}",
+                "joke_planning_mode": mode,
+                "llm_cache": False,
+            },
+            "callbacks": [counter],
+        }
+        message = prompts[i % len(prompts)].format(i=i)
+        start = time.perf_counter()
+        result = await graph.ainvoke({"messages": [("user", message)]}, config)
+        durations.append(time.perf_counter() - start)
+        subjects.append(
+            (message, result.get("subjects") if route == "generate_joke" else None)
+        )
+    return {
+        "p50": percentile(durations, 50),
+        "p95": percentile(durations, 95),
+        "calls": counter.calls / runs,
+        "tokens": counter.tokens / runs,
+        "subjects": subjects,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument(
+        "--live", action="store_true", help="use the configured model instead of fakes"
+    )
+    args = parser.parse_args()
+
+    if not args.live:
+        print(f"runs={args.runs} llm latency={args.latency}s (fake model)")
+    print(
+        f"{'route':<10}{'mode':<13}{'p50 ms':>8}{'p95 ms':>8}"
+        f"{'calls/run':>11}{'tokens/run':>12}"
+    )
+    for route in PROMPTS:
+        if not args.live:
+            # the scripted model follows the pinned route whatever the prompt says
+            pinned = {"route": route}
+            install_fakes(
+                ScriptedChatModel(
+                    latency=args.latency,
+                    tool_args={"RouteOutput": pinned, "JokePlan": pinned},
+                ),
+                FakeSearchTool(),
+            )
+        graph = graphs["joke_generator"].builder.compile(checkpointer=MemorySaver())
+        for mode in MODES:
+            r = asyncio.run(run(graph, mode, route, args.runs))
+            print(
+                f"{route[:9]:<10}{mode:<13}{r['p50'] * 1000:>8.0f}"
+                f"{r['p95'] * 1000:>8.0f}{r['calls']:>11.2f}{r['tokens']:>12.0f}"
+            )
+            if args.live and route == "generate_joke":
+                for message, subjects in r["subjects"][:3]:
+                    print(f"    {message!r}: {subjects}")
+
+
+if __name__ == "__main__":
+    main()
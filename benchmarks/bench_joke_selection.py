@@ -0,0 +1,84 @@
+"""Count joke selection LLM calls and time spent in the human feedback loop.
+
+Runs the joke_generator graph to its `human_feedback` interrupt and resumes
+it with a feedback script (plain rejections, optionally one with preference
+text, then "yes"), against a fake model with fixed latency. It reports the
+`select_best_joke` LLM calls per run, the calls a ranking-free selector
+would make (one per selection round), and the p50 wall time of a feedback
+round. Plain rejections walk the cached `joke_ranking`; only preference
+text, or running out of ranked jokes, asks the model again.
+
+Usage:
+    python benchmarks/bench_joke_selection.py [--runs 20] [--latency 0.2]
+        [--feedback no no "something shorter" no yes]
+"""
+
+import argparse
+import threading
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from agents import graphs
+
+
+class NodeCallCounter(BaseCallbackHandler):
+    """Count chat model calls made inside one graph node."""
+
+    def __init__(self, node: str):
+        self.node = node
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, *args, metadata=None, **kwargs) -> None:
+        if (metadata or {}).get("langgraph_node") == self.node:
+            with self._lock:
+                self.calls += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument(
+        "--feedback", nargs="+", default=["no", "no", "something shorter", "no", "yes"]
+    )
+    args = parser.parse_args()
+
+    install_fakes(
+        ScriptedChatModel(latency=args.latency, list_items=args.subjects),
+        FakeSearchTool(),
+    )
+    graph = graphs["joke_generator"].builder.compile(checkpointer=MemorySaver())
+    counter = NodeCallCounter("select_best_joke")
+
+    rounds = []
+    for i in range(args.runs):
+        config = {
+            "configurable": {"thread_id": f"selection-{i}", "llm_cache": False},
+            "callbacks": [counter],
+        }
+        graph.invoke({"messages": [("user", f"Tell me a joke about {i}")]}, config)
+        for feedback in args.feedback:
+            start = time.perf_counter()
+            graph.invoke(Command(resume={"feedback": feedback}), config)
+            rounds.append(time.perf_counter() - start)
+
+    # one initial selection plus one per rejection
+    selections = 1 + sum(1 for f in args.feedback if not f.lower().startswith("y"))
+    print(
+        f"runs={args.runs} llm latency={args.latency}s jokes={args.subjects} "
+        f"feedback={args.feedback}"
+    )
+    print(f"select_best_joke calls/run: {counter.calls / args.runs:.2f}")
+    print(f"calls/run selecting from scratch each round: {selections}")
+    print(f"feedback round p50: {percentile(rounds, 50) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
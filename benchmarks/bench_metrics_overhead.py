@@ -0,0 +1,123 @@
+"""Measure the per-run cost of the NodeMetrics callback handler.
+
+Each graph is compiled twice from its builder, with and without
+`NodeMetrics`, and run against zero-latency fakes, so the difference is all
+instrumentation overhead (the worst case; with real model latency it is a
+much smaller share). Rounds alternate between the two variants to cancel
+out drift, and the best round of each is compared. It also times rendering
+the Prometheus text for the series the runs produced.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py [--runs 200] [--rounds 5] [--mode async]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+from langgraph.types import Command
+
+from agents import graphs
+from agents.utils.metrics import NodeMetrics, metrics
+
+# graph name -> (input message, resume value for its interrupt, if any)
+SCENARIOS = {
+    "web_searcher": ("What is the weather like in city {i}?", {"action": "continue"}),
+    "joke_generator": ("Tell me a joke about topic {i}", {"feedback": "yes"}),
+    "todos_manager": ("Add a task to book the dentist, appointment {i}", None),
+}
+
+
+def compile_graph(name: str, instrumented: bool):
+    graph = graphs[name].builder.compile(
+        checkpointer=MemorySaver(), store=InMemoryStore()
+    )
+    return graph.with_config(callbacks=[NodeMetrics(name)]) if instrumented else graph
+
+
+def run_round(graph, name: str, runs: int, mode: str, offset: int) -> float:
+    """Run the scenario `runs` times one after another; return seconds per run."""
+    message, resume = SCENARIOS[name]
+
+    def config(i: int) -> dict:
+        return {"configurable": {"thread_id": f"{i}", "user_id": f"user-{i % 10}"}}
+
+    async def arun() -> None:
+        for i in range(offset, offset + runs):
+            await graph.ainvoke(
+                {"messages": [("user", message.format(i=i))]}, config(i)
+            )
+            if resume is not None:
+                await graph.ainvoke(Command(resume=resume), config(i))
+
+    start = time.perf_counter()
+    if mode == "async":
+        asyncio.run(arun())
+    else:
+        for i in range(offset, offset + runs):
+            graph.invoke({"messages": [("user", message.format(i=i))]}, config(i))
+            if resume is not None:
+                graph.invoke(Command(resume=resume), config(i))
+    return (time.perf_counter() - start) / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--mode", choices=["async", "sync"], default="async")
+    args = parser.parse_args()
+
+    install_fakes(
+        ScriptedChatModel(
+            content="Done.",
+            tool_args={"UpdateMemory": {"update_type": "todo", "todo_item_key": None}},
+        ),
+        FakeSearchTool(),
+    )
+
+    print(
+        f"mode={args.mode} runs={args.runs} rounds={args.rounds} (zero-latency fakes)"
+    )
+    print(
+        f"{'graph':<16}{'plain ms/run':>14}{'metrics ms/run':>16}"
+        f"{'overhead us/run':>17}{'overhead':>10}"
+    )
+    offset = 0
+    for name in SCENARIOS:
+        plain = compile_graph(name, instrumented=False)
+        instrumented = compile_graph(name, instrumented=True)
+        # warm up both variants
+        run_round(plain, name, 5, args.mode, offset)
+        run_round(instrumented, name, 5, args.mode, offset + 5)
+        offset += 10
+
+        plain_s, instrumented_s = [], []
+        for _ in range(args.rounds):
+            plain_s.append(run_round(plain, name, args.runs, args.mode, offset))
+            offset += args.runs
+            instrumented_s.append(
+                run_round(instrumented, name, args.runs, args.mode, offset)
+            )
+            offset += args.runs
+        base, with_metrics = min(plain_s), min(instrumented_s)
+        print(
+            f"{name:<16}{base * 1000:>14.2f}{with_metrics * 1000:>16.2f}"
+            f"{(with_metrics - base) * 1e6:>17.0f}"
+            f"{(with_metrics - base) / base * 100:>9.1f}%"
+        )
+
+    start = time.perf_counter()
+    text = metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"\nrender: {len(text.splitlines())} lines in {render_ms:.2f} ms "
+        f"({len(text) / 1024:.0f} KiB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Compare a single chat model for every node against the fast/generation model tiers.
+
+Runs the joke_generator graph (up to its `human_feedback` interrupt) and the
+todos_manager graph against a fake model whose latency depends on the model
+it is asked for (`--fast-latency` for `Configuration.fast_model`,
+`--generation-latency` for `generation_model`). Variants:
+
+- single: every node on `--generation-model`.
+- tiered: the default tiers, routers and classifiers (`FAST_TIER_NODES`) on
+  `--fast-model`.
+- tiered+todo: todo_manager on `--fast-model` too (through `node_models`),
+  so the small model also writes the todo manager's replies.
+
+It reports p50 run time, p50 time of the calls of the nodes that can run on
+the fast tier (`FAST_TIER_NODES` and todo_manager), and the estimated cost
+per 1000 runs from the tokens each model was sent and returned (list prices
+per 1M input/output tokens below). Output quality of the small model needs a
+real provider; the tiers can be moved per node with
+`Configuration.node_models`.
+
+Usage:
+    python benchmarks/bench_model_tiering.py [--runs 20] [--fast-latency 0.15]
+        [--generation-latency 0.4]
+"""
+
+import argparse
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, _delay, install_fakes
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+
+from agents import graphs
+from agents.utils.nodes import FAST_TIER_NODES
+
+# USD per 1M (input, output) tokens
+PRICES = {"gpt-4o-mini": (0.15, 0.60), "gpt-4.1-nano": (0.10, 0.40)}
+
+PROMPTS = {
+    "joke_generator": "Tell me a joke about {i} cats",
+    "todos_manager": "Add a task to book the dentist, appointment {i}",
+}
+
+
+class TieredLatencyModel(ScriptedChatModel):
+    """Scripted model answering after the latency of the model it was copied to."""
+
+    model_latency: dict[str, Any] = {}
+
+    def _total_delay(self, result) -> float:
+        return _delay(self.model_latency.get(self.model_name, self.latency))
+
+
+class TierUsage(BaseCallbackHandler):
+    """Record tokens per model and the time spent in `fast_nodes` calls."""
+
+    def __init__(self, fast_nodes: frozenset[str]):
+        self.fast_nodes = fast_nodes
+        self.tokens: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        self.fast_seconds: list[float] = []
+        self._started: dict[Any, tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        model = (kwargs.get("invocation_params") or {}).get("model_name", "?")
+        node = (metadata or {}).get("langgraph_node", "")
+        with self._lock:
+            self._started[run_id] = (model, node, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        with self._lock:
+            model, node, start = self._started.pop(run_id)
+            if node in self.fast_nodes:
+                self.fast_seconds.append(time.perf_counter() - start)
+            for generations in response.generations:
+                for generation in generations:
+                    usage = generation.message.usage_metadata or {}
+                    self.tokens[model][0] += usage.get("input_tokens", 0)
+                    self.tokens[model][1] += usage.get("output_tokens", 0)
+
+    def cost(self) -> float:
+        return sum(
+            (i * PRICES[m][0] + o * PRICES[m][1]) / 1e6
+            for m, (i, o) in self.tokens.items()
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fast-model", default="gpt-4.1-nano")
+    parser.add_argument("--generation-model", default="gpt-4o-mini")
+    parser.add_argument("--fast-latency", type=float, default=0.15)
+    parser.add_argument("--generation-latency", type=float, default=0.4)
+    args = parser.parse_args()
+
+    install_fakes(
+        TieredLatencyModel(
+            model_latency={
+                args.fast_model: args.fast_latency,
+                args.generation_model: args.generation_latency,
+            },
+            tool_args={"UpdateMemory": {"update_type": "todo", "todo_item_key": None}},
+        ),
+        FakeSearchTool(),
+    )
+    variants = {
+        "single": {
+            "fast_model": args.generation_model,
+            "generation_model": args.generation_model,
+        },
+        "tiered": {
+            "fast_model": args.fast_model,
+            "generation_model": args.generation_model,
+        },
+        "tiered+todo": {
+            "fast_model": args.fast_model,
+            "generation_model": args.generation_model,
+            "node_models": {"todo_manager": "fast"},
+        },
+    }
+    print(
+        f"runs={args.runs} {args.fast_model}={args.fast_latency}s "
+        f"{args.generation_model}={args.generation_latency}s"
+    )
+    print(
+        f"{'graph':<16}{'variant':<13}{'run p50':>9}{'fast-tier call p50':>20}"
+        f"{'$/1k runs':>11}"
+    )
+    for name, prompt in PROMPTS.items():
+        for variant, models in variants.items():
+            graph = graphs[name].builder.compile(
+                checkpointer=MemorySaver(), store=InMemoryStore()
+            )
+            usage = TierUsage(FAST_TIER_NODES | {"todo_manager"})
+            durations = []
+            for i in range(args.runs):
+                config = {
+                    "configurable": {
+                        "thread_id": f"{variant}-{i}",
+                        "user_id": f"user-{i}",
+                        "llm_cache": False,
+                        **models,
+                    },
+                    "callbacks": [usage],
+                }
+                start = time.perf_counter()
+                graph.invoke({"messages": [("user", prompt.format(i=i))]}, config)
+                durations.append(time.perf_counter() - start)
+            print(
+                f"{name:<16}{variant:<13}{percentile(durations, 50):>9.2f}"
+                f"{percentile(usage.fast_seconds, 50):>20.2f}"
+                f"{usage.cost() * 1000 / args.runs:>11.3f}"
+            )
+    print("(times in s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure the per-call cost of rebuilding bound models and extractors vs. registry lookups.
+
+Builds the same runnables the nodes use (structured output for each joke
+schema, `bind_tools([UpdateMemory])` and the trustcall extractors) against a
+real `ChatOpenAI` instance. Nothing is sent over the network.
+
+Usage:
+    python benchmarks/bench_runnable_registry.py [--iterations 200]
+"""
+
+import argparse
+import os
+import time
+
+for var in ("ANTHROPIC_API_KEY", "OPENAI_API_KEY", "TAVILY_API_KEY"):
+    os.environ.setdefault(var, "fake")
+
+from langchain_openai import ChatOpenAI  # noqa: E402
+from trustcall import create_extractor  # noqa: E402
+
+from agents.utils.runnables import RunnableRegistry  # noqa: E402
+from agents.utils.schemas import (  # noqa: E402
+    Joke,
+    JokeRanking,
+    Profile,
+    RouteOutput,
+    Subjects,
+    ToDo,
+)
+from agents.utils.tools import UpdateMemory  # noqa: E402
+
+llm = ChatOpenAI(model="gpt-4o-mini")
+registry = RunnableRegistry()
+
+CASES = {
+    "with_structured_output(RouteOutput)": (
+        lambda: llm.with_structured_output(RouteOutput),
+        lambda: registry.structured(llm, RouteOutput),
+    ),
+    "with_structured_output(Subjects)": (
+        lambda: llm.with_structured_output(Subjects),
+        lambda: registry.structured(llm, Subjects),
+    ),
+    "with_structured_output(Joke)": (
+        lambda: llm.with_structured_output(Joke),
+        lambda: registry.structured(llm, Joke),
+    ),
+    "with_structured_output(JokeRanking)": (
+        lambda: llm.with_structured_output(JokeRanking),
+        lambda: registry.structured(llm, JokeRanking),
+    ),
+    "bind_tools([UpdateMemory])": (
+        lambda: llm.bind_tools([UpdateMemory]),
+        lambda: registry.with_tools(llm, [UpdateMemory]),
+    ),
+    "create_extractor(Profile)": (
+        lambda: create_extractor(llm, tools=[Profile], tool_choice="Profile"),
+        lambda: registry.extractor(llm, tools=[Profile], tool_choice="Profile"),
+    ),
+    "create_extractor(ToDo)": (
+        lambda: create_extractor(
+            llm, tools=[ToDo], tool_choice="ToDo", enable_inserts=True
+        ),
+        lambda: registry.extractor(
+            llm, tools=[ToDo], tool_choice="ToDo", enable_inserts=True
+        ),
+    ),
+}
+
+
+def per_call_us(fn, iterations: int) -> float:
+    fn()  # warm imports and the registry entry
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'runnable':<38}{'rebuild us':>12}{'registry us':>13}{'saved us':>11}")
+    for name, (rebuild, lookup) in CASES.items():
+        rebuild_us = per_call_us(rebuild, args.iterations)
+        lookup_us = per_call_us(lookup, args.iterations)
+        print(
+            f"{name:<38}{rebuild_us:>12.1f}{lookup_us:>13.2f}{rebuild_us - lookup_us:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure what speculative joke routing saves on accepted requests and wastes on rejected ones.
+
+Runs the joke_generator graph up to its `human_feedback` interrupt on the
+sync and async paths, with `joke_planning_mode` "chain" and "speculative",
+against a fake model with fixed latency whose router either accepts every request
+(`generate_joke`) or rejects it (`reject_joke_request`). It reports p50
+latency per run and, from `speculation_metrics`, the LLM calls wasted per
+rejected run and the latency saved per accepted run. Async speculation is
+cancelled when the router rejects; sync speculation runs on a thread, so
+its in-flight call finishes and is discarded.
+
+Usage:
+    python benchmarks/bench_speculation.py [--runs 20] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langgraph.checkpoint.memory import MemorySaver
+
+from agents import graphs
+from agents.utils.speculation import speculation_metrics
+
+
+def run_sync(graph, runs: int, config: dict) -> list[float]:
+    durations = []
+    for i in range(runs):
+        thread = {"configurable": {**config, "thread_id": f"sync-{i}"}}
+        start = time.perf_counter()
+        graph.invoke({"messages": [("user", f"Tell me a joke about {i}")]}, thread)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def run_async(graph, runs: int, config: dict) -> list[float]:
+    durations = []
+    for i in range(runs):
+        thread = {"configurable": {**config, "thread_id": f"async-{i}"}}
+        start = time.perf_counter()
+        await graph.ainvoke(
+            {"messages": [("user", f"Tell me a joke about {i}")]}, thread
+        )
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"runs={args.runs} llm latency={args.latency}s")
+    print(
+        f"{'route':<10}{'path':<7}{'off p50 ms':>12}{'on p50 ms':>11}"
+        f"{'saved ms/run':>14}{'wasted calls/run':>18}"
+    )
+    for route in ("generate_joke", "reject_joke_request"):
+        install_fakes(
+            ScriptedChatModel(
+                latency=args.latency, tool_args={"RouteOutput": {"route": route}}
+            ),
+            FakeSearchTool(),
+        )
+        graph = graphs["joke_generator"].builder.compile(checkpointer=MemorySaver())
+        for path in ("sync", "async"):
+            p50 = {}
+            for speculative in (False, True):
+                config = {
+                    "joke_planning_mode": "speculative" if speculative else "chain",
+                    "llm_cache": False,
+                }
+                before = speculation_metrics.stats()
+                if path == "sync":
+                    durations = run_sync(graph, args.runs, config)
+                else:
+                    durations = asyncio.run(run_async(graph, args.runs, config))
+                after = speculation_metrics.stats()
+                p50[speculative] = percentile(durations, 50) * 1000
+            saved = (after["seconds_saved"] - before["seconds_saved"]) / args.runs
+            wasted = (after["calls_wasted"] - before["calls_wasted"]) / args.runs
+            print(
+                f"{route[:9]:<10}{path:<7}{p50[False]:>12.0f}{p50[True]:>11.0f}"
+                f"{saved * 1000:>14.0f}{wasted:>18.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
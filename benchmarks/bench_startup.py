@@ -0,0 +1,65 @@
+"""Measure cold-start import time and peak memory of each graph.
+
+Every graph is imported in a fresh interpreter with the API keys removed
+from the environment and stdin closed, so the numbers also confirm that
+importing a graph needs no credentials, prompts and network clients.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeats 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+GRAPHS = ("web_searcher", "joke_generator", "todos_manager")
+
+_CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import agents.{name} as module
+module.graph
+import_s = time.perf_counter() - start
+# ru_maxrss is in KiB on Linux and bytes on macOS
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"import_s": import_s, "rss_mb": rss_mb, "modules": len(sys.modules)}}))
+"""
+
+
+def measure(name: str) -> dict:
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if k not in ("ANTHROPIC_API_KEY", "OPENAI_API_KEY", "TAVILY_API_KEY")
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(name=name)],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'graph':<16} {'import (ms)':>12} {'peak rss (MB)':>14} {'modules':>8}")
+    for name in GRAPHS:
+        samples = [measure(name) for _ in range(args.repeats)]
+        import_ms = statistics.median(s["import_s"] for s in samples) * 1000
+        rss_mb = statistics.median(s["rss_mb"] for s in samples)
+        modules = samples[-1]["modules"]
+        print(f"{name:<16} {import_ms:>12.0f} {rss_mb:>14.1f} {modules:>8}")
+
+
+if __name__ == "__main__":
+    main()
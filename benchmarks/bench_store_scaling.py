@@ -0,0 +1,168 @@
+"""Measure how InMemoryStore and SQLiteStore scale from 1k to 1M users.
+
+Grows one store of each kind user by user (a profile, `--todos` todos and
+instructions each, written with batched puts as update_todos does) and, at
+each population size, times the todo manager's access pattern on random
+users: loading a memory snapshot (one batch of three namespace searches,
+uncached) and writing two todos in one batch. It reports populate rate,
+p50/p95 per operation, resident memory added since the store was created,
+and the database size on disk. InMemoryStore is only grown up to
+`--memory-max-users`, since it holds everything in RAM.
+
+Usage:
+    python benchmarks/bench_store_scaling.py [--users 1000 10000 100000 1000000]
+        [--todos 3] [--samples 2000] [--memory-max-users 100000]
+        [--memory-samples 100] [--dir /tmp]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_graphs import percentile
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from agents.utils.memory import MemorySnapshotCache
+from agents.utils.store import SQLiteStore
+
+# puts per populate batch
+CHUNK = 5000
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def user_ops(user: int, todos: int) -> list[PutOp]:
+    user_id = f"user-{user}"
+    ops = [
+        PutOp(
+            ("profile", user_id),
+            "user_profile",
+            {"name": user_id, "location": "Madrid"},
+        ),
+        PutOp(
+            ("instructions", user_id),
+            "user_instructions",
+            {"instructions": "Keep todos short and add deadlines when known."},
+        ),
+    ]
+    ops += [
+        PutOp(
+            ("todo", user_id),
+            f"todo-{i}",
+            {
+                "task": f"Task {i} for {user_id}",
+                "time_to_complete": 30,
+                "solutions": ["call", "book online"],
+                "status": "not started",
+            },
+        )
+        for i in range(todos)
+    ]
+    return ops
+
+
+def populate(store, start: int, end: int, todos: int) -> float:
+    """Add users [start, end) in batches; return items written per second."""
+    began = time.perf_counter()
+    ops: list[PutOp] = []
+    for user in range(start, end):
+        ops += user_ops(user, todos)
+        if len(ops) >= CHUNK:
+            store.batch(ops)
+            ops = []
+    if ops:
+        store.batch(ops)
+    return (end - start) * (todos + 2) / (time.perf_counter() - began)
+
+
+def measure(store, users: int, samples: int, rng: random.Random) -> dict:
+    snapshots = MemorySnapshotCache()
+    loads, writes = [], []
+    for _ in range(samples):
+        user_id = f"user-{rng.randrange(users)}"
+        start = time.perf_counter()
+        snapshot = snapshots.load(store, user_id, cached=False)
+        loads.append(time.perf_counter() - start)
+        assert not snapshot.missing()
+
+        ops = [
+            PutOp(("todo", user_id), f"extra-{i}", {"task": "new", "status": "done"})
+            for i in range(2)
+        ]
+        start = time.perf_counter()
+        store.batch(ops)
+        writes.append(time.perf_counter() - start)
+    return {
+        "load_p50_us": percentile(loads, 50) * 1e6,
+        "load_p95_us": percentile(loads, 95) * 1e6,
+        "write_p50_us": percentile(writes, 50) * 1e6,
+        "write_p95_us": percentile(writes, 95) * 1e6,
+    }
+
+
+def bench(kind: str, sizes: list[int], samples: int, args) -> None:
+    rng = random.Random(0)
+    base_rss = rss_mb()
+    if kind == "sqlite":
+        path = os.path.join(args.dir, "store-scaling.sqlite")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        store = SQLiteStore(path)
+    else:
+        store = InMemoryStore()
+
+    populated = 0
+    for users in sizes:
+        rate = populate(store, populated, users, args.todos)
+        populated = users
+        r = measure(store, users, samples, rng)
+        disk = store.size()["bytes"] / 1024 / 1024 if kind == "sqlite" else 0.0
+        print(
+            f"{kind:<8}{users:>9}{rate:>12.0f}{r['load_p50_us']:>11.0f}"
+            f"{r['load_p95_us']:>11.0f}{r['write_p50_us']:>11.0f}"
+            f"{r['write_p95_us']:>11.0f}{rss_mb() - base_rss:>10.0f}{disk:>10.0f}"
+        )
+    if kind == "sqlite":
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("--todos", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--memory-max-users", type=int, default=100000)
+    # InMemoryStore searches scan every namespace, so sample it less
+    parser.add_argument("--memory-samples", type=int, default=100)
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    sizes = sorted(args.users)
+    print(
+        f"todos/user={args.todos} samples={args.samples} "
+        f"(memory: {args.memory_samples}), times in us"
+    )
+    print(
+        f"{'store':<8}{'users':>9}{'items/s':>12}{'load p50':>11}{'load p95':>11}"
+        f"{'write p50':>11}{'write p95':>11}{'+RSS MB':>10}{'disk MB':>10}"
+    )
+    bench("sqlite", sizes, args.samples, args)
+    bench(
+        "memory",
+        [n for n in sizes if n <= args.memory_max_users],
+        args.memory_samples,
+        args,
+    )
+
+
+if __name__ == "__main__":
+    main()
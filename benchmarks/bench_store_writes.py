@@ -0,0 +1,88 @@
+"""Compare per-item store puts with one batched write as the number of todos grows.
+
+Mirrors what update_todos does with a trustcall result: N puts into
+("todo", user_id). The store adds a fixed delay per `batch` call to stand in
+for one network round trip plus commit on a persistent backend.
+
+Usage:
+    python benchmarks/bench_store_writes.py [--roundtrip-ms 2] [--items 1 10 100]
+"""
+
+import argparse
+import asyncio
+import time
+
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from agents.utils.memory import MemorySnapshotCache
+
+
+class RoundTripStore(InMemoryStore):
+    """InMemoryStore that charges a fixed latency per batch call."""
+
+    def __init__(self, roundtrip: float):
+        super().__init__()
+        self.roundtrip = roundtrip
+
+    def batch(self, ops):
+        time.sleep(self.roundtrip)
+        return super().batch(ops)
+
+    async def abatch(self, ops):
+        await asyncio.sleep(self.roundtrip)
+        return await super().abatch(ops)
+
+
+def todo(i: int) -> dict:
+    return {"task": f"task {i}", "status": "not started", "solutions": ["do it"]}
+
+
+def per_item(store, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        store.put(("todo", "bench-user"), f"todo-{i}", todo(i))
+    return time.perf_counter() - start
+
+
+def batched(store, n: int) -> float:
+    snapshots = MemorySnapshotCache()
+    ops = [PutOp(("todo", "bench-user"), f"todo-{i}", todo(i)) for i in range(n)]
+    start = time.perf_counter()
+    snapshots.batch(store, ops)
+    return time.perf_counter() - start
+
+
+async def abatched(store, n: int) -> float:
+    snapshots = MemorySnapshotCache()
+    ops = [PutOp(("todo", "bench-user"), f"todo-{i}", todo(i)) for i in range(n)]
+    start = time.perf_counter()
+    await snapshots.abatch(store, ops)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--roundtrip-ms", type=float, default=2.0)
+    parser.add_argument(
+        "--items", type=int, nargs="+", default=[1, 5, 10, 50, 100, 500]
+    )
+    args = parser.parse_args()
+    roundtrip = args.roundtrip_ms / 1000
+
+    print(f"store round trip={args.roundtrip_ms}ms")
+    print(
+        f"{'todos':>6}{'per-item ms':>14}{'batch ms':>11}{'abatch ms':>11}{'speedup':>9}"
+    )
+    for n in args.items:
+        per_item_s = per_item(RoundTripStore(roundtrip), n)
+        batch_s = batched(RoundTripStore(roundtrip), n)
+        abatch_s = asyncio.run(abatched(RoundTripStore(roundtrip), n))
+        print(
+            f"{n:>6}{per_item_s * 1e3:>14.1f}{batch_s * 1e3:>11.1f}"
+            f"{abatch_s * 1e3:>11.1f}{per_item_s / batch_s:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
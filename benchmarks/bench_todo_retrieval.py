@@ -0,0 +1,99 @@
+"""Measure todo_manager prompt size and todo selection cost as a user's todo list grows.
+
+For each list size, fills a store with that many todos for one user (a few
+of them due soon), then builds the todo_manager prompt for a message about
+one of them, with every todo shown (`todo_retrieval_k=None`) and with the
+relevance-bounded selection (`todo_retrieval_k=10`). It reports estimated
+prompt tokens, the time to build the prompt (the first build includes the
+index), and the time to keep the index in sync with a 2-todo write.
+
+Usage:
+    python benchmarks/bench_todo_retrieval.py [--todos 10 50 200 500] [--repeat 50]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from langchain_core.messages import HumanMessage
+from langgraph.store.base import PutOp
+from langgraph.store.memory import InMemoryStore
+
+from agents.utils.compaction import estimate_tokens
+from agents.utils.memory import MemorySnapshotCache
+from agents.utils.nodes import _todo_manager_prompt
+
+TOPICS = ["dentist", "passport", "groceries", "taxes", "car", "gym", "garden", "bank"]
+
+
+def todo_ops(user_id: str, n: int) -> list[PutOp]:
+    now = datetime.now(timezone.utc)
+    return [
+        PutOp(
+            ("todo", user_id),
+            f"todo-{i}",
+            {
+                "task": f"Sort out the {TOPICS[i % len(TOPICS)]} item number {i}",
+                "time_to_complete": 30,
+                "deadline": (now + timedelta(days=i % 30)).isoformat(),
+                "solutions": [f"Call about {TOPICS[i % len(TOPICS)]}", "Do it online"],
+                "status": "not started",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    state = {
+        "messages": [HumanMessage(content="When is my passport appointment again?")]
+    }
+    print(
+        f"{'todos':>6}{'all: tokens':>13}{'ms':>8}{'k=10: tokens':>14}{'shown':>7}"
+        f"{'first ms':>10}{'ms':>8}{'sync us':>9}"
+    )
+    for n in args.todos:
+        store = InMemoryStore()
+        store.batch(todo_ops("user", n))
+        snapshots = MemorySnapshotCache(todo_limit=max(args.todos))
+        snapshot = snapshots.load(store, "user")
+
+        def prompt(k):
+            return _todo_manager_prompt(
+                state, snapshot, {"configurable": {"todo_retrieval_k": k}}
+            )
+
+        all_tokens = estimate_tokens(prompt(None))
+        all_ms = timed(lambda: prompt(None), args.repeat) * 1000
+
+        start = time.perf_counter()
+        bounded = prompt(10)
+        first_ms = (time.perf_counter() - start) * 1000
+        shown = bounded[0].content.count("'key': ")
+        bounded_ms = timed(lambda: prompt(10), args.repeat) * 1000
+
+        # write-through of an update_todos batch keeps the built index in sync
+        def write():
+            snapshots.batch(store, todo_ops("user", 2))
+
+        sync_us = timed(write, args.repeat) * 1e6
+        print(
+            f"{n:>6}{all_tokens:>13}{all_ms:>8.2f}{estimate_tokens(bounded):>14}"
+            f"{shown:>7}{first_ms:>10.2f}{bounded_ms:>8.2f}{sync_us:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
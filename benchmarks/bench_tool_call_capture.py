@@ -0,0 +1,140 @@
+"""Compare the run-tree listener the todo update used to rely on with ToolCallCapture.
+
+Runs the same trustcall todo extractor `update_todos` builds against a fake
+model, with a growing list of existing todos, and reports time per update
+and peak traced memory while the change summary is collected. The listener
+variant reproduces the old `Spy`: it gets the finished run tree from
+`with_listeners(on_end=...)`, walks it and summarises the collected calls
+the way the old `extract_tool_info` did.
+
+Usage:
+    python benchmarks/bench_tool_call_capture.py [--todos 10 100 500] [--updates 20]
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from fakes import ScriptedChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from trustcall import create_extractor
+
+from agents.utils.classes import ToolCallCapture
+from agents.utils.schemas import ToDo
+from agents.utils.tools import format_tool_change
+
+
+class RunTreeSpy:
+    """The previous Spy: collect tool calls by walking the finished run tree."""
+
+    def __init__(self):
+        self.called_tools = []
+
+    def __call__(self, run):
+        q = [run]
+        while q:
+            r = q.pop()
+            if r.child_runs:
+                q.extend(r.child_runs)
+            if r.run_type == "chat_model":
+                self.called_tools.append(
+                    r.outputs["generations"][0][0]["message"]["kwargs"]["tool_calls"]
+                )
+
+
+def extract_tool_info(tool_calls, schema_name="Memory"):
+    """Summarise the calls collected by RunTreeSpy (the old tools.extract_tool_info)."""
+    result_parts = []
+    for call_group in tool_calls:
+        for call in call_group:
+            change = format_tool_change(call, schema_name)
+            if change is not None:
+                result_parts.append(change)
+    return "\n\n".join(result_parts)
+
+
+def existing_todos(n: int) -> list[tuple[str, str, dict]]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        (
+            f"todo-{i}",
+            "ToDo",
+            {
+                "task": f"Task number {i} with some descriptive text",
+                "created_at": now,
+                "time_to_complete": 30,
+                "solutions": [f"Solution {j} for task {i}" for j in range(3)],
+                "status": "not started",
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def make_inputs(todos: list) -> dict:
+    # fresh messages per call: trustcall appends the existing docs to the system message in place
+    return {
+        "messages": [
+            SystemMessage(content="Reflect on the following interaction."),
+            HumanMessage(content="Add a task to renew my passport before June."),
+        ],
+        "existing": todos,
+    }
+
+
+def update_with_spy(extractor, todos) -> str:
+    spy = RunTreeSpy()
+    extractor.with_listeners(on_end=spy).invoke(make_inputs(todos))
+    return extract_tool_info(spy.called_tools, schema_name="ToDo")
+
+
+def update_with_capture(extractor, todos) -> str:
+    capture = ToolCallCapture(schema_name="ToDo")
+    extractor.invoke(make_inputs(todos), {"callbacks": [capture]})
+    return capture.summary()
+
+
+def measure(update, extractor, todos, updates: int) -> tuple[float, float]:
+    update(extractor, todos)
+    start = time.perf_counter()
+    for _ in range(updates):
+        update(extractor, todos)
+    per_update = (time.perf_counter() - start) / updates
+
+    tracemalloc.start()
+    update(extractor, todos)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_update, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--todos", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+
+    extractor = create_extractor(
+        ScriptedChatModel(), tools=[ToDo], tool_choice="ToDo", enable_inserts=True
+    )
+    print(
+        f"{'todos':>6}{'spy ms':>10}{'capture ms':>12}"
+        f"{'spy peak KiB':>14}{'capture peak KiB':>18}"
+    )
+    for n in args.todos:
+        todos = existing_todos(n)
+        # same changes reported (contents differ only in generated timestamps)
+        assert update_with_spy(extractor, todos).count(
+            "created:"
+        ) == update_with_capture(extractor, todos).count("created:")
+        spy_s, spy_peak = measure(update_with_spy, extractor, todos, args.updates)
+        cap_s, cap_peak = measure(update_with_capture, extractor, todos, args.updates)
+        print(
+            f"{n:>6}{spy_s * 1000:>10.2f}{cap_s * 1000:>12.2f}"
+            f"{spy_peak / 1024:>14.0f}{cap_peak / 1024:>18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Measure time-to-first-token of streamed answers against time-to-full-response.
+
+Runs each graph with `astream(stream_mode="messages")` against fakes that
+stream word by word (`--latency` before the first token, `--token-latency`
+between tokens) and records, per run, when the first user-facing chunk
+(answer text from `call_llm` or the joke of `tell_best_joke`) arrived and when
+the run finished, including the resume after the graph's interrupt. It
+also counts the chunks a client receives with intermediate steps hidden
+(the default) and with `stream_intermediate_steps` enabled.
+
+Usage:
+    python benchmarks/bench_ttft.py [--runs 50] [--latency 0.2] [--token-latency 0.02]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bench_graphs import percentile
+from fakes import FakeSearchTool, ScriptedChatModel, install_fakes
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+from langgraph.types import Command
+
+from agents import graphs
+
+# graph name -> (input message, resume value, nodes whose chunks the user reads)
+SCENARIOS = {
+    "web_searcher": (
+        "What is the weather like in city {i}?",
+        {"action": "continue"},
+        {"call_llm"},
+    ),
+    "joke_generator": (
+        "Tell me a joke about topic {i}",
+        {"feedback": "yes"},
+        {"tell_best_joke"},
+    ),
+}
+
+ANSWER = (
+    "Here is what I found: the forecast shows mild temperatures with a light "
+    "breeze in the afternoon and a small chance of rain later in the evening."
+)
+
+
+async def stream_run(graph, name: str, i: int, intermediate: bool) -> dict:
+    """Stream one run (and its resume); return first-token time, total time and chunks."""
+    message, resume, user_nodes = SCENARIOS[name]
+    config = {
+        "configurable": {
+            "thread_id": f"{name}-{intermediate}-{i}",
+            "stream_intermediate_steps": intermediate,
+            "llm_cache": False,
+        }
+    }
+    first = None
+    chunks = 0
+    start = time.perf_counter()
+    for inputs in (
+        {"messages": [("user", message.format(i=i))]},
+        Command(resume=resume),
+    ):
+        async for chunk, metadata in graph.astream(
+            inputs, config, stream_mode="messages"
+        ):
+            chunks += 1
+            # text only: call_llm's tool-call chunks are not read by the user
+            if (
+                first is None
+                and chunk.content
+                and metadata["langgraph_node"] in user_nodes
+            ):
+                first = time.perf_counter() - start
+    return {"ttft": first, "total": time.perf_counter() - start, "chunks": chunks}
+
+
+async def bench(name: str, runs: int, intermediate: bool) -> list[dict]:
+    graph = graphs[name].builder.compile(
+        checkpointer=MemorySaver(), store=InMemoryStore()
+    )
+    await stream_run(graph, name, -1, intermediate)
+    return [await stream_run(graph, name, i, intermediate) for i in range(runs)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    install_fakes(
+        ScriptedChatModel(
+            latency=args.latency, token_latency=args.token_latency, content=ANSWER
+        ),
+        FakeSearchTool(),
+    )
+
+    print(
+        f"runs={args.runs} latency={args.latency}s "
+        f"token latency={args.token_latency}s ({len(ANSWER.split())} tokens/answer)"
+    )
+    print(
+        f"{'graph':<16}{'ttft p50':>10}{'ttft p95':>10}{'full p50':>10}"
+        f"{'full p95':>10}{'chunks':>8}{'w/ steps':>10}"
+    )
+    for name in SCENARIOS:
+        results = asyncio.run(bench(name, args.runs, intermediate=False))
+        verbose = asyncio.run(bench(name, 3, intermediate=True))
+        ttft = [r["ttft"] for r in results if r["ttft"] is not None]
+        total = [r["total"] for r in results]
+        print(
+            f"{name:<16}{percentile(ttft, 50) * 1000:>10.0f}"
+            f"{percentile(ttft, 95) * 1000:>10.0f}"
+            f"{percentile(total, 50) * 1000:>10.0f}"
+            f"{percentile(total, 95) * 1000:>10.0f}"
+            f"{results[0]['chunks']:>8}{verbose[0]['chunks']:>10}"
+        )
+    print("(ms; ttft = first user-facing chunk, full = run and resume complete)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Offline stand-ins for the OpenAI chat model and Tavily search used by the graphs."""
+
+import asyncio
+import json
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForLLMRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    SystemMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agents.utils.tools import WebSearchInput
+
+
+class Latency:
+    """Seeded latency distribution in seconds.
+
+    `kind` is "constant" (always `mean`), "uniform" (`mean` ± `spread`) or
+    "lognormal" (median `mean`, `spread` is the sigma of the underlying
+    normal, so 0.5 gives a realistic long tail).
+    """
+
+    def __init__(
+        self, mean: float, kind: str = "constant", spread: float = 0.0, seed: int = 0
+    ):
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.mean = mean
+        self.kind = kind
+        self.spread = spread
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "Latency":
+        """Build from "0.2", "uniform:0.2:0.05" or "lognormal:0.2:0.5"."""
+        parts = spec.split(":")
+        if len(parts) == 1:
+            return cls(float(parts[0]), seed=seed)
+        return cls(float(parts[1]), parts[0], float(parts[2]), seed=seed)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            return max(0.0, self._random.uniform(-self.spread, self.spread) + self.mean)
+        if self.kind == "lognormal":
+            return self.mean * self._random.lognormvariate(0.0, self.spread)
+        return self.mean
+
+    def __repr__(self) -> str:
+        if self.kind == "constant":
+            return f"{self.mean}"
+        return f"{self.kind}:{self.mean}:{self.spread}"
+
+
+def _delay(latency: Any) -> float:
+    return latency.sample() if isinstance(latency, Latency) else latency
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with a fixed message after a fixed latency.
+
+    The sync path blocks its thread with `time.sleep` and the async path yields
+    with `asyncio.sleep`, mirroring how a real HTTP-backed model behaves.
+    `latency` may also be a `Latency` distribution. Responses carry usage
+    metadata estimated from message lengths (about 4 characters per token).
+
+    Under a streaming callback (e.g. `stream_mode="messages"`) the answer is
+    streamed word by word: the first chunk arrives after `latency` and each
+    following one after `token_latency`, so a full response takes
+    `latency + (chunks - 1) * token_latency` either way. Tool calls arrive
+    as a single chunk.
+    """
+
+    latency: Any = 0.0
+    token_latency: Any = 0.0
+    content: str = "ok"
+    model_name: str = "gpt-4o-mini"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def _result(self, messages: list[BaseMessage], message: AIMessage) -> ChatResult:
+        input_tokens = sum(len(str(m.content)) // 4 + 4 for m in messages)
+        output_tokens = (len(str(message.content)) + len(str(message.tool_calls))) // 4
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _respond(self, messages: list[BaseMessage], **kwargs: Any) -> ChatResult:
+        return self._result(messages, AIMessage(content=self.content))
+
+    def _chunks(self, result: ChatResult) -> list[AIMessageChunk]:
+        message = result.generations[0].message
+        if message.tool_calls or not message.content:
+            chunks = [
+                AIMessageChunk(
+                    content=message.content,
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": i,
+                        }
+                        for i, call in enumerate(message.tool_calls)
+                    ],
+                )
+            ]
+        else:
+            chunks = [
+                AIMessageChunk(content=token)
+                for token in re.findall(r"\S+\s*", str(message.content))
+            ]
+        # usage arrives with the last chunk, as with OpenAI's stream_usage
+        chunks[-1].usage_metadata = message.usage_metadata
+        return chunks
+
+    def _total_delay(self, result: ChatResult) -> float:
+        # first chunk after `latency`, every further one after `token_latency`
+        return _delay(self.latency) + sum(
+            _delay(self.token_latency) for _ in self._chunks(result)[1:]
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self._respond(messages, **kwargs)
+        time.sleep(self._total_delay(result))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        result = self._respond(messages, **kwargs)
+        await asyncio.sleep(self._total_delay(result))
+        return result
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for i, chunk in enumerate(self._chunks(self._respond(messages, **kwargs))):
+            time.sleep(_delay(self.token_latency if i else self.latency))
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=generation)
+            yield generation
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for i, chunk in enumerate(self._chunks(self._respond(messages, **kwargs))):
+            await asyncio.sleep(_delay(self.token_latency if i else self.latency))
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=generation)
+            yield generation
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self.bind(tools=tools, **kwargs)
+
+
+def _fake_value(schema: dict, defs: dict, name: str, text: str, items: int) -> Any:
+    if "$ref" in schema:
+        return _fake_value(defs[schema["$ref"].split("/")[-1]], defs, name, text, items)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    options = schema.get("anyOf") or schema.get("oneOf")
+    if options:
+        option = next((o for o in options if o.get("type") != "null"), options[0])
+        return _fake_value(option, defs, name, text, items)
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _fake_value(prop, defs, key, text, items)
+            for key, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [
+            _fake_value(schema.get("items", {}), defs, f"{name} {i}", text, items)
+            for i in range(items)
+        ]
+    if kind == "integer":
+        return 0
+    if kind == "number":
+        return 0.0
+    if kind == "boolean":
+        return False
+    if kind == "null":
+        return None
+    if schema.get("format") == "date-time":
+        return datetime.now(timezone.utc).isoformat()
+    return f"{name}: {text}"
+
+
+class ScriptedChatModel(FakeChatModel):
+    """Fake chat model that also calls tools and fills structured outputs.
+
+    When a tool is forced (`tool_choice`, as `with_structured_output` and
+    trustcall do) it calls that tool, or the first non-patch tool for "any".
+    Otherwise, with tools bound, it calls the first tool when the latest
+    non-system message is from the user and answers with `content` once a
+    tool result is back. Tool arguments are generated from the tool's JSON
+    schema (first enum value, `list_items` items per list, strings built
+    from the field name and the user's message) and can be pinned per tool
+    with `tool_args`.
+    """
+
+    tool_args: dict[str, dict[str, Any]] = {}
+    list_items: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _pick_tool(
+        self, messages: list[BaseMessage], tools: list[dict], tool_choice: Any
+    ) -> Optional[dict]:
+        if isinstance(tool_choice, dict):
+            tool_choice = tool_choice.get("function", {}).get("name")
+        if tool_choice in ("any", "required", True):
+            return next(
+                (t for t in tools if not t["function"]["name"].startswith("Patch")),
+                tools[0],
+            )
+        if isinstance(tool_choice, str) and tool_choice not in ("auto", "none"):
+            return next(t for t in tools if t["function"]["name"] == tool_choice)
+        last = next(
+            (m for m in reversed(messages) if not isinstance(m, SystemMessage)), None
+        )
+        if last is not None and last.type == "human":
+            return tools[0]
+        return None
+
+    def _respond(self, messages: list[BaseMessage], **kwargs: Any) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        tool = (
+            self._pick_tool(messages, tools, kwargs.get("tool_choice"))
+            if tools
+            else None
+        )
+        if tool is None:
+            return super()._respond(messages, **kwargs)
+
+        name = tool["function"]["name"]
+        schema = tool["function"].get("parameters", {})
+        # strings echo the user's last message (or the prompt, for system-only calls)
+        prompt = next(
+            (m.content for m in reversed(messages) if m.type == "human"),
+            messages[-1].content if messages else "",
+        )
+        args = _fake_value(
+            schema, schema.get("$defs", {}), name, str(prompt)[:80], self.list_items
+        )
+        args.update(self.tool_args.get(name, {}))
+        message = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": name, "args": args, "id": f"call_{random.getrandbits(48):x}"}
+            ],
+        )
+        return self._result(messages, message)
+
+
+class FakeSearchTool(BaseTool):
+    """Offline replacement for Tavily search with the same name, schema and output shape."""
+
+    name: str = "tavily_search_results_json"
+    description: str = "Fake web search returning canned results."
+    args_schema: type = WebSearchInput
+    response_format: str = "content_and_artifact"
+    latency: Any = 0.0
+    results: int = 2
+
+    def _results(self, query: str) -> tuple[list[dict], dict]:
+        results = [
+            {
+                "title": f"Result {i} for {query}",
+                "url": f"https://example.com/{i}",
+                "content": f"Fake content {i} about {query}.",
+                "score": 1.0 - i / 10,
+            }
+            for i in range(self.results)
+        ]
+        return results, {"query": query, "results": results}
+
+    def _run(
+        self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None
+    ) -> tuple[list[dict], dict]:
+        time.sleep(_delay(self.latency))
+        return self._results(query)
+
+    async def _arun(
+        self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None
+    ) -> tuple[list[dict], dict]:
+        await asyncio.sleep(_delay(self.latency))
+        return self._results(query)
+
+
+def install_fakes(llm: BaseChatModel, search: BaseTool) -> None:
+    """Point the graphs' shared chat model and the web search tool at offline fakes."""
+    from agents.utils import nodes, tools
+
+    nodes.llm = llm
+    nodes.llm_cache.clear()
+    tools.web_search.factory = lambda: search
+    tools.web_search._tool = None
+    tools.web_search.cache.clear()
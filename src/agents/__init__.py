@@ -1,20 +1,29 @@
-import os
-import getpass
+"""Graphs listed in langgraph.json, imported on first access."""
 
-from . import web_searcher, joke_generator, todos_manager
+import importlib
+from collections.abc import Mapping
 
-def _set_env(var: str):
-    if not os.environ.get(var):
-        os.environ[var] = getpass.getpass(f"{var}: ")
+# graph name -> module, as listed in langgraph.json
+_GRAPH_MODULES = {
+    "web_searcher": "agents.web_searcher",
+    "joke_generator": "agents.joke_generator",
+    "todos_manager": "agents.todos_manager",
+}
 
-_set_env("ANTHROPIC_API_KEY")
-_set_env("OPENAI_API_KEY")
-_set_env('TAVILY_API_KEY')
 
-graphs = {
-    "web_searcher": web_searcher,
-    "joke_generator": joke_generator,
-    "todos_manager": todos_manager
-}
+class _LazyGraphs(Mapping):
+    """Graph modules by name, imported on first access so each graph loads on its own."""
+
+    def __getitem__(self, name):
+        return importlib.import_module(_GRAPH_MODULES[name])
+
+    def __iter__(self):
+        return iter(_GRAPH_MODULES)
+
+    def __len__(self):
+        return len(_GRAPH_MODULES)
+
+
+graphs = _LazyGraphs()
 
 __all__ = ["graphs"]
@@ -0,0 +1,350 @@
+"""Run a graph over every request in a JSONL file and write one JSON result per line.
+
+Each input line is an object with an optional "id" (the line number
+otherwise), either "input" (the graph's input state) or "message" (a user
+message), and optional "config" (configurable values for that run, on top
+of --configurable). Results are appended to the output file as runs finish:
+{"id", "status", "reply", "state", "interrupts", "resumes", "seconds",
+"error"}, where status is "done", "interrupted" or "error".
+
+Runs stop at interrupts (`human_feedback`, `human_review_node`, the
+`human_assistance` tool). With --interrupts auto they are answered from
+AUTO_ANSWERS (override per node with --answers) up to --max-resumes times;
+with --interrupts skip the run is recorded as "interrupted" and its thread
+is left waiting for a human.
+
+Rerunning a job with the same output file skips ids already written (except
+errors, which run again), so a crashed job picks up where it stopped. With a
+persistent checkpointer (CHECKPOINTER=sqlite) runs that were cut off
+mid-way continue from their last checkpoint instead of starting over.
+Without one, the in-memory threads of finished and failed runs are deleted
+as their results are written, so memory doesn't grow with the input file.
+
+Usage:
+    python -m agents.batch joke_generator requests.jsonl results.jsonl
+        [--concurrency 8 | --processes 4] [--interrupts auto|skip]
+        [--answers '{"human_feedback": {"feedback": "yes"}}']
+        [--configurable '{"joke_planning_mode": "fused"}'] [--job nightly-1]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Literal, Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+from pydantic import BaseModel
+
+from agents import graphs
+
+logger = logging.getLogger(__name__)
+
+# resume values for --interrupts auto, by the node that interrupted
+AUTO_ANSWERS = {
+    "human_feedback": {"feedback": "yes"},
+    "human_review_node": {"action": "continue"},
+    "human_assistance_tool": {"correct": "yes"},
+}
+
+
+def load_graph(name: str):
+    """Compile a graph from langgraph.json with a checkpointer and store for offline runs.
+
+    Uses CHECKPOINTER / STORE when set, in-memory ones otherwise, and keeps the
+    graph's metrics callbacks.
+    """
+    from langgraph.store.memory import InMemoryStore
+
+    from agents.utils.checkpoint import get_checkpointer
+    from agents.utils.store import get_store
+
+    module = graphs[name]
+    return module.builder.compile(
+        checkpointer=get_checkpointer() or MemorySaver(),
+        store=get_store() or InMemoryStore(),
+    ).with_config(module.graph.config)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "content": value.content}
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def _interrupts(snapshot) -> list[tuple[str, Any]]:
+    return [(task.name, i) for task in snapshot.tasks for i in task.interrupts]
+
+
+class BatchRunner:
+    """Run one graph over batch items, resolving or skipping interrupts by policy."""
+
+    def __init__(
+        self,
+        graph: str,
+        job: str,
+        interrupts: Literal["auto", "skip"] = "auto",
+        answers: Optional[dict[str, Any]] = None,
+        max_resumes: int = 5,
+        configurable: Optional[dict[str, Any]] = None,
+    ):
+        """Compile `graph` for the batch `job`; see the module docstring for options."""
+        self.graph_name = graph
+        self.graph = load_graph(graph)
+        # in-memory checkpoints can't be resumed after exit, so they are dropped once written
+        self.persistent = not isinstance(self.graph.checkpointer, MemorySaver)
+        self.job = job
+        self.interrupts = interrupts
+        self.answers = {**AUTO_ANSWERS, **(answers or {})}
+        self.max_resumes = max_resumes
+        self.configurable = configurable or {}
+
+    async def run(self, item_id: str, item: dict[str, Any]) -> dict[str, Any]:
+        """Run one item to completion or to an unresolved interrupt; never raises."""
+        start = time.perf_counter()
+        record = {"id": item_id}
+        try:
+            record.update(await self._run(item_id, item))
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        if not self.persistent and record["status"] != "interrupted":
+            await self.graph.checkpointer.adelete_thread(self._thread_id(item_id))
+        return record
+
+    def _thread_id(self, item_id: str) -> str:
+        return f"{self.job}:{item_id}"
+
+    async def _run(self, item_id: str, item: dict[str, Any]) -> dict[str, Any]:
+        config = {
+            "configurable": {
+                **self.configurable,
+                **(item.get("config") or {}),
+                "thread_id": self._thread_id(item_id),
+            }
+        }
+        snapshot = await self.graph.aget_state(config)
+        if not snapshot.next and not snapshot.values:
+            await self.graph.ainvoke(_input(item), config)
+            snapshot = await self.graph.aget_state(config)
+        elif snapshot.next and not _interrupts(snapshot):
+            # cut off mid-run by a crash: continue from the last checkpoint
+            await self.graph.ainvoke(None, config)
+            snapshot = await self.graph.aget_state(config)
+
+        resumes = 0
+        while pending := _interrupts(snapshot):
+            answers = {
+                interrupt.id: self.answers[node]
+                for node, interrupt in pending
+                if node in self.answers
+            }
+            if (
+                self.interrupts == "skip"
+                or resumes >= self.max_resumes
+                or len(answers) < len(pending)
+            ):
+                return {
+                    **_result(snapshot.values),
+                    "status": "interrupted",
+                    "interrupts": [
+                        {"node": node, "value": interrupt.value}
+                        for node, interrupt in pending
+                    ],
+                    "resumes": resumes,
+                }
+            await self.graph.ainvoke(Command(resume=answers), config)
+            snapshot = await self.graph.aget_state(config)
+            resumes += 1
+        return {**_result(snapshot.values), "status": "done", "resumes": resumes}
+
+
+def _input(item: dict[str, Any]) -> dict[str, Any]:
+    if "input" in item:
+        return item["input"]
+    if "message" in item:
+        return {"messages": [("user", item["message"])]}
+    raise ValueError('batch item needs "input" or "message"')
+
+
+def _result(values: dict[str, Any]) -> dict[str, Any]:
+    messages = values.get("messages") or []
+    return {
+        "reply": messages[-1].content if messages else None,
+        "state": {k: v for k, v in values.items() if k != "messages"},
+    }
+
+
+def read_items(path: str) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield (id, item) per non-empty line, streaming the file."""
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield str(item.get("id", f"line-{line_no}")), item
+
+
+def finished_ids(path: str) -> set[str]:
+    """Ids already written to an output file; errors don't count, so they run again."""
+    if not os.path.exists(path):
+        return set()
+    status = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # torn last line from a crash
+                continue
+            status[record["id"]] = record["status"]
+    return {i for i, s in status.items() if s != "error"}
+
+
+# per-process runner and event loop for --processes (one loop, so pooled clients stay valid)
+_worker_runner: Optional[BatchRunner] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(options: dict[str, Any]) -> None:
+    global _worker_runner, _worker_loop
+    _worker_runner = BatchRunner(**options)
+    _worker_loop = asyncio.new_event_loop()
+
+
+def _run_in_worker(item_id: str, item: dict[str, Any]) -> dict[str, Any]:
+    return _worker_loop.run_until_complete(_worker_runner.run(item_id, item))
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    options: dict[str, Any],
+    concurrency: int = 8,
+    processes: int = 0,
+) -> Counter:
+    """Run every unfinished item of `input_path`, appending results to `output_path`.
+
+    At most `concurrency` runs are in flight on this event loop, or one per
+    process with `processes` > 0. Returns the number of results per status.
+    """
+    done = finished_ids(output_path)
+    counts = Counter(skipped=0)
+    if processes:
+        pool = ProcessPoolExecutor(
+            processes,
+            # spawn, since forking would copy the parent's locks and client pools
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(options,),
+        )
+        loop = asyncio.get_running_loop()
+        limit = processes
+
+        def submit(item_id, item):
+            return loop.run_in_executor(pool, _run_in_worker, item_id, item)
+    else:
+        pool = None
+        runner = BatchRunner(**options)
+        limit = concurrency
+
+        def submit(item_id, item):
+            return asyncio.ensure_future(runner.run(item_id, item))
+
+    with open(output_path, "a+") as out:
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                # finish a line torn by a crash so the next record starts clean
+                out.write("\n")
+
+        def write(finished) -> None:
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record, default=_jsonable) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                if record["status"] == "error":
+                    logger.warning("%s failed: %s", record["id"], record["error"])
+
+        pending = set()
+        try:
+            for item_id, item in read_items(input_path):
+                if item_id in done:
+                    counts["skipped"] += 1
+                    continue
+                done.add(item_id)
+                if len(pending) >= limit:
+                    finished, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    write(finished)
+                pending.add(submit(item_id, item))
+            while pending:
+                finished, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                write(finished)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the command line interface."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("graph", choices=list(graphs))
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--processes", type=int, default=0, help="run in a process pool instead"
+    )
+    parser.add_argument("--interrupts", choices=["auto", "skip"], default="auto")
+    parser.add_argument("--answers", type=json.loads, default={})
+    parser.add_argument("--max-resumes", type=int, default=5)
+    parser.add_argument("--configurable", type=json.loads, default={})
+    parser.add_argument(
+        "--job", help="thread id prefix; defaults to the output file name"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    options = {
+        "graph": args.graph,
+        "job": args.job or os.path.splitext(os.path.basename(args.output))[0],
+        "interrupts": args.interrupts,
+        "answers": args.answers,
+        "max_resumes": args.max_resumes,
+        "configurable": args.configurable,
+    }
+    start = time.perf_counter()
+    counts = asyncio.run(
+        run_batch(args.input, args.output, options, args.concurrency, args.processes)
+    )
+    elapsed = time.perf_counter() - start
+    ran = sum(n for status, n in counts.items() if status != "skipped")
+    logger.info(
+        "%d runs in %.1fs (%.1f/s): %s",
+        ran,
+        elapsed,
+        ran / elapsed if elapsed else 0.0,
+        ", ".join(f"{status} {n}" for status, n in sorted(counts.items())),
+    )
+
+
+if __name__ == "__main__":
+    main()
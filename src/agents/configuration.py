@@ -1,14 +1,67 @@
 """Define the configurable parameters for the agent."""
 
 from __future__ import annotations
-from dataclasses import dataclass, fields
-from typing import Optional
+from dataclasses import dataclass, field, fields
+from typing import Literal, Optional
 from langchain_core.runnables import RunnableConfig
 
 @dataclass(kw_only=True)
 class Configuration:
     """The configuration for the agent."""
     user_id: str = "default-user"
+    # how generate_subjects fans out to jokes: one node per subject ("fanout"),
+    # one llm.batch over all subjects ("batch"), or one structured call ("single_call")
+    joke_generation_mode: Literal["fanout", "batch", "single_call"] = "fanout"
+    # max in-flight requests when joke_generation_mode is "batch"
+    joke_batch_max_concurrency: int = 5
+    # serve repeated llm calls from nodes.llm_cache
+    llm_cache: bool = True
+    # nodes that always call the llm: by default the creative ones, so a repeated
+    # request gets new subjects and jokes rather than the cached ones
+    llm_cache_skip_nodes: list[str] = field(
+        default_factory=lambda: [
+            "plan_joke",
+            "generate_subjects",
+            "generate_joke",
+            "generate_jokes",
+        ]
+    )
+    # serve todo manager memories from nodes.memory_snapshots instead of searching the store every turn
+    memory_snapshot_cache: bool = True
+    # fold older turns into a running summary once history exceeds this many (estimated) tokens; None disables
+    compaction_token_budget: Optional[int] = None
+    # most recent user turns that are always kept verbatim
+    compaction_keep_turns: int = 2
+    # todos shown to todo_manager once a user has more: the k most relevant to the latest
+    # messages plus any due soon; None shows every loaded todo (update_todos always gets all)
+    todo_retrieval_k: Optional[int] = 10
+    # open todos due within this many hours (or overdue) are always shown
+    todo_due_soon_hours: float = 48
+    # stream tokens of intermediate llm calls (routing, topic/subjects, joke selection,
+    # memory extraction) in stream_mode="messages"; by default only user-facing replies stream
+    stream_intermediate_steps: bool = False
+    # how the joke graph gets from a message to its subjects: router, topic and subjects calls
+    # in sequence ("chain"); topic and subjects started alongside the router and discarded if
+    # the request is rejected ("speculative"); or one plan_joke call for all three ("fused")
+    joke_planning_mode: Literal["chain", "speculative", "fused"] = "chain"
+    # chat model per tier: routers and classifiers (joke routing, joke ranking) use fast_model,
+    # all other nodes generation_model. todo_manager stays on generation_model since it also
+    # writes the reply; node_models={"todo_manager": "fast"} moves it
+    fast_model: str = "gpt-4.1-nano"
+    generation_model: str = "gpt-4o-mini"
+    # per-node overrides, node name -> "fast", "generation" or a model name
+    node_models: dict[str, str] = field(default_factory=dict)
+    # nodes whose structured-output and call_llm calls are hedged: a call that hasn't answered
+    # within the node's recent hedge_quantile latency gets one duplicate request, the first
+    # answer wins and the other is cancelled. Calls streaming to the client aren't hedged
+    hedge_nodes: list[str] = field(default_factory=list)
+    hedge_quantile: float = 0.95
+    # most hedges per node, as a fraction of its recent calls
+    hedge_max_ratio: float = 0.1
+    # seconds a node's llm call may take, hedges and retries included, before TimeoutError
+    node_time_budgets: dict[str, float] = field(default_factory=dict)
+    # retries of failed calls of hedged or budgeted nodes, after a jittered exponential backoff
+    llm_retries: int = 1
 
     @classmethod
     def from_runnable_config(
@@ -1,39 +1,66 @@
+"""Joke generator graph."""
+
+import os
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from agents.utils.nodes import (
+    adecide_joke_route,
+    agenerate_joke,
+    agenerate_jokes,
+    agenerate_subjects,
+    aplan_joke,
+    aselect_best_joke,
     decide_joke_route,
     generate_joke,
+    generate_jokes,
     generate_subjects,
     human_feedback,
+    plan_joke,
     reject_joke_request,
     select_best_joke,
     tell_best_joke,
+    warmup_runnables,
 )
 from agents.utils.state import OverallJokeState
-from agents.utils.edges import continue_to_jokes, human_feedback_loop, should_generate_joke
+from agents.utils.edges import (
+    choose_joke_planner,
+    continue_to_jokes,
+    human_feedback_loop,
+    route_joke_plan,
+)
+from agents.utils.checkpoint import get_checkpointer
+from agents.utils.metrics import NodeMetrics, start_metrics_exporter
+from agents.utils.prompting import PromptCacheTracker
+from agents.utils.runnables import sync_async_node
 
 # add graph state
 builder = StateGraph(OverallJokeState)
 
 # add nodes
-builder.add_node("decide_joke_route", decide_joke_route)
+builder.add_node("decide_joke_route", sync_async_node(decide_joke_route, adecide_joke_route))
+builder.add_node("plan_joke", sync_async_node(plan_joke, aplan_joke))
 builder.add_node("reject_joke_request", reject_joke_request)
-builder.add_node("generate_subjects", generate_subjects)
-builder.add_node("generate_joke", generate_joke)
-builder.add_node("select_best_joke", select_best_joke)
+builder.add_node("generate_subjects", sync_async_node(generate_subjects, agenerate_subjects))
+builder.add_node("generate_joke", sync_async_node(generate_joke, agenerate_joke))
+builder.add_node("generate_jokes", sync_async_node(generate_jokes, agenerate_jokes))
+builder.add_node("select_best_joke", sync_async_node(select_best_joke, aselect_best_joke))
 builder.add_node("human_feedback", human_feedback)
 builder.add_node("tell_best_joke", tell_best_joke)
 
 # add edges
-builder.add_edge(START, "decide_joke_route")
-builder.add_conditional_edges(
-    "decide_joke_route",
-    should_generate_joke,
-    ["generate_subjects", "reject_joke_request"],
-)
-builder.add_conditional_edges("generate_subjects", continue_to_jokes, ["generate_joke"])
+# joke_planning_mode "fused" plans with one call instead of the router chain
+builder.add_conditional_edges(START, choose_joke_planner, ["decide_joke_route", "plan_joke"])
+# planners that picked the subjects already go straight to the jokes
+for planner in ("decide_joke_route", "plan_joke"):
+    builder.add_conditional_edges(
+        planner,
+        route_joke_plan,
+        ["generate_subjects", "generate_joke", "generate_jokes", "reject_joke_request"],
+    )
+builder.add_conditional_edges("generate_subjects", continue_to_jokes, ["generate_joke", "generate_jokes"])
 builder.add_edge("generate_joke", "select_best_joke")
+builder.add_edge("generate_jokes", "select_best_joke")
 builder.add_edge("select_best_joke", "human_feedback")
 builder.add_conditional_edges("human_feedback", human_feedback_loop, ["select_best_joke", "tell_best_joke"])
 builder.add_edge("tell_best_joke", END)
@@ -42,6 +69,17 @@ builder.add_edge("reject_joke_request", END)
 # add memory
 # memory = MemorySaver()
 
+# optionally prebuild bound models and extractors before the first run
+if os.environ.get("WARMUP_RUNNABLES"):
+    warmup_runnables("joke_generator")
+
 # compile graph
 # graph = builder.compile(checkpointer=memory)
-graph = builder.compile()
+# checkpointer from CHECKPOINTER (memory / sqlite); unset leaves it to the LangGraph server
+# track provider prompt-cache hits and per-node latency, tokens and cost per graph
+graph = builder.compile(checkpointer=get_checkpointer()).with_config(
+    callbacks=[PromptCacheTracker("joke_generator"), NodeMetrics("joke_generator")]
+)
+
+# optionally export node metrics (METRICS_PORT / METRICS_FILE)
+start_metrics_exporter()
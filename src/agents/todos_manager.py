@@ -1,29 +1,44 @@
+"""Todo manager graph."""
+
+import os
 from typing import TypedDict
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.store.memory import InMemoryStore
 
 
 from agents.utils.nodes import (
+    acompact_messages,
+    atodo_manager,
+    aupdate_instructions,
+    aupdate_profile,
+    aupdate_todos,
+    compact_messages,
     todo_manager,
     update_instructions,
     update_profile,
     update_todos,
+    warmup_runnables,
 )
 from agents.utils.state import ToDoManagerState
 from agents.utils.edges import memory_update_router
+from agents.utils.checkpoint import get_checkpointer
+from agents.utils.store import get_store
+from agents.utils.metrics import NodeMetrics, start_metrics_exporter
+from agents.utils.prompting import PromptCacheTracker
+from agents.utils.runnables import sync_async_node
 
 # add graph state
 builder = StateGraph(ToDoManagerState)
 
 # add nodes
-builder.add_node(todo_manager)
-builder.add_node(update_profile)
-builder.add_node(update_instructions)
-builder.add_node(update_todos)
+builder.add_node(sync_async_node(compact_messages, acompact_messages))
+builder.add_node(sync_async_node(todo_manager, atodo_manager))
+builder.add_node(sync_async_node(update_profile, aupdate_profile))
+builder.add_node(sync_async_node(update_instructions, aupdate_instructions))
+builder.add_node(sync_async_node(update_todos, aupdate_todos))
 
 # add edges
-builder.add_edge(START, "todo_manager")
+builder.add_edge(START, "compact_messages")
+builder.add_edge("compact_messages", "todo_manager")
 builder.add_conditional_edges(
     "todo_manager",
     memory_update_router,
@@ -34,11 +49,24 @@ builder.add_edge("update_instructions", "todo_manager")
 builder.add_edge("update_todos", "todo_manager")
 
 # store for across thread memory (long term memory)
-across_thread_memory = InMemoryStore()
+# across_thread_memory = InMemoryStore()
 
 # checkpointer for within thread memory (short term memory)
-within_thread_memory = MemorySaver()
+# within_thread_memory = MemorySaver()
+
+# optionally prebuild bound models and extractors before the first run
+if os.environ.get("WARMUP_RUNNABLES"):
+    warmup_runnables("todos_manager")
 
 # compile graph
 # graph = builder.compile(checkpointer=within_thread_memory, store=across_thread_memory)
-graph = builder.compile()
+# checkpointer and store from CHECKPOINTER / STORE (memory / sqlite); unset leaves them to the LangGraph server
+# track provider prompt-cache hits and per-node latency, tokens and cost per graph
+graph = builder.compile(
+    checkpointer=get_checkpointer(), store=get_store()
+).with_config(
+    callbacks=[PromptCacheTracker("todos_manager"), NodeMetrics("todos_manager")]
+)
+
+# optionally export node metrics (METRICS_PORT / METRICS_FILE)
+start_metrics_exporter()
@@ -1,9 +1,21 @@
-from . import edges
-from . import nodes
-from . import state
-from . import tools
-from . import prompts
-from . import schemas
-from . import classes
-
-__all__ = ["edges", "nodes", "state", "tools", "prompts", "schemas", "classes"]
+"""Nodes, edges, state and helpers shared by the graphs."""
+
+import importlib
+
+__all__ = [
+    "edges",
+    "nodes",
+    "state",
+    "tools",
+    "prompts",
+    "schemas",
+    "classes",
+    "runnables",
+]
+
+
+# submodules are imported on first attribute access, so importing one utility doesn't load them all
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,390 @@
+"""Caches for LLM responses and tool results."""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional, Sequence, Union
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+# message fields that never reach the provider, so they must not split cache keys
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """Hold at most `maxsize` entries, each for `ttl` seconds (None: no expiry)."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for `key`, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value`, evicting the least recently used entries past `maxsize`."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove `key` and return its value, or `default` if missing."""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries, expired ones included until read."""
+        return len(self._data)
+
+
+class _SQLiteTier:
+    """File-backed key/value table used as the second LLM cache tier."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        if ttl:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - ttl,)
+            )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (self.ttl and row[1] < time.time() - self.ttl):
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """Drop per-call message fields and surrounding whitespace from a serialized prompt."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt.strip()
+    for message in messages if isinstance(messages, list) else []:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if not isinstance(kwargs, dict):
+            continue
+        for field in _VOLATILE_MESSAGE_FIELDS:
+            kwargs.pop(field, None)
+        if isinstance(kwargs.get("content"), str):
+            kwargs["content"] = kwargs["content"].strip()
+    return json.dumps(messages, sort_keys=True)
+
+
+class LLMCache(BaseCache):
+    """LLM response cache with an in-memory LRU/TTL tier and an optional SQLite tier.
+
+    Keys hash the normalized messages together with the `llm_string` LangChain
+    builds for each call, which carries the model name, sampling params, bound
+    tools and the structured-output schema. Attach it with
+    `ChatOpenAI(cache=LLMCache(...))`; a model copy with `cache=False` skips it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 3600,
+        path: Optional[str] = None,
+    ):
+        """Keep up to `maxsize` responses in memory for `ttl` seconds, and on disk at `path` if set."""
+        self.ttl = ttl
+        self.path = path
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._disk_tier: Optional[_SQLiteTier] = None
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def _disk(self) -> Optional[_SQLiteTier]:
+        # the database file is opened on first use, not at construction
+        if self.path and self._disk_tier is None:
+            with self._disk_lock:
+                if self._disk_tier is None:
+                    self._disk_tier = _SQLiteTier(self.path, ttl=self.ttl)
+        return self._disk_tier
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        payload = f"{_normalize_prompt(prompt)}\x00{llm_string}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """Return the cached generations for a prompt and model, or None."""
+        key = self._key(prompt, llm_string)
+        value = self._memory.get(key)
+        if value is None and self._disk is not None:
+            raw = self._disk.get(key)
+            if raw is not None:
+                value = [loads(generation) for generation in json.loads(raw)]
+                self._memory.set(key, value)
+                self.disk_hits += 1
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        """Cache the generations for a prompt and model in every tier."""
+        key = self._key(prompt, llm_string)
+        self._memory.set(key, list(return_val))
+        if self._disk is not None:
+            self._disk.set(key, json.dumps([dumps(g) for g in return_val]))
+
+    async def alookup(
+        self, prompt: str, llm_string: str
+    ) -> Optional[Sequence[Generation]]:
+        """Async `lookup`; both tiers are local, so it doesn't block for long."""
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        """Async `update`."""
+        self.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        """Empty both tiers and reset the counters."""
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current in-memory size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self._memory),
+        }
+
+
+class CachedTool(BaseTool):
+    """Wrap a tool with a TTL cache and singleflight coalescing of identical calls.
+
+    Arguments are normalized (case and whitespace of strings) before keying, and
+    concurrent calls with the same key share one upstream request on both the
+    sync and async paths. The wrapper exposes the wrapped tool's name and
+    schema, so models bound to it see no difference. Failed calls are not cached.
+
+    `tool` may also be a zero-argument factory, in which case the wrapped tool
+    is only built on first call and `name`, `description` and `args_schema`
+    must be passed explicitly.
+    """
+
+    factory: Callable[[], BaseTool]
+    cache: TTLCache
+    response_format: str = "content_and_artifact"
+    # acquired before each upstream request (cache hits and coalesced calls skip it)
+    rate_limiter: Optional[BaseRateLimiter] = None
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+    _tool: Optional[BaseTool] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _ainflight: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(
+        self,
+        tool: Union[BaseTool, Callable[[], BaseTool]],
+        maxsize: int = 512,
+        ttl: Optional[float] = 300,
+        **kwargs: Any,
+    ):
+        """Wrap `tool` (or a factory for it) with a `maxsize` entry cache of `ttl` seconds."""
+        if isinstance(tool, BaseTool):
+            kwargs = {
+                "name": tool.name,
+                "description": tool.description,
+                "args_schema": tool.args_schema,
+                **kwargs,
+            }
+        super().__init__(
+            factory=(lambda: tool) if isinstance(tool, BaseTool) else tool,
+            cache=TTLCache(maxsize=maxsize, ttl=ttl),
+            **kwargs,
+        )
+
+    @property
+    def tool(self) -> BaseTool:
+        """The wrapped tool, built on first access when a factory was given."""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    self._tool = self.factory()
+        return self._tool
+
+    @staticmethod
+    def _key(kwargs: dict[str, Any]) -> str:
+        normalized = {
+            k: " ".join(v.lower().split()) if isinstance(v, str) else v
+            for k, v in kwargs.items()
+        }
+        return json.dumps(normalized, sort_keys=True, default=str)
+
+    def _tool_call(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        # invoke with a tool call so the wrapped tool hands back its artifact too
+        return {
+            "name": self.tool.name,
+            "args": kwargs,
+            "id": str(uuid.uuid4()),
+            "type": "tool_call",
+        }
+
+    def _run(
+        self,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> tuple[Any, Any]:
+        key = self._key(kwargs)
+        with self._lock:
+            cached = self.cache.get(key)
+            future = self._inflight.get(key) if cached is None else None
+            leader = cached is None and future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if cached is not None:
+            self.hits += 1
+            return cached
+        if not leader:
+            self.coalesced += 1
+            return future.result()
+
+        self.misses += 1
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            message = self.tool.invoke(
+                self._tool_call(kwargs),
+                config={"callbacks": run_manager.get_child()} if run_manager else None,
+            )
+            result = (message.content, message.artifact)
+            self.cache.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def _arun(
+        self,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> tuple[Any, Any]:
+        key = self._key(kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._ainflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._acall(key, kwargs, run_manager))
+            self._ainflight[key] = task
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+        # shield so one cancelled waiter doesn't cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _acall(
+        self,
+        key: str,
+        kwargs: dict[str, Any],
+        run_manager: Optional[AsyncCallbackManagerForToolRun],
+    ) -> tuple[Any, Any]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire()
+        message = await self.tool.ainvoke(
+            self._tool_call(kwargs),
+            config={"callbacks": run_manager.get_child()} if run_manager else None,
+        )
+        result = (message.content, message.artifact)
+        self.cache.set(key, result)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss/coalesced counters and the current cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self.cache),
+        }
@@ -0,0 +1,626 @@
+"""SQLite checkpointer with delta-encoded message history."""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from agents.utils.cache import TTLCache
+
+_EMPTY = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    -- set for deltas: the version whose value this one appends to
+    base_version TEXT,
+    -- deltas since the last full value
+    depth INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+# a delta blob and every delta it builds on, newest first
+_CHAIN_QUERY = """
+WITH RECURSIVE chain(version, type, blob, base_version, depth, step) AS (
+    SELECT version, type, blob, base_version, depth, 0 FROM blobs
+    WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?
+    UNION ALL
+    SELECT b.version, b.type, b.blob, b.base_version, b.depth, chain.step + 1
+    FROM blobs b JOIN chain ON b.version = chain.base_version
+    WHERE b.thread_id = ? AND b.checkpoint_ns = ? AND b.channel = ?
+)
+SELECT type, blob, base_version, depth FROM chain ORDER BY step
+"""
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """Checkpointer persisted in a SQLite database in WAL mode.
+
+    Works like `MemorySaver` (one row per checkpoint, one blob per channel
+    version, pending writes per task) but survives restarts and keeps
+    nothing in RAM beyond a small cache. Channels in `delta_channels`
+    (the `messages` history by default) are stored as appended deltas: when
+    the new list starts with the same message objects as the last version
+    written for the thread, only the new messages are serialized, and the
+    value is rebuilt from the chain on read. Any other change (removals,
+    replaced messages, a fork) writes the full list, as does every
+    `snapshot_every`-th delta so chains stay short.
+
+    Every `compact_every` checkpoints of a thread, checkpoints beyond the
+    latest `keep_checkpoints` per namespace are dropped with their writes
+    and unreferenced blobs, and the oldest kept delta is rewritten as a full
+    value. `compact_every=None` disables it; `compact()` runs it on demand.
+    """
+
+    def __init__(
+        self,
+        path: str = "checkpoints.sqlite",
+        *,
+        delta_channels: Sequence[str] = ("messages",),
+        snapshot_every: int = 32,
+        compact_every: Optional[int] = 100,
+        keep_checkpoints: int = 20,
+        heads_maxsize: int = 1024,
+        serde: Any = None,
+    ):
+        """Open (on first use) the database at `path`; see the class docstring for options."""
+        super().__init__(serde=serde)
+        self.path = path
+        self.delta_channels = frozenset(delta_channels)
+        self.snapshot_every = snapshot_every
+        self.compact_every = compact_every
+        self.keep_checkpoints = keep_checkpoints
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # thread_id -> {(ns, channel): (version, list written, depth)}, to spot appends
+        self._heads = TTLCache(maxsize=heads_maxsize)
+        self._puts: dict[str, int] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The database connection, opened and migrated on first use."""
+        # opened on first use, so importing a graph that selects it stays side-effect free
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    # WAL makes NORMAL durable across crashes, without an fsync per commit
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(_SCHEMA)
+                    conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the connection; the next call reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._heads.clear()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Return a version string that sorts after `current`."""
+        # same scheme as MemorySaver: sortable counter plus a random tie-breaker
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # reads
+
+    def _load_value(
+        self, thread_id: str, ns: str, channel: str, version: str, head: bool = False
+    ) -> Any:
+        rows = self.conn.execute(
+            _CHAIN_QUERY,
+            (thread_id, ns, channel, version, thread_id, ns, channel),
+        ).fetchall()
+        if not rows or rows[0][0] == "empty":
+            return _EMPTY
+        if rows[0][2] is None:
+            value = self.serde.loads_typed((rows[0][0], rows[0][1]))
+        else:
+            # newest first: a full value at the end, deltas before it
+            value = []
+            for type_, blob, _, _ in reversed(rows):
+                value.extend(self.serde.loads_typed((type_, blob)))
+        if head and channel in self.delta_channels and isinstance(value, list):
+            # the run resumes with these objects, so the next write can append to them
+            self._head(thread_id)[(ns, channel)] = (version, tuple(value), rows[0][3])
+        return value
+
+    def _load_blobs(
+        self, thread_id: str, ns: str, versions: ChannelVersions, head: bool = False
+    ) -> dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            value = self._load_value(thread_id, ns, channel, str(version), head)
+            if value is not _EMPTY:
+                values[channel] = value
+        return values
+
+    def _head(self, thread_id: str) -> dict:
+        heads = self._heads.get(thread_id)
+        if heads is None:
+            heads = {}
+            self._heads.set(thread_id, heads)
+        return heads
+
+    def _tuple(self, row: tuple, head: bool = False) -> CheckpointTuple:
+        thread_id, ns, checkpoint_id, parent_id, type_, blob, meta_type, meta = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, blob))
+        writes = self.conn.execute(
+            "SELECT task_id, idx, channel, type, blob, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(
+                    thread_id, ns, checkpoint["channel_versions"], head
+                ),
+            },
+            metadata=self.serde.loads_typed((meta_type, meta)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((w_type, w_blob)))
+                for task_id, _, channel, w_type, w_blob, _ in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the checkpoint for `config` (the latest when it has no id), or None."""
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? "
+        )
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    query + "AND checkpoint_id = ?", (thread_id, ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    query + "ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, ns)
+                ).fetchone()
+            return self._tuple(row, head=True) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Yield checkpoints matching `config`, `filter` and `before`, newest first."""
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY checkpoint_id DESC"
+        )
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            # metadata is serialized, so filter it here as MemorySaver does
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(row)
+            yield item
+
+    # writes
+
+    def _encode(
+        self, thread_id: str, ns: str, channel: str, version: str, value: Any
+    ) -> tuple[str, bytes, Optional[str], int]:
+        """Return (type, blob, base_version, depth) for a channel value."""
+        if channel in self.delta_channels and isinstance(value, list):
+            heads = self._head(thread_id)
+            head = heads.get((ns, channel))
+            heads[(ns, channel)] = (version, tuple(value), 0)
+            if head is not None:
+                base_version, base, depth = head
+                # unchanged prefix: the same message objects, as add_messages keeps them
+                if (
+                    depth + 1 < self.snapshot_every
+                    and len(base) <= len(value)
+                    and all(a is b for a, b in zip(base, value))
+                ):
+                    heads[(ns, channel)] = (version, tuple(value), depth + 1)
+                    type_, blob = self.serde.dumps_typed(value[len(base) :])
+                    return type_, blob, base_version, depth + 1
+        type_, blob = self.serde.dumps_typed(value)
+        return type_, blob, None, 0
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint with the channel values that changed since its parent."""
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        type_, blob = self.serde.dumps_typed(c)
+        meta_type, meta = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self._lock:
+            blobs = []
+            for channel, version in new_versions.items():
+                if channel in values:
+                    encoded = self._encode(
+                        thread_id, ns, channel, str(version), values[channel]
+                    )
+                else:
+                    encoded = ("empty", None, None, 0)
+                blobs.append((thread_id, ns, channel, str(version), *encoded))
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, "
+                    "version, type, blob, base_version, depth) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    blobs,
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, "
+                    "checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                    "metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        type_,
+                        blob,
+                        meta_type,
+                        meta,
+                    ),
+                )
+            if self.compact_every:
+                self._puts[thread_id] = self._puts.get(thread_id, 0) + 1
+                if self._puts[thread_id] >= self.compact_every:
+                    self._puts[thread_id] = 0
+                    self.compact(thread_id)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store pending writes of a task for a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # special writes (errors, interrupts...) overwrite; regular ones are kept once
+        verb = (
+            "INSERT OR REPLACE"
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE"
+        )
+        rows = [
+            (
+                thread_id,
+                ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, "
+                "task_id, idx, channel, type, blob, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, blob and write of a thread."""
+        with self._lock, self.conn:
+            for table in ("checkpoints", "blobs", "writes"):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+            self._heads.pop(thread_id)
+            self._puts.pop(thread_id, None)
+
+    def compact(self, thread_id: Optional[str] = None) -> None:
+        """Drop checkpoints beyond the latest `keep_checkpoints` and the blobs only they used."""
+        with self._lock:
+            threads = (
+                [thread_id]
+                if thread_id is not None
+                else [
+                    r[0]
+                    for r in self.conn.execute(
+                        "SELECT DISTINCT thread_id FROM checkpoints"
+                    )
+                ]
+            )
+            for thread in threads:
+                self._compact_thread(thread)
+
+    def _compact_thread(self, thread_id: str) -> None:
+        conn = self.conn
+        namespaces = [
+            r[0]
+            for r in conn.execute(
+                "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?",
+                (thread_id,),
+            )
+        ]
+        for ns in namespaces:
+            kept = conn.execute(
+                "SELECT checkpoint_id, type, checkpoint FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?",
+                (thread_id, ns, self.keep_checkpoints),
+            ).fetchall()
+            if not kept:
+                continue
+            oldest = kept[-1][0]
+            referenced = {
+                (channel, str(version))
+                for _, type_, blob in kept
+                for channel, version in self.serde.loads_typed((type_, blob))[
+                    "channel_versions"
+                ].items()
+            }
+            blobs = conn.execute(
+                "SELECT channel, version, base_version FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, ns),
+            ).fetchall()
+            # rebase deltas whose base goes away onto a full value
+            rebased = [
+                (channel, version, self._load_value(thread_id, ns, channel, version))
+                for channel, version, base in blobs
+                if (channel, version) in referenced
+                and base is not None
+                and (channel, base) not in referenced
+            ]
+            unreferenced = [
+                (thread_id, ns, channel, version)
+                for channel, version, _ in blobs
+                if (channel, version) not in referenced
+            ]
+            with conn:
+                conn.executemany(
+                    "UPDATE blobs SET type = ?, blob = ?, base_version = NULL, depth = 0 "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    [
+                        (
+                            *self.serde.dumps_typed(value),
+                            thread_id,
+                            ns,
+                            channel,
+                            version,
+                        )
+                        for channel, version, value in rebased
+                    ],
+                )
+                conn.executemany(
+                    "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND channel = ? AND version = ?",
+                    unreferenced,
+                )
+                for table in ("checkpoints", "writes"):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? "
+                        "AND checkpoint_ns = ? AND checkpoint_id < ?",
+                        (thread_id, ns, oldest),
+                    )
+            # cached heads may point at versions that were just removed
+            heads = self._heads.get(thread_id) or {}
+            for (head_ns, channel), head in list(heads.items()):
+                if head_ns == ns and (channel, head[0]) not in referenced:
+                    del heads[(head_ns, channel)]
+
+    def size(self) -> dict[str, int]:
+        """Return the rows and payload bytes stored per table."""
+        with self._lock:
+            return {
+                "checkpoint_rows": self.conn.execute(
+                    "SELECT COUNT(*) FROM checkpoints"
+                ).fetchone()[0],
+                "checkpoint_bytes": self.conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) "
+                    "FROM checkpoints"
+                ).fetchone()[0],
+                "blob_rows": self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[
+                    0
+                ],
+                "blob_bytes": self.conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(blob)), 0) FROM blobs"
+                ).fetchone()[0],
+                "write_bytes": self.conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(blob)), 0) FROM writes"
+                ).fetchone()[0],
+            }
+
+    # async: sqlite3 blocks, so run off the event loop
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Async `get_tuple`, run in a worker thread."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async `list`, run in a worker thread."""
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async `put`, run in a worker thread."""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async `put_writes`, run in a worker thread."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async `delete_thread`, run in a worker thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer: Any = None
+
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Return the checkpointer selected through env, shared by all graphs.
+
+    CHECKPOINTER is "memory" (MemorySaver), "sqlite" (SQLiteSaver at
+    CHECKPOINT_DB) or unset, which leaves persistence to the LangGraph server.
+    """
+    global _checkpointer
+    kind = os.environ.get("CHECKPOINTER", "").lower()
+    if not kind:
+        return None
+    if _checkpointer is None:
+        if kind == "memory":
+            from langgraph.checkpoint.memory import MemorySaver
+
+            _checkpointer = MemorySaver()
+        elif kind == "sqlite":
+            compact_every = int(os.environ.get("CHECKPOINT_COMPACT_EVERY", 100))
+            _checkpointer = SQLiteSaver(
+                os.environ.get("CHECKPOINT_DB", "checkpoints.sqlite"),
+                compact_every=compact_every or None,
+                keep_checkpoints=int(os.environ.get("CHECKPOINT_KEEP", 20)),
+            )
+        else:
+            raise ValueError(f"Unknown CHECKPOINTER: {kind}")
+    return _checkpointer
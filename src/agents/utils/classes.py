@@ -1,16 +1,41 @@
-# Inspect the tool calls made by Trustcall
-class Spy:
-    def __init__(self):
-        self.called_tools = []
-
-    def __call__(self, run):
-        # Collect information about the tool calls made by the extractor.
-        q = [run]
-        while q:
-            r = q.pop()
-            if r.child_runs:
-                q.extend(r.child_runs)
-            if r.run_type == "chat_model":
-                self.called_tools.append(
-                    r.outputs["generations"][0][0]["message"]["kwargs"]["tool_calls"]
-                )
\ No newline at end of file
+"""Callback handlers shared by the graphs."""
+
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from agents.utils.tools import format_tool_change
+
+
+# Capture the tool calls made by Trustcall, as each model response completes
+class ToolCallCapture(BaseCallbackHandler):
+    """Keep a change summary of the tool calls made by chat models in a run.
+
+    Pass it in the config of the call to inspect, merged with the node's config
+    so tracing keeps working, e.g.
+    `extractor.invoke(inputs, merge_configs(config, {"callbacks": [capture]}))`.
+    Only the formatted changes are kept; no run tree is retained.
+    """
+
+    # handle events in the calling thread/loop, not in an executor
+    run_inline = True
+
+    def __init__(self, schema_name: str = "Memory"):
+        """Summarize calls to the `schema_name` tool and trustcall's PatchDoc."""
+        self.schema_name = schema_name
+        self.changes: list[str] = []
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        """Record the changes made by the tool calls of a finished model call."""
+        # first generation per prompt, as the model's answer
+        for generations in response.generations:
+            message = getattr(generations[0], "message", None) if generations else None
+            for call in getattr(message, "tool_calls", None) or []:
+                change = format_tool_change(call, self.schema_name)
+                if change is not None:
+                    self.changes.append(change)
+
+    def summary(self) -> str:
+        """Return the recorded changes, one paragraph each."""
+        return "\n\n".join(self.changes)
@@ -0,0 +1,189 @@
+"""Pooled keep-alive HTTP clients for model and search providers."""
+
+import asyncio
+import atexit
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+TAVILY_API_URL = "https://api.tavily.com"
+
+
+@dataclass
+class HTTPClientSettings:
+    """Connection pool, keep-alive and timeout settings shared by all provider clients."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    # seconds an idle connection stays open for reuse
+    keepalive_expiry: float = 30.0
+    # needs the h2 package (pip install httpx[http2])
+    http2: bool = False
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "HTTPClientSettings":
+        """Read HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP_HTTP2, HTTP_TIMEOUT and HTTP_CONNECT_TIMEOUT."""
+        env = os.environ.get
+        defaults = cls()
+        return cls(
+            max_connections=int(env("HTTP_MAX_CONNECTIONS", defaults.max_connections)),
+            max_keepalive_connections=int(
+                env("HTTP_MAX_KEEPALIVE", defaults.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(
+                env("HTTP_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)
+            ),
+            http2=env("HTTP_HTTP2", "").lower() in ("1", "true", "yes"),
+            timeout=float(env("HTTP_TIMEOUT", defaults.timeout)),
+            connect_timeout=float(
+                env("HTTP_CONNECT_TIMEOUT", defaults.connect_timeout)
+            ),
+        )
+
+    @property
+    def httpx_timeout(self) -> httpx.Timeout:
+        """Timeouts for the httpx clients."""
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    @property
+    def httpx_limits(self) -> httpx.Limits:
+        """Connection pool limits for the httpx clients."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+class HTTPClients:
+    """Pooled sync and async httpx clients per provider, shared by all graphs.
+
+    Each provider ("openai", "tavily") gets its own pool, so a burst of
+    searches can't hold the connections model calls need. Clients are built
+    on first use and kept warm for the life of the process; `close()` runs at
+    exit. An async client is bound to the event loop of its first request,
+    as httpx's connection pool is, which is the server's loop in deployment.
+    """
+
+    def __init__(self, settings: Optional[HTTPClientSettings] = None):
+        """Build clients with `settings`, or the defaults."""
+        self.settings = settings or HTTPClientSettings()
+        self._clients: dict[str, httpx.Client] = {}
+        self._async_clients: dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    def _options(self) -> dict[str, Any]:
+        return {
+            "limits": self.settings.httpx_limits,
+            "timeout": self.settings.httpx_timeout,
+            "http2": self.settings.http2,
+        }
+
+    def client(self, provider: str) -> httpx.Client:
+        """Return the shared sync client for `provider`."""
+        client = self._clients.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    client = self._clients[provider] = httpx.Client(**self._options())
+        return client
+
+    def async_client(self, provider: str) -> httpx.AsyncClient:
+        """Return the shared async client for `provider`."""
+        client = self._async_clients.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._async_clients.get(provider)
+                if client is None:
+                    client = self._async_clients[provider] = httpx.AsyncClient(
+                        **self._options()
+                    )
+        return client
+
+    def close(self) -> None:
+        """Close all clients; async ones only when called outside an event loop."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            async_clients, self._async_clients = self._async_clients, {}
+        for client in clients.values():
+            client.close()
+        if async_clients:
+            try:
+                asyncio.run(_aclose_all(async_clients.values()))
+            except Exception:
+                # called inside a running loop (use `aclose` there), or the
+                # connections' loop is gone; they close with the process
+                pass
+
+    async def aclose(self) -> None:
+        """Close all clients from within the event loop that used them (e.g. a server's shutdown hook)."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            async_clients, self._async_clients = self._async_clients, {}
+        for client in clients.values():
+            client.close()
+        await _aclose_all(async_clients.values())
+
+
+async def _aclose_all(clients) -> None:
+    await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+
+
+# shared by every graph in the process (settings through env)
+http_clients = HTTPClients(HTTPClientSettings.from_env())
+atexit.register(http_clients.close)
+
+
+def tavily_api_wrapper():
+    """Return a Tavily API wrapper that sends its requests through `http_clients`."""
+    from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+
+    class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+        # the stock wrapper opens a new connection (requests.post / a new
+        # aiohttp session) for every search
+
+        def _params(self, query: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+            # same positional order as the stock wrapper; omitted options use the API defaults
+            names = (
+                "max_results",
+                "search_depth",
+                "include_domains",
+                "exclude_domains",
+                "include_answer",
+                "include_raw_content",
+                "include_images",
+            )
+            return {
+                "api_key": self.tavily_api_key.get_secret_value(),
+                "query": query,
+                **dict(zip(names, args)),
+                **kwargs,
+            }
+
+        def raw_results(self, query: str, *args: Any, **kwargs: Any) -> dict:
+            response = http_clients.client("tavily").post(
+                f"{_tavily_url()}/search", json=self._params(query, *args, **kwargs)
+            )
+            response.raise_for_status()
+            return response.json()
+
+        async def raw_results_async(
+            self, query: str, *args: Any, **kwargs: Any
+        ) -> dict:
+            response = await http_clients.async_client("tavily").post(
+                f"{_tavily_url()}/search", json=self._params(query, *args, **kwargs)
+            )
+            response.raise_for_status()
+            return response.json()
+
+    return PooledTavilySearchAPIWrapper()
+
+
+def _tavily_url() -> str:
+    return os.environ.get("TAVILY_API_URL", TAVILY_API_URL).rstrip("/")
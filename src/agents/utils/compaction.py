@@ -0,0 +1,94 @@
+"""Token estimates and cut points for rolling conversation compaction."""
+
+import json
+import threading
+from typing import Any, Optional, Sequence
+
+from langchain_core.messages import AnyMessage, HumanMessage
+
+# rough cost of the role/formatting wrapper OpenAI adds around each message
+_TOKENS_PER_MESSAGE = 4
+# average characters per token for English text with gpt-4o-style tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: Sequence[AnyMessage]) -> int:
+    """Estimate prompt tokens for messages without a tokenizer (works offline)."""
+    chars = 0
+    for message in messages:
+        content = message.content
+        chars += len(content if isinstance(content, str) else json.dumps(content))
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            chars += len(tool_call["name"]) + len(json.dumps(tool_call["args"]))
+    return chars // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE * len(messages)
+
+
+def compaction_cut(
+    messages: Sequence[AnyMessage],
+    budget: int,
+    keep_turns: int = 1,
+    summary_tokens: int = 0,
+) -> int:
+    """Return how many leading messages to fold into the summary (0 if under budget).
+
+    Cuts only land on the start of a user turn, so an AI tool call and its
+    ToolMessages always stay on the same side. The most recent `keep_turns`
+    turns are never folded. When over budget, the cut leaves the kept
+    messages at about half the budget, so compaction doesn't rerun every turn.
+    """
+    if estimate_tokens(messages) + summary_tokens <= budget:
+        return 0
+
+    turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if len(turn_starts) <= keep_turns:
+        return 0
+    candidates = [i for i in turn_starts[: len(turn_starts) - keep_turns + 1] if i > 0]
+    for cut in candidates:
+        if estimate_tokens(messages[cut:]) <= budget // 2:
+            return cut
+    return candidates[-1] if candidates else 0
+
+
+class CompactionMetrics:
+    """Running totals of prompt tokens saved by compaction, recorded once per turn."""
+
+    def __init__(self):
+        """Start all totals at zero."""
+        self.turns = 0
+        self.compactions = 0
+        self.tokens_full = 0
+        self.tokens_sent = 0
+        self.last_saved = 0
+        self._lock = threading.Lock()
+
+    def record(self, tokens_full: int, tokens_sent: int, compacted: bool) -> None:
+        """Record one turn's full and sent prompt tokens."""
+        with self._lock:
+            self.turns += 1
+            self.compactions += int(compacted)
+            self.tokens_full += tokens_full
+            self.tokens_sent += tokens_sent
+            self.last_saved = tokens_full - tokens_sent
+
+    def stats(self) -> dict[str, Any]:
+        """Return the totals and the tokens saved per turn."""
+        saved = self.tokens_full - self.tokens_sent
+        return {
+            "turns": self.turns,
+            "compactions": self.compactions,
+            "tokens_saved": saved,
+            "tokens_saved_per_turn": saved / self.turns if self.turns else 0.0,
+            "last_turn_tokens_saved": self.last_saved,
+            "ratio_sent": self.tokens_sent / self.tokens_full
+            if self.tokens_full
+            else 1.0,
+        }
+
+
+# shared by the web_searcher and todos_manager compaction nodes
+compaction_metrics = CompactionMetrics()
+
+
+def summary_tokens(summary: Optional[str]) -> int:
+    """Estimate the prompt tokens a conversation summary adds."""
+    return len(summary) // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE if summary else 0
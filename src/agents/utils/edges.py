@@ -1,9 +1,12 @@
+"""Conditional edges of the graphs."""
+
 from typing import Literal
 from langchain_core.runnables import RunnableConfig
 from langgraph.constants import Send
 from langgraph.graph import END
 from langgraph.store.base import BaseStore
 
+from agents.configuration import Configuration
 from agents.utils.state import OverallJokeState, State, ToDoManagerState
 
 
@@ -28,6 +31,14 @@ def route_after_llm(state: State):
     return END
 
 
+def choose_joke_planner(state: OverallJokeState, config: RunnableConfig):
+    """Start with the fused planner or the router, per `joke_planning_mode`."""
+    configuration = Configuration.from_runnable_config(config)
+    if configuration.joke_planning_mode == "fused":
+        return "plan_joke"
+    return "decide_joke_route"
+
+
 def should_generate_joke(state: OverallJokeState):
     joke_route = state["joke_route"]
     if joke_route == "generate_joke":
@@ -36,10 +47,21 @@ def should_generate_joke(state: OverallJokeState):
         return "reject_joke_request"
 
 
+def route_joke_plan(state: OverallJokeState, config: RunnableConfig):
+    """Go straight to the jokes when the planning node already picked the subjects."""
+    if state["joke_route"] == "generate_joke" and state.get("subjects"):
+        return continue_to_jokes(state, config)
+    return should_generate_joke(state)
+
+
 # joke generator edges
 
 
-def continue_to_jokes(state: OverallJokeState):
+def continue_to_jokes(state: OverallJokeState, config: RunnableConfig):
+    """Fan out one generate_joke per subject, or generate them in one node."""
+    configuration = Configuration.from_runnable_config(config)
+    if configuration.joke_generation_mode != "fanout":
+        return "generate_jokes"
     return [Send("generate_joke", {"subject": s}) for s in state["subjects"]]
 
 
@@ -0,0 +1,354 @@
+"""Hedged requests, retries and time budgets for node LLM calls."""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackManager
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor, merge_configs
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+from langgraph.constants import TAG_NOSTREAM
+
+from agents.utils.metrics import metrics
+
+hedge_calls = metrics.counter(
+    "agent_hedge_calls_total",
+    "Calls under a hedging policy by outcome: the attempt that answered (primary, "
+    "hedge, retry), failed or timeout.",
+    ("node", "outcome"),
+)
+hedge_requests = metrics.counter(
+    "agent_hedge_requests_total",
+    "Extra requests sent by hedging policies (hedge, retry).",
+    ("node", "kind"),
+)
+hedge_saved_seconds = metrics.histogram(
+    "agent_hedge_saved_seconds",
+    "How much later the original request answered than the hedge that won, "
+    "when it ran to completion (sync callers can't cancel an in-flight request).",
+    ("node",),
+)
+hedge_threshold = metrics.gauge(
+    "agent_hedge_threshold_seconds",
+    "Current hedging delay per node: the configured quantile of its recent latencies.",
+    ("node",),
+)
+
+# recent latencies and calls kept per node, and the latencies needed before hedging starts
+_WINDOW = 200
+_MIN_SAMPLES = 20
+# retry backoff: uniform in [0, min(cap, base * 2**retry)] seconds
+_BACKOFF_BASE = 0.2
+_BACKOFF_CAP = 2.0
+
+# threads running the attempts of sync hedged calls (copies context vars into each)
+_hedge_pool = ContextThreadPoolExecutor(
+    max_workers=int(os.environ.get("HEDGE_MAX_WORKERS", 32)),
+    thread_name_prefix="hedge",
+)
+
+
+@dataclass
+class HedgePolicy:
+    """How one node's llm calls are hedged, retried and bounded in time."""
+
+    hedge: bool = True
+    quantile: float = 0.95
+    # most hedges as a fraction of the node's recent calls
+    max_ratio: float = 0.1
+    retries: int = 1
+    # seconds per call including hedges and retries; None for no limit
+    budget: Optional[float] = None
+
+
+class _NodeStats:
+    def __init__(self):
+        self.latencies: deque[float] = deque(maxlen=_WINDOW)
+        # one [hedged] flag per recent call, flipped when the call hedges
+        self.recent: deque[list[bool]] = deque(maxlen=_WINDOW)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def threshold(self, quantile: float) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < _MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def may_hedge(self, entry: list[bool], max_ratio: float) -> bool:
+        with self.lock:
+            if sum(e[0] for e in self.recent) >= max_ratio * len(self.recent):
+                return False
+            entry[0] = True
+            self.hedges += 1
+            return True
+
+
+class _Call:
+    """One call under a policy, shared by its attempts (primary, hedge, retries)."""
+
+    def __init__(self, node: str, stats: _NodeStats, policy: HedgePolicy):
+        self.node = node
+        self.stats = stats
+        self.policy = policy
+        self.start = self.launched = time.monotonic()
+        self.deadline = self.start + policy.budget if policy.budget else None
+        self.threshold = stats.threshold(policy.quantile) if policy.hedge else None
+        if self.threshold is not None:
+            hedge_threshold.set(self.threshold, node)
+        self.hedged = False
+        self.retries = 0
+        self.winner: Optional[str] = None
+        self.won_at: Optional[float] = None
+        self.entry = [False]
+        self._lock = threading.Lock()
+        with stats.lock:
+            stats.calls += 1
+            stats.recent.append(self.entry)
+
+    def config(self, config: Optional[RunnableConfig], kind: str) -> RunnableConfig:
+        if kind == "primary":
+            return config
+        # extra attempts never stream (calls streaming to the client aren't hedged)
+        return merge_configs(
+            config, {"tags": [TAG_NOSTREAM], "metadata": {"hedge_attempt": kind}}
+        )
+
+    def timeout(self) -> Optional[float]:
+        """Seconds to wait for an answer before hedging or giving up."""
+        times = [self.deadline] if self.deadline else []
+        if self.threshold is not None and not self.hedged:
+            times.append(self.launched + self.threshold)
+        return max(0.0, min(times) - time.monotonic()) if times else None
+
+    def should_hedge(self) -> bool:
+        if self.threshold is None or self.hedged:
+            return False
+        if time.monotonic() < self.launched + self.threshold:
+            return False
+        # one hedge per call, if the node's hedge budget allows it
+        self.hedged = True
+        if not self.stats.may_hedge(self.entry, self.policy.max_ratio):
+            return False
+        hedge_requests.inc(1, self.node, "hedge")
+        return True
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def retry_delay(self) -> Optional[float]:
+        """Backoff before the next retry, or None when out of retries or time."""
+        if self.retries >= self.policy.retries:
+            return None
+        delay = random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2**self.retries))
+        if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+            return None
+        self.retries += 1
+        self.launched = time.monotonic() + delay
+        hedge_requests.inc(1, self.node, "retry")
+        with self.stats.lock:
+            self.stats.retries += 1
+        return delay
+
+    def answered(self, kind: str, latency: float) -> None:
+        with self.stats.lock:
+            self.stats.latencies.append(latency)
+        with self._lock:
+            if self.winner == "hedge" and kind == "primary":
+                hedge_saved_seconds.observe(time.monotonic() - self.won_at, self.node)
+
+    def won(self, kind: str) -> None:
+        with self._lock:
+            self.winner = kind
+            self.won_at = time.monotonic()
+        hedge_calls.inc(1, self.node, kind)
+        if kind == "hedge":
+            with self.stats.lock:
+                self.stats.hedge_wins += 1
+
+    def failed(self, outcome: str) -> None:
+        hedge_calls.inc(1, self.node, outcome)
+        with self.stats.lock:
+            self.stats.failures += 1
+
+    def timeout_error(self) -> TimeoutError:
+        return TimeoutError(
+            f"{self.node} llm call exceeded its {self.policy.budget:g}s budget"
+        )
+
+
+def _streams_to_client(config: Optional[RunnableConfig]) -> bool:
+    # duplicates of a call streaming to the client would interleave their tokens
+    config = config or {}
+    if TAG_NOSTREAM in (config.get("tags") or []):
+        return False
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.handlers
+    return any(isinstance(h, _StreamingCallbackHandler) for h in callbacks or [])
+
+
+class HedgedRunnable(Runnable):
+    """Run `bound` under a HedgePolicy.
+
+    A call that hasn't answered within the node's recent `quantile`
+    latency gets one duplicate request (while hedges stay under `max_ratio`
+    of the node's calls); the first answer wins and the other attempt is
+    cancelled. Failed calls are retried after a jittered exponential
+    backoff, and the whole call fails with TimeoutError past `budget`.
+    Calls streaming tokens to the client run unhedged.
+    """
+
+    def __init__(
+        self, bound: Runnable, node: str, stats: _NodeStats, policy: HedgePolicy
+    ):
+        """Wrap `bound` for `node`, sharing the node's latency statistics."""
+        self.bound = bound
+        self.node = node
+        self.stats = stats
+        self.policy = policy
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs):
+        """Run the call on pool threads, hedging and retrying it per the policy."""
+        if _streams_to_client(config):
+            return self.bound.invoke(input, config, **kwargs)
+        call = _Call(self.node, self.stats, self.policy)
+
+        def attempt(kind: str):
+            started = time.monotonic()
+            result = self.bound.invoke(input, call.config(config, kind), **kwargs)
+            call.answered(kind, time.monotonic() - started)
+            return result
+
+        pending = {_hedge_pool.submit(attempt, "primary"): "primary"}
+        error = None
+        try:
+            while True:
+                done, _ = wait(pending, call.timeout(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind = pending.pop(future)
+                    if future.exception() is None:
+                        call.won(kind)
+                        return future.result()
+                    error = future.exception()
+                if not pending:
+                    delay = call.retry_delay()
+                    if delay is None:
+                        call.failed("failed")
+                        raise error
+                    time.sleep(delay)
+                    pending[_hedge_pool.submit(attempt, "retry")] = "retry"
+                elif call.expired():
+                    call.failed("timeout")
+                    raise call.timeout_error()
+                elif call.should_hedge():
+                    pending[_hedge_pool.submit(attempt, "hedge")] = "hedge"
+        finally:
+            # losers that already started run to completion; their results are dropped
+            for future in pending:
+                future.cancel()
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs
+    ):
+        """Run the call as tasks, hedging and retrying it per the policy."""
+        if _streams_to_client(config):
+            return await self.bound.ainvoke(input, config, **kwargs)
+        call = _Call(self.node, self.stats, self.policy)
+
+        async def attempt(kind: str):
+            started = time.monotonic()
+            result = await self.bound.ainvoke(
+                input, call.config(config, kind), **kwargs
+            )
+            call.answered(kind, time.monotonic() - started)
+            return result
+
+        pending = {asyncio.ensure_future(attempt("primary")): "primary"}
+        error = None
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    pending, timeout=call.timeout(), return_when=FIRST_COMPLETED
+                )
+                for task in done:
+                    kind = pending.pop(task)
+                    if task.exception() is None:
+                        call.won(kind)
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    delay = call.retry_delay()
+                    if delay is None:
+                        call.failed("failed")
+                        raise error
+                    await asyncio.sleep(delay)
+                    pending[asyncio.ensure_future(attempt("retry"))] = "retry"
+                elif call.expired():
+                    call.failed("timeout")
+                    raise call.timeout_error()
+                elif call.should_hedge():
+                    pending[asyncio.ensure_future(attempt("hedge"))] = "hedge"
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class Hedger:
+    """Per-node latency statistics shared by the hedged runnables of all graphs."""
+
+    def __init__(self):
+        """Start with no node statistics."""
+        self._nodes: dict[str, _NodeStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, node: str) -> _NodeStats:
+        stats = self._nodes.get(node)
+        if stats is None:
+            with self._lock:
+                stats = self._nodes.setdefault(node, _NodeStats())
+        return stats
+
+    def wrap(self, node: str, runnable: Runnable, policy: HedgePolicy) -> Runnable:
+        """Return `runnable` hedged under `policy` with `node`'s statistics."""
+        return HedgedRunnable(runnable, node, self._stats(node), policy)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return call, hedge, retry and failure counts and the p95 latency per node."""
+        with self._lock:
+            nodes = dict(self._nodes)
+        result = {}
+        for node, stats in nodes.items():
+            threshold = stats.threshold(HedgePolicy.quantile)
+            with stats.lock:
+                result[node] = {
+                    "calls": stats.calls,
+                    "hedges": stats.hedges,
+                    "hedge_rate": stats.hedges / stats.calls if stats.calls else 0.0,
+                    "hedge_wins": stats.hedge_wins,
+                    "retries": stats.retries,
+                    "failures": stats.failures,
+                    "p95": threshold,
+                }
+        return result
+
+    def clear(self) -> None:
+        """Forget all node statistics."""
+        with self._lock:
+            self._nodes.clear()
+
+
+# shared by all graphs; policies come from each run's Configuration
+hedger = Hedger()
@@ -0,0 +1,303 @@
+"""Per-user snapshots of long term memory for the todo manager prompts."""
+
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from langgraph.store.base import BaseStore, Item, PutOp, SearchOp
+
+from agents.utils.cache import TTLCache
+
+# long term memory kinds kept per user, stored under (kind, user_id)
+MEMORY_KINDS = ("profile", "todo", "instructions")
+
+
+def render_todos(items: list[Item]) -> str:
+    """Render todo items the way the todo manager prompt lists them."""
+    return "\n".join(f"{{'key': {item.key}, 'value': {item.value}}}" for item in items)
+
+
+class MemorySnapshot:
+    """A user's profile, todo and instructions items, with their rendered prompt sections.
+
+    Each kind mirrors what `store.search((kind, user_id))` returns (same order,
+    same `limit`, or `todo_limit` for todos), and renders to the same text
+    todo_manager used to build from the raw search results. Todos also get a
+    `TodoIndex`, built on first use and kept in sync by the same write-through
+    updates, to pick the ones worth showing (see `select_todos`).
+    Reads and writes hold the snapshot's lock, since sync nodes of the same
+    user may run on different threads.
+    """
+
+    def __init__(self, user_id: str, limit: int = 10, todo_limit: Optional[int] = None):
+        """Start empty; kinds are loaded with `load`."""
+        self.user_id = user_id
+        self.limit = limit
+        self.todo_limit = todo_limit or limit
+        self._items: dict[str, dict[str, Item]] = {}
+        self._rendered: dict[str, str] = {}
+        self._todo_index = None
+        self._lock = threading.RLock()
+
+    def limit_for(self, kind: str) -> int:
+        """Return how many items of `kind` are loaded and shown."""
+        return self.todo_limit if kind == "todo" else self.limit
+
+    def missing(self) -> list[str]:
+        """Return the kinds not loaded yet."""
+        with self._lock:
+            return [kind for kind in MEMORY_KINDS if kind not in self._items]
+
+    def load(self, kind: str, items: list[Item]) -> None:
+        """Replace the items of `kind` with a search result."""
+        with self._lock:
+            self._items[kind] = {item.key: item for item in items}
+            self._rendered.pop(kind, None)
+            if kind == "todo":
+                self._todo_index = None
+
+    def items(self, kind: str) -> list[Item]:
+        """Return the items of `kind`, in store order."""
+        with self._lock:
+            return list(self._items[kind].values())[: self.limit_for(kind)]
+
+    def get(self, kind: str, key: str) -> Optional[Item]:
+        """Return the item of `kind` under `key`, or None."""
+        with self._lock:
+            return self._items[kind].get(key)
+
+    def apply_put(self, kind: str, key: str, value: dict[str, Any]) -> None:
+        """Apply a put already written to the store."""
+        with self._lock:
+            items = self._items.get(kind)
+            if items is None:
+                return
+            now = datetime.now(timezone.utc)
+            existing = items.get(key)
+            items[key] = Item(
+                value=value,
+                key=key,
+                namespace=(kind, self.user_id),
+                created_at=existing.created_at if existing else now,
+                updated_at=now,
+            )
+            self._rendered.pop(kind, None)
+            if kind == "todo" and self._todo_index is not None:
+                self._todo_index.put(key, value)
+
+    def apply_delete(self, kind: str, key: str) -> None:
+        """Apply a delete already written to the store."""
+        with self._lock:
+            items = self._items.get(kind)
+            if items is None:
+                return
+            if len(items) >= self.limit_for(kind):
+                # an item past the search limit may move up, so reload this kind next time
+                del self._items[kind]
+                if kind == "todo":
+                    self._todo_index = None
+            else:
+                items.pop(key, None)
+                if kind == "todo" and self._todo_index is not None:
+                    self._todo_index.delete(key)
+            self._rendered.pop(kind, None)
+
+    def select_todos(
+        self, query: str, k: Optional[int], due_within: timedelta
+    ) -> list[Item]:
+        """Return the todos to show for `query`, in store order.
+
+        All of them when there are at most `k` (or `k` is None); otherwise the
+        `k` most relevant to `query` plus the (up to `k`) open todos due
+        soonest within `due_within`, filled up to `k` with the first ones in
+        store order when fewer match.
+        """
+        with self._lock:
+            todos = self.items("todo")
+            if k is None or len(todos) <= k:
+                return todos
+            if self._todo_index is None:
+                # numpy is only imported once a user has more todos than are shown
+                from agents.utils.retrieval import TodoIndex
+
+                self._todo_index = TodoIndex()
+                for item in todos:
+                    self._todo_index.put(item.key, item.value)
+            keys = set(self._todo_index.search(query, k))
+            keys.update(self._todo_index.due(due_within)[:k])
+        for item in todos:
+            if len(keys) >= k:
+                break
+            keys.add(item.key)
+        return [item for item in todos if item.key in keys]
+
+    def render(self, kind: str) -> str:
+        """Return the prompt section for `kind`, rendered once per change."""
+        with self._lock:
+            rendered = self._rendered.get(kind)
+            if rendered is None:
+                items = self.items(kind)
+                if kind == "todo":
+                    rendered = render_todos(items)
+                else:
+                    rendered = str(items[0].value if items else None)
+                self._rendered[kind] = rendered
+            return rendered
+
+
+class MemorySnapshotCache:
+    """Per-user snapshots of long term memory, kept in sync by write-through puts and deletes.
+
+    Missing kinds are loaded with a single `store.batch` of searches. Writes made
+    through `put`/`delete`/`batch` (and their async twins) update the cached
+    snapshot in place, so only the touched kind is re-rendered. Writes made to the store by
+    other processes are only picked up once the snapshot's `ttl` runs out, so the
+    default keeps it to about one turn; raise it only when a single process owns the store.
+    `todo_limit` (default `limit`) caps the todos loaded per user, so the
+    todos shown can be picked from more than `limit`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 10,
+        limit: int = 10,
+        todo_limit: Optional[int] = None,
+    ):
+        """Keep up to `maxsize` snapshots per store for `ttl` seconds (None: no expiry)."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.limit = limit
+        self.todo_limit = todo_limit
+        self.hits = 0
+        self.misses = 0
+        self._caches: weakref.WeakKeyDictionary[BaseStore, TTLCache] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _cache(self, store: BaseStore) -> TTLCache:
+        with self._lock:
+            cache = self._caches.get(store)
+            if cache is None:
+                cache = self._caches[store] = TTLCache(self.maxsize, self.ttl)
+            return cache
+
+    def _snapshot(self, store: BaseStore, user_id: str, cached: bool) -> MemorySnapshot:
+        cache = self._cache(store) if cached else None
+        with self._lock:
+            # get or create under the lock, so concurrent loads share one snapshot
+            snapshot = cache.get(user_id) if cached else None
+            if snapshot is None:
+                snapshot = MemorySnapshot(
+                    user_id, limit=self.limit, todo_limit=self.todo_limit
+                )
+                if cached:
+                    cache.set(user_id, snapshot)
+            if snapshot.missing():
+                self.misses += 1
+            else:
+                self.hits += 1
+        return snapshot
+
+    def _search_ops(self, snapshot: MemorySnapshot) -> list[SearchOp]:
+        return [
+            SearchOp((kind, snapshot.user_id), limit=snapshot.limit_for(kind))
+            for kind in snapshot.missing()
+        ]
+
+    def load(
+        self, store: BaseStore, user_id: str, cached: bool = True
+    ) -> MemorySnapshot:
+        """Return the user's snapshot, loading any missing kinds in one batched read."""
+        snapshot = self._snapshot(store, user_id, cached)
+        missing = snapshot.missing()
+        if missing:
+            for kind, items in zip(missing, store.batch(self._search_ops(snapshot))):
+                snapshot.load(kind, items)
+        return snapshot
+
+    async def aload(
+        self, store: BaseStore, user_id: str, cached: bool = True
+    ) -> MemorySnapshot:
+        """Async `load`."""
+        snapshot = self._snapshot(store, user_id, cached)
+        missing = snapshot.missing()
+        if missing:
+            results = await store.abatch(self._search_ops(snapshot))
+            for kind, items in zip(missing, results):
+                snapshot.load(kind, items)
+        return snapshot
+
+    def _written(self, store: BaseStore, namespace: tuple[str, ...]):
+        return self._cache(store).get(namespace[1])
+
+    def put(
+        self, store: BaseStore, namespace: tuple[str, ...], key: str, value: dict
+    ) -> None:
+        """Write an item to the store and to the cached snapshot."""
+        store.put(namespace, key, value)
+        snapshot = self._written(store, namespace)
+        if snapshot is not None:
+            snapshot.apply_put(namespace[0], key, value)
+
+    async def aput(
+        self, store: BaseStore, namespace: tuple[str, ...], key: str, value: dict
+    ) -> None:
+        """Async `put`."""
+        await store.aput(namespace, key, value)
+        snapshot = self._written(store, namespace)
+        if snapshot is not None:
+            snapshot.apply_put(namespace[0], key, value)
+
+    def delete(self, store: BaseStore, namespace: tuple[str, ...], key: str) -> None:
+        """Delete an item from the store and from the cached snapshot."""
+        store.delete(namespace, key)
+        snapshot = self._written(store, namespace)
+        if snapshot is not None:
+            snapshot.apply_delete(namespace[0], key)
+
+    async def adelete(
+        self, store: BaseStore, namespace: tuple[str, ...], key: str
+    ) -> None:
+        """Async `delete`."""
+        await store.adelete(namespace, key)
+        snapshot = self._written(store, namespace)
+        if snapshot is not None:
+            snapshot.apply_delete(namespace[0], key)
+
+    def _apply(self, store: BaseStore, ops: list[PutOp]) -> None:
+        for op in ops:
+            snapshot = self._written(store, op.namespace)
+            if snapshot is None:
+                continue
+            if op.value is None:
+                snapshot.apply_delete(op.namespace[0], op.key)
+            else:
+                snapshot.apply_put(op.namespace[0], op.key, op.value)
+
+    def batch(self, store: BaseStore, ops: list[PutOp]) -> None:
+        """Write puts and deletes (`PutOp` with `value=None`) in one `store.batch` call.
+
+        One round trip regardless of the number of items; stores that run a batch
+        in a single transaction make the whole update atomic.
+        """
+        if ops:
+            store.batch(ops)
+            self._apply(store, ops)
+
+    async def abatch(self, store: BaseStore, ops: list[PutOp]) -> None:
+        """Async `batch`."""
+        if ops:
+            await store.abatch(ops)
+            self._apply(store, ops)
+
+    def invalidate(self, store: BaseStore, user_id: str) -> None:
+        """Drop a user's snapshot, so the next load reads the store."""
+        self._cache(store).pop(user_id)
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters (a miss is any load that had to read the store)."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,545 @@
+"""Prometheus metrics for graph nodes: latency, tokens and cost."""
+
+import atexit
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+
+from agents.configuration import Configuration
+
+# USD per 1M tokens: (input, cached input, output); versioned model names match by prefix
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, one series per label set."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]
+    ):
+        """Create an empty histogram with upper bounds `buckets`."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Add `value` to the series for `labels`."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> list[str]:
+        """Return the exposition lines of every series."""
+        with self._lock:
+            series = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_labels(self.labels, labels)} {_number(total)}"
+            )
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style monotonically increasing counter, one series per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        """Create an empty counter."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float, *labels: str) -> None:
+        """Add `value` to the series for `labels`."""
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0.0) + value
+
+    def samples(self) -> list[str]:
+        """Return the exposition lines of every series."""
+        with self._lock:
+            series = list(self._series.items())
+        return [
+            f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+            for labels, value in series
+        ]
+
+
+class Gauge:
+    """Prometheus-style gauge that goes up and down, one series per label set."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        """Create an empty gauge."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the series for `labels` to `value`."""
+        with self._lock:
+            self._series[labels] = value
+
+    def inc(self, value: float, *labels: str) -> None:
+        """Add `value` (which may be negative) to the series for `labels`."""
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0.0) + value
+
+    def samples(self) -> list[str]:
+        """Return the exposition lines of every series."""
+        with self._lock:
+            series = list(self._series.items())
+        return [
+            f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+            for labels, value in series
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        """Start with no metrics."""
+        self._metrics: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str],
+        buckets: Sequence[float] = SECONDS_BUCKETS,
+    ) -> Histogram:
+        """Register a histogram, or return the one already registered as `name`."""
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def counter(self, name: str, help: str, labels: Sequence[str]) -> Counter:
+        """Register a counter, or return the one already registered as `name`."""
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str]) -> Gauge:
+        """Register a gauge, or return the one already registered as `name`."""
+        return self._add(Gauge(name, help, labels))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# shared by all graphs (and any other module that wants to export metrics)
+metrics = MetricsRegistry()
+
+_NODE_LABELS = ("graph", "node", "user_id")
+
+node_duration = metrics.histogram(
+    "agent_node_duration_seconds", "Wall time of a graph node execution.", _NODE_LABELS
+)
+node_llm_duration = metrics.histogram(
+    "agent_node_llm_seconds",
+    "Time spent in chat model calls per node execution (summed over calls).",
+    _NODE_LABELS,
+)
+node_tool_duration = metrics.histogram(
+    "agent_node_tool_seconds",
+    "Time spent in tool calls per node execution (summed over calls).",
+    _NODE_LABELS,
+)
+node_tokens = metrics.histogram(
+    "agent_node_tokens",
+    "Tokens per node execution, by type (prompt, completion, cached).",
+    (*_NODE_LABELS, "type"),
+    buckets=TOKEN_BUCKETS,
+)
+node_cost = metrics.counter(
+    "agent_node_cost_usd_total",
+    "Estimated model cost in USD, from token usage and MODEL_PRICES.",
+    _NODE_LABELS,
+)
+
+
+def model_price(model: Optional[str]) -> Optional[tuple[float, float, float]]:
+    """Return (input, cached input, output) USD per 1M tokens for a model, if known."""
+    if not model:
+        return None
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES[name]
+    return None
+
+
+def _replayed_from_cache(usage: dict[str, Any]) -> bool:
+    # LangChain replays a cache hit's original usage with total_cost zeroed
+    # (providers never set total_cost), so its tokens were never billed
+    return usage.get("total_cost") == 0
+
+
+def _context_user_id() -> Optional[str]:
+    # config of the runnable currently executing (set by LangChain inside nodes)
+    config = var_child_runnable_config.get()
+    if config:
+        return (config.get("configurable") or {}).get("user_id")
+    return None
+
+
+@dataclass
+class _NodeRun:
+    node: str
+    graph_run: UUID
+    start: float
+    llm_seconds: float = 0.0
+    tool_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    duration: float = 0.0
+
+
+@dataclass
+class _GraphRun:
+    user_id: Optional[str] = None
+    nodes: list[_NodeRun] = field(default_factory=list)
+
+
+class NodeMetrics(BaseCallbackHandler):
+    """Record wall, LLM and tool time, tokens and estimated cost for each node of a graph.
+
+    Attach one per graph at compile time with
+    `builder.compile().with_config(callbacks=[NodeMetrics("name")])`; results
+    go to the shared `metrics` registry, labelled by graph, node and user id.
+    Chat model and tool calls are attributed to the top-level node they run
+    in, including those made inside subgraphs such as trustcall's. Responses
+    served from the LLM cache add to LLM time but not to tokens or cost.
+
+    The user id is taken from the run metadata (`user_id`) if set, otherwise
+    from the `configurable` of the first model or tool call in the run, so
+    node results are recorded when the graph run ends.
+    """
+
+    # handle events in the calling thread/loop, not in an executor
+    run_inline = True
+
+    def __init__(self, graph: str):
+        """Label everything recorded by this handler with `graph`."""
+        self.graph = graph
+        self._graph_runs: dict[UUID, _GraphRun] = {}
+        self._nodes: dict[UUID, _NodeRun] = {}
+        # nested run id -> node run it belongs to
+        self._owners: dict[UUID, _NodeRun] = {}
+        # llm/tool run id -> (node run, start time, model name)
+        self._calls: dict[UUID, tuple[_NodeRun, float, Optional[str]]] = {}
+        # batched model calls inside one node may finish on different threads
+        self._lock = threading.Lock()
+
+    def on_chain_start(
+        self,
+        serialized: Optional[dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Start timing a top-level node, or attribute a nested run to its node."""
+        owner = self._owners.get(parent_run_id) if parent_run_id else None
+        if owner is not None:
+            self._owners[run_id] = owner
+            return
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if (
+            parent_run_id is None
+            or node is None
+            or kwargs.get("name") != node
+            or "|" in metadata.get("langgraph_checkpoint_ns", "")
+        ):
+            return
+        if parent_run_id not in self._graph_runs:
+            self._graph_runs[parent_run_id] = _GraphRun(metadata.get("user_id"))
+        self._nodes[run_id] = self._owners[run_id] = _NodeRun(
+            node, parent_run_id, time.perf_counter()
+        )
+
+    def _end_chain(self, run_id: UUID) -> None:
+        self._owners.pop(run_id, None)
+        node_run = self._nodes.pop(run_id, None)
+        if node_run is not None:
+            node_run.duration = time.perf_counter() - node_run.start
+            self._graph_runs[node_run.graph_run].nodes.append(node_run)
+            return
+        graph_run = self._graph_runs.pop(run_id, None)
+        if graph_run is not None:
+            self._record(graph_run)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Finish a node, or record the nodes of a finished graph run."""
+        self._end_chain(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Finish a node or graph run that raised."""
+        # interrupts surface as errors too; the node's time still counts
+        self._end_chain(run_id)
+
+    def _start_call(
+        self, run_id: UUID, parent_run_id: Optional[UUID], model: Optional[str] = None
+    ) -> None:
+        owner = self._owners.get(parent_run_id) if parent_run_id else None
+        if owner is None or parent_run_id in self._calls:
+            # not inside a node, or nested in a call already being timed
+            return
+        self._owners[run_id] = owner
+        self._calls[run_id] = (owner, time.perf_counter(), model)
+        graph_run = self._graph_runs.get(owner.graph_run)
+        if graph_run is not None and graph_run.user_id is None:
+            graph_run.user_id = _context_user_id()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        invocation_params: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Start timing a chat model call made in a node."""
+        params = invocation_params or {}
+        model = (
+            params.get("model")
+            or params.get("model_name")
+            or (metadata or {}).get("ls_model_name")
+        )
+        self._start_call(run_id, parent_run_id, model)
+
+    def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Add a chat model call's time, tokens and cost to its node."""
+        self._owners.pop(run_id, None)
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        node_run, start, model = call
+        prompt = completion = cached = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if not usage or _replayed_from_cache(usage):
+                    continue
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                cached += (usage.get("input_token_details") or {}).get(
+                    "cache_read", 0
+                ) or 0
+        cost = 0.0
+        price = model_price(model or (response.llm_output or {}).get("model_name"))
+        if price:
+            input_price, cached_price, output_price = price
+            cost = (
+                (prompt - cached) * input_price
+                + cached * cached_price
+                + completion * output_price
+            ) / 1_000_000
+        with self._lock:
+            node_run.llm_seconds += time.perf_counter() - start
+            node_run.prompt_tokens += prompt
+            node_run.completion_tokens += completion
+            node_run.cached_tokens += cached
+            node_run.cost += cost
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Add a failed chat model call's time to its node."""
+        self._owners.pop(run_id, None)
+        call = self._calls.pop(run_id, None)
+        if call is not None:
+            with self._lock:
+                call[0].llm_seconds += time.perf_counter() - call[1]
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Start timing a tool call made in a node."""
+        self._start_call(run_id, parent_run_id)
+
+    def _end_tool(self, run_id: UUID) -> None:
+        self._owners.pop(run_id, None)
+        call = self._calls.pop(run_id, None)
+        if call is not None:
+            with self._lock:
+                call[0].tool_seconds += time.perf_counter() - call[1]
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Add a tool call's time to its node."""
+        self._end_tool(run_id)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Add a failed tool call's time to its node."""
+        self._end_tool(run_id)
+
+    def _record(self, graph_run: _GraphRun) -> None:
+        user_id = graph_run.user_id or Configuration.user_id
+        for node_run in graph_run.nodes:
+            labels = (self.graph, node_run.node, user_id)
+            node_duration.observe(node_run.duration, *labels)
+            node_llm_duration.observe(node_run.llm_seconds, *labels)
+            node_tool_duration.observe(node_run.tool_seconds, *labels)
+            if node_run.prompt_tokens or node_run.completion_tokens:
+                node_tokens.observe(node_run.prompt_tokens, *labels, "prompt")
+                node_tokens.observe(node_run.completion_tokens, *labels, "completion")
+                node_tokens.observe(node_run.cached_tokens, *labels, "cached")
+            if node_run.cost:
+                node_cost.inc(node_run.cost, *labels)
+
+
+def write_metrics(path: str) -> None:
+    """Write all metrics to `path` atomically (e.g. for node_exporter's textfile collector)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(metrics.render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve all metrics at http://host:port/metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_metrics_exporter() -> None:
+    """Start the exporters configured by METRICS_PORT and/or METRICS_FILE, once per process.
+
+    METRICS_FILE is rewritten every METRICS_FILE_INTERVAL seconds (default 15)
+    and at exit. Does nothing when neither variable is set.
+    """
+    global _exporter_started
+    port = os.environ.get("METRICS_PORT")
+    path = os.environ.get("METRICS_FILE")
+    if not (port or path):
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+    if port:
+        serve_metrics(int(port))
+    if path:
+        interval = float(os.environ.get("METRICS_FILE_INTERVAL", 15))
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                write_metrics(path)
+
+        threading.Thread(target=write_periodically, daemon=True).start()
+        atexit.register(write_metrics, path)
@@ -1,22 +1,43 @@
-from typing import Literal
+"""Graph nodes of the web searcher, joke generator and todo manager."""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Literal, Optional
 from uuid import uuid4
 from langchain_core.messages.tool import ToolMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.store.base import BaseStore
-from langgraph.store.memory import InMemoryStore
+from langchain_core.runnables.config import ContextThreadPoolExecutor, merge_configs
+from langgraph.store.base import BaseStore, PutOp
 from typing_extensions import TypedDict
-from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import ToolNode
 from langchain_core.messages import (
     AIMessage,
     HumanMessage,
+    RemoveMessage,
     SystemMessage,
+    get_buffer_string,
     merge_message_runs,
 )
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.types import Command, interrupt
-from datetime import datetime
-from agents.utils.classes import Spy
-from trustcall import create_extractor
+from datetime import datetime, timedelta
+from agents.configuration import Configuration
+from agents.utils.cache import LLMCache
+from agents.utils.classes import ToolCallCapture
+from agents.utils.clients import http_clients
+from agents.utils.compaction import (
+    compaction_cut,
+    compaction_metrics,
+    estimate_tokens,
+    summary_tokens,
+)
+from agents.utils.hedging import HedgePolicy, hedger
+from agents.utils.memory import MemorySnapshot, MemorySnapshotCache, render_todos
+from agents.utils.prompting import assemble_prompt
+from agents.utils.runnables import registry
+from agents.utils.scheduler import scheduler_from_env
+from agents.utils.speculation import Speculation
 import uuid
 
 from agents.utils.state import (
@@ -27,37 +48,306 @@ from agents.utils.state import (
 )
 from agents.utils.tools import (
     UpdateMemory,
-    extract_tool_info,
     human_assistance,
     web_search,
 )
 from agents.utils.prompts import (
+    CONVERSATION_SUMMARY,
+    CURRENT_TIME_PROMPT,
     CREATE_INSTRUCTIONS,
     EXTRACT_TOPIC_PROMPT,
     GENERATE_JOKE_PROMPT,
+    GENERATE_JOKES_PROMPT,
     GENERATE_SUBJECTS_PROMPT,
     MODEL_SYSTEM_PROMPT,
+    JOKE_PLANNER_PROMPT,
     JOKE_ROUTER_PROMPT,
-    SELECT_BEST_JOKE_PROMPT,
+    RANK_JOKES_PROMPT,
+    SUMMARIZE_CONVERSATION_PROMPT,
+    TODO_MANAGER_INSTRUCTIONS_SECTION,
+    TODO_MANAGER_PROFILE_SECTION,
     TODO_MANAGER_SYSTEM_PROMPT,
+    TODO_MANAGER_TODOS_SECTION,
     TRUSTCALL_INSTRUCTION,
 )
-from agents.utils.schemas import BestJokeId, Joke, Profile, RouteOutput, Subjects, ToDo
+from agents.utils.schemas import (
+    Joke,
+    JokePlan,
+    JokeRanking,
+    Jokes,
+    Profile,
+    RouteOutput,
+    Subjects,
+    ToDo,
+)
+
+# response cache shared by all nodes (sized through env, optional on-disk tier)
+llm_cache = LLMCache(
+    maxsize=int(os.environ.get("LLM_CACHE_MAXSIZE", 1024)),
+    ttl=float(os.environ.get("LLM_CACHE_TTL", 3600)),
+    path=os.environ.get("LLM_CACHE_PATH"),
+)
+
+# shared chat model, created on first use (needs OPENAI_API_KEY); benchmarks may assign a fake
+llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm():
+    """Return the shared chat model, creating it on first use."""
+    global llm
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+
+                # pooled keep-alive connections shared by the sync and async paths
+                llm = ChatOpenAI(
+                    model="gpt-4o-mini",
+                    cache=llm_cache,
+                    http_client=http_clients.client("openai"),
+                    http_async_client=http_clients.async_client("openai"),
+                    timeout=http_clients.settings.httpx_timeout,
+                )
+    return llm
+
+
+# fair per-user scheduling of llm calls (LLM_RPM / LLM_TPM, LLM_USER_RPM / LLM_USER_TPM);
+# None when unset. Applied in _llm, so it also covers a model assigned by benchmarks
+llm_scheduler = scheduler_from_env("llm", "LLM")
+
+
+# nodes that route or classify rather than write, served by Configuration.fast_model
+# (todo_manager also writes the user's reply, so it is opt-in through node_models)
+FAST_TIER_NODES = frozenset({"decide_joke_route", "select_best_joke"})
+
+
+def _model_name(node: str, configuration: Configuration) -> str:
+    tier = configuration.node_models.get(node) or (
+        "fast" if node in FAST_TIER_NODES else "generation"
+    )
+    tiers = {
+        "fast": configuration.fast_model,
+        "generation": configuration.generation_model,
+    }
+    return tiers.get(tier, tier)
+
+
+# pick the llm for a node: its tier's model (a copy of the shared one, so it keeps the
+# pooled clients), cached or uncached (see Configuration.llm_cache_skip_nodes)
+def _llm(node: str, config: RunnableConfig):
+    configuration = Configuration.from_runnable_config(config)
+    model = get_llm()
+    model_name = _model_name(node, configuration)
+    if getattr(model, "model_name", model_name) != model_name:
+        model = registry.variant(model, model_name=model_name)
+    if llm_scheduler is not None:
+        model = registry.variant(
+            model, rate_limiter=llm_scheduler, callbacks=[llm_scheduler.usage]
+        )
+    if configuration.llm_cache and node not in configuration.llm_cache_skip_nodes:
+        return model
+    return registry.variant(model, cache=False)
+
+
+# structured output runnable for a node, built once per (llm, schema)
+def _structured(node: str, config: RunnableConfig, schema):
+    return _hedged(node, config, registry.structured(_llm(node, config), schema))
+
+
+# run a node's llm runnable under its hedging policy, if the run gives it one
+# (Configuration.hedge_nodes / node_time_budgets)
+def _hedged(node: str, config: RunnableConfig, runnable):
+    configuration = Configuration.from_runnable_config(config)
+    hedge = node in configuration.hedge_nodes
+    budget = configuration.node_time_budgets.get(node)
+    if not hedge and budget is None:
+        return runnable
+    return hedger.wrap(
+        node,
+        runnable,
+        HedgePolicy(
+            hedge=hedge,
+            quantile=configuration.hedge_quantile,
+            max_ratio=configuration.hedge_max_ratio,
+            retries=configuration.llm_retries,
+            budget=budget,
+        ),
+    )
+
+
+# per-user long term memory snapshots for the todo manager nodes
+memory_snapshots = MemorySnapshotCache(
+    maxsize=int(os.environ.get("MEMORY_SNAPSHOT_MAXSIZE", 1024)),
+    # short, since other workers sharing the store only see each other's writes on expiry
+    ttl=float(os.environ.get("MEMORY_SNAPSHOT_TTL", 10)),
+    # todos loaded per user; the prompt shows the relevant ones (see _todos_shown)
+    todo_limit=int(os.environ.get("MEMORY_SNAPSHOT_TODO_LIMIT", 500)),
+)
+
+# threads for speculative work of sync nodes (copies context vars into each task); when
+# all are busy, nodes run in sequence instead of queueing work that can't start in time
+_SPECULATION_MAX_WORKERS = int(os.environ.get("SPECULATION_MAX_WORKERS", 32))
+_speculation_pool = ContextThreadPoolExecutor(
+    max_workers=_SPECULATION_MAX_WORKERS, thread_name_prefix="speculation"
+)
+_speculation_slots = threading.BoundedSemaphore(_SPECULATION_MAX_WORKERS)
+
+
+def _speculate(speculation: Speculation, fn, *args):
+    # run fn on a free speculation thread, or return None when none is free
+    if not _speculation_slots.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            return fn(*args)
+        finally:
+            _speculation_slots.release()
+
+    future = _speculation_pool.submit(run)
+    # record the work's end however it stops (discarded work is only wasted from then on)
+    future.add_done_callback(lambda _: speculation.done())
+    return future
+
+
+# CONVERSATION COMPACTION NODES (web searcher and todo manager)
+
+
+def _intermediate(config: RunnableConfig) -> RunnableConfig:
+    # hide intermediate llm calls (routing, extraction, selection...) from
+    # stream_mode="messages" so only user-facing tokens reach the client
+    if Configuration.from_runnable_config(config).stream_intermediate_steps:
+        return config
+    return merge_configs(config, {"tags": [TAG_NOSTREAM]})
+
+
+# split history into messages to fold into the summary and messages to keep (None if disabled)
+def _compaction_plan(state, config: RunnableConfig):
+    configuration = Configuration.from_runnable_config(config)
+    if configuration.compaction_token_budget is None:
+        return None
+
+    messages = state["messages"]
+    summary = state.get("summary", "")
+    cut = compaction_cut(
+        messages,
+        configuration.compaction_token_budget,
+        keep_turns=configuration.compaction_keep_turns,
+        summary_tokens=summary_tokens(summary),
+    )
+    return messages[:cut], messages[cut:], summary
+
+
+# only the newly folded messages are summarized, on top of the existing summary
+def _summarize_messages(folded, summary: str):
+    summarize_prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
+        summary=summary, messages=get_buffer_string(folded)
+    )
+    return [SystemMessage(content=summarize_prompt)]
+
+
+def _compaction_update(state, folded, kept, summary: str):
+    summarized_tokens = state.get("summarized_tokens", 0) + estimate_tokens(folded)
+
+    # tokens the full history would cost vs. what is sent (kept messages + summary)
+    kept_tokens = estimate_tokens(kept)
+    compaction_metrics.record(
+        kept_tokens + summarized_tokens,
+        kept_tokens + summary_tokens(summary),
+        compacted=bool(folded),
+    )
+
+    if not folded:
+        return {}
+    return {
+        "messages": [RemoveMessage(id=message.id) for message in folded],
+        "summary": summary,
+        "summarized_tokens": summarized_tokens,
+    }
+
+
+def compact_messages(state: State, config: RunnableConfig):
+    """Fold older turns into a running summary once history exceeds the token budget."""
+    plan = _compaction_plan(state, config)
+    if plan is None:
+        return {}
+
+    folded, kept, summary = plan
+    if folded:
+        summary = (
+            _llm("compact_messages", config)
+            .invoke(_summarize_messages(folded, summary), _intermediate(config))
+            .content
+        )
+
+    return _compaction_update(state, folded, kept, summary)
+
+
+async def acompact_messages(state: State, config: RunnableConfig):
+    """Async version of compact_messages."""
+    plan = _compaction_plan(state, config)
+    if plan is None:
+        return {}
+
+    folded, kept, summary = plan
+    if folded:
+        response = await _llm("compact_messages", config).ainvoke(
+            _summarize_messages(folded, summary),
+            _intermediate(config),
+        )
+        summary = response.content
+
+    return _compaction_update(state, folded, kept, summary)
+
+
+# running summary as a system message, placed before the kept chat history
+def _summary_messages(state):
+    summary = state.get("summary")
+    if not summary:
+        return []
+    return [SystemMessage(content=CONVERSATION_SUMMARY.format(summary=summary))]
 
-llm = ChatOpenAI(model="gpt-4o-mini")
 
 # WEB SEARCH AGENT NODES
 
+
 # llm with web search tools
-llm_with_tools = llm.bind_tools([web_search, human_assistance])
+def _llm_with_tools(config: RunnableConfig):
+    return _hedged(
+        "call_llm",
+        config,
+        registry.with_tools(_llm("call_llm", config), [web_search, human_assistance]),
+    )
 
-sys_msg = SystemMessage(
-    content=MODEL_SYSTEM_PROMPT.format(time=datetime.now().isoformat())
-)
 
+# static system prompt first and the current time last, so the history prefix stays cacheable
+def _web_searcher_prompt(state: State):
+    return assemble_prompt(
+        MODEL_SYSTEM_PROMPT,
+        history=_summary_messages(state) + state["messages"],
+        volatile=[
+            CURRENT_TIME_PROMPT.format(
+                time=datetime.now().isoformat(timespec="minutes")
+            )
+        ],
+    )
 
-def call_llm(state: State):
-    return {"messages": llm_with_tools.invoke([sys_msg] + state["messages"])}
+
+def call_llm(state: State, config: RunnableConfig):
+    """Answer the user, with the web search and human assistance tools bound."""
+    return {
+        "messages": _llm_with_tools(config).invoke(_web_searcher_prompt(state), config)
+    }
+
+
+async def acall_llm(state: State, config: RunnableConfig):
+    """Async version of call_llm."""
+    return {
+        "messages": await _llm_with_tools(config).ainvoke(
+            _web_searcher_prompt(state), config
+        )
+    }
 
 
 # human review node
@@ -115,26 +405,122 @@ def human_review_node(state: State):
         return Command(goto="call_llm", update={"messages": [tool_message]})
 
 
-# web search tool node
-web_search_tool = ToolNode([web_search])
-
-# human assistance tool node
-human_assistance_tool = ToolNode([human_assistance])
-
 # JOKE GENERATION AGENT NODES
 
 
 # joke router llm node
-def decide_joke_route(state: OverallJokeState):
+def decide_joke_route(state: OverallJokeState, config: RunnableConfig):
+    """Classify the request as a joke request or not."""
+    configuration = Configuration.from_runnable_config(config)
+    speculation = future = None
+    if configuration.joke_planning_mode == "speculative":
+        # extract the topic and subjects while the router runs; the thread can't be
+        # interrupted, so on rejection its in-flight call runs out and the next is skipped
+        speculation = Speculation("decide_joke_route")
+        future = _speculate(speculation, _subjects, state, config, speculation)
+    if future is None:
+        # no subjects yet (clearing the last run's), so they get generated next
+        return {"joke_route": _route(state, config), "subjects": []}
+    try:
+        route = _route(state, config)
+    except BaseException:
+        speculation.discard()
+        raise
+    if route != "generate_joke":
+        speculation.discard()
+        return {"joke_route": route}
+    decided = time.perf_counter()
+    update = future.result()
+    speculation.used(decided)
+    return {"joke_route": route, **update}
+
+
+async def adecide_joke_route(state: OverallJokeState, config: RunnableConfig):
+    """Async version of decide_joke_route."""
+    configuration = Configuration.from_runnable_config(config)
+    if configuration.joke_planning_mode != "speculative":
+        return {"joke_route": await _aroute(state, config), "subjects": []}
+
+    # extract the topic and subjects while the router runs; cancelled on rejection
+    speculation = Speculation("decide_joke_route")
+    task = asyncio.create_task(_asubjects(state, config, speculation))
+    task.add_done_callback(lambda _: speculation.done())
+    try:
+        route = await _aroute(state, config)
+    except BaseException:
+        task.cancel()
+        speculation.discard()
+        raise
+    if route != "generate_joke":
+        task.cancel()
+        speculation.discard()
+        return {"joke_route": route}
+    decided = time.perf_counter()
+    update = await task
+    speculation.used(decided)
+    return {"joke_route": route, **update}
+
+
+def _route(state: OverallJokeState, config: RunnableConfig) -> str:
+    last_message = state["messages"][-1]
+
+    router_prompt = JOKE_ROUTER_PROMPT.format(last_message=last_message.content)
+
+    result = _structured("decide_joke_route", config, RouteOutput).invoke(
+        [SystemMessage(content=router_prompt)],
+        _intermediate(config),
+    )
+
+    return result.route
+
+
+async def _aroute(state: OverallJokeState, config: RunnableConfig) -> str:
     last_message = state["messages"][-1]
 
     router_prompt = JOKE_ROUTER_PROMPT.format(last_message=last_message.content)
 
-    result = llm.with_structured_output(RouteOutput).invoke(
-        [SystemMessage(content=router_prompt)]
+    result = await _structured("decide_joke_route", config, RouteOutput).ainvoke(
+        [SystemMessage(content=router_prompt)],
+        _intermediate(config),
+    )
+
+    return result.route
+
+
+# fused planner: route, topic and subjects in one structured call
+def plan_joke(state: OverallJokeState, config: RunnableConfig):
+    """Route the request and pick joke subjects in one call."""
+    last_message = state["messages"][-1]
+
+    planner_prompt = JOKE_PLANNER_PROMPT.format(last_message=last_message.content)
+
+    plan = _structured("plan_joke", config, JokePlan).invoke(
+        [SystemMessage(content=planner_prompt)],
+        _intermediate(config),
+    )
+
+    return _plan_update(plan)
+
+
+async def aplan_joke(state: OverallJokeState, config: RunnableConfig):
+    """Async version of plan_joke."""
+    last_message = state["messages"][-1]
+
+    planner_prompt = JOKE_PLANNER_PROMPT.format(last_message=last_message.content)
+
+    plan = await _structured("plan_joke", config, JokePlan).ainvoke(
+        [SystemMessage(content=planner_prompt)],
+        _intermediate(config),
     )
 
-    return {"joke_route": result.route}
+    return _plan_update(plan)
+
+
+def _plan_update(plan: JokePlan):
+    # a plan without subjects can't fan out, so treat it as a rejection
+    if plan.route != "generate_joke" or not plan.subjects:
+        return {"joke_route": "reject_joke_request"}
+    return {"joke_route": plan.route, **_subjects_update(plan.topic, plan.subjects)}
 
 
 # reject joke request node
@@ -145,55 +531,256 @@ def reject_joke_request(state: OverallJokeState):
 
 
 # generate joke subjects based on topic
-def generate_subjects(state: OverallJokeState):
+def generate_subjects(state: OverallJokeState, config: RunnableConfig):
+    """Pick subjects for the jokes from the user's topic."""
+    return _subjects(state, config)
+
+
+async def agenerate_subjects(state: OverallJokeState, config: RunnableConfig):
+    """Async version of generate_subjects."""
+    return await _asubjects(state, config)
+
+
+# topic extraction then subject generation; a speculation is told about each call
+def _subjects(
+    state: OverallJokeState,
+    config: RunnableConfig,
+    speculation: Optional[Speculation] = None,
+):
     last_message = state["messages"][-1]
 
     extract_topic_prompt = EXTRACT_TOPIC_PROMPT.format(message=last_message.content)
 
-    topic = llm.invoke([SystemMessage(content=extract_topic_prompt)])
+    if speculation is not None:
+        speculation.start_call()
+    topic = _llm("generate_subjects", config).invoke(
+        [SystemMessage(content=extract_topic_prompt)],
+        _intermediate(config),
+    )
 
     generate_subjects_prompt = GENERATE_SUBJECTS_PROMPT.format(topic=topic.content)
 
-    response = llm.with_structured_output(Subjects).invoke(
-        [SystemMessage(content=generate_subjects_prompt)]
+    if speculation is not None:
+        speculation.start_call()
+    response = _structured("generate_subjects", config, Subjects).invoke(
+        [SystemMessage(content=generate_subjects_prompt)],
+        _intermediate(config),
     )
 
+    if speculation is not None:
+        speculation.done()
+    return _subjects_update(topic.content, response.subjects)
+
+
+async def _asubjects(
+    state: OverallJokeState,
+    config: RunnableConfig,
+    speculation: Optional[Speculation] = None,
+):
+    last_message = state["messages"][-1]
+
+    extract_topic_prompt = EXTRACT_TOPIC_PROMPT.format(message=last_message.content)
+
+    if speculation is not None:
+        speculation.start_call()
+    topic = await _llm("generate_subjects", config).ainvoke(
+        [SystemMessage(content=extract_topic_prompt)],
+        _intermediate(config),
+    )
+
+    generate_subjects_prompt = GENERATE_SUBJECTS_PROMPT.format(topic=topic.content)
+
+    if speculation is not None:
+        speculation.start_call()
+    response = await _structured("generate_subjects", config, Subjects).ainvoke(
+        [SystemMessage(content=generate_subjects_prompt)],
+        _intermediate(config),
+    )
+
+    if speculation is not None:
+        speculation.done()
+    return _subjects_update(topic.content, response.subjects)
+
+
+def _subjects_update(topic: str, subjects: list[str]):
     # give user feedback
     feedback = AIMessage(
-        content=f"I will generate jokes about {topic.content}, and then tell you the best one."
+        content=f"I will generate jokes about {topic}, and then tell you the best one."
     )
 
     return {
-        "subjects": response.subjects,
+        "subjects": subjects,
         "messages": [feedback],
         "feedback": None,
         "jokes": "__RESET__",
+        "joke_ranking": [],
     }
 
 
 # generate joke for each subject
-def generate_joke(state: JokeSubjectState):
+def generate_joke(state: JokeSubjectState, config: RunnableConfig):
+    """Write a joke about one subject."""
+    generate_joke_prompt = GENERATE_JOKE_PROMPT.format(subject=state["subject"])
+
+    response = _structured("generate_joke", config, Joke).invoke(
+        [SystemMessage(content=generate_joke_prompt)],
+        _intermediate(config),
+    )
+
+    return {"jokes": [response.joke]}
+
+
+async def agenerate_joke(state: JokeSubjectState, config: RunnableConfig):
+    """Async version of generate_joke."""
     generate_joke_prompt = GENERATE_JOKE_PROMPT.format(subject=state["subject"])
 
-    response = llm.with_structured_output(Joke).invoke(
-        [SystemMessage(content=generate_joke_prompt)]
+    response = await _structured("generate_joke", config, Joke).ainvoke(
+        [SystemMessage(content=generate_joke_prompt)],
+        _intermediate(config),
     )
 
     return {"jokes": [response.joke]}
 
 
+# prompts for batched joke generation
+def _joke_prompts(subjects: list[str]):
+    return [
+        [SystemMessage(content=GENERATE_JOKE_PROMPT.format(subject=subject))]
+        for subject in subjects
+    ]
+
+
+def _jokes_prompt(subjects: list[str]):
+    subjects_list = "\n".join(f"{i}. {subject}" for i, subject in enumerate(subjects))
+    return [SystemMessage(content=GENERATE_JOKES_PROMPT.format(subjects=subjects_list))]
+
+
+# generate jokes for all subjects at once (joke_generation_mode "batch" or "single_call")
+def generate_jokes(state: OverallJokeState, config: RunnableConfig):
+    """Write a joke per subject, in one call or in batches of calls."""
+    configuration = Configuration.from_runnable_config(config)
+    subjects = state["subjects"]
+    jokes = []
+
+    if configuration.joke_generation_mode == "single_call":
+        response = _structured("generate_jokes", config, Jokes).invoke(
+            _jokes_prompt(subjects),
+            _intermediate(config),
+        )
+        jokes = [joke.joke for joke in response.jokes[: len(subjects)]]
+
+    # batch any subjects still missing a joke (all of them in "batch" mode)
+    if len(jokes) < len(subjects):
+        responses = _structured("generate_jokes", config, Joke).batch(
+            _joke_prompts(subjects[len(jokes) :]),
+            merge_configs(
+                _intermediate(config),
+                {"max_concurrency": configuration.joke_batch_max_concurrency},
+            ),
+        )
+        jokes += [response.joke for response in responses]
+
+    return {"jokes": jokes}
+
+
+async def agenerate_jokes(state: OverallJokeState, config: RunnableConfig):
+    """Async version of generate_jokes."""
+    configuration = Configuration.from_runnable_config(config)
+    subjects = state["subjects"]
+    jokes = []
+
+    if configuration.joke_generation_mode == "single_call":
+        response = await _structured("generate_jokes", config, Jokes).ainvoke(
+            _jokes_prompt(subjects),
+            _intermediate(config),
+        )
+        jokes = [joke.joke for joke in response.jokes[: len(subjects)]]
+
+    # batch any subjects still missing a joke (all of them in "batch" mode)
+    if len(jokes) < len(subjects):
+        responses = await _structured("generate_jokes", config, Joke).abatch(
+            _joke_prompts(subjects[len(jokes) :]),
+            merge_configs(
+                _intermediate(config),
+                {"max_concurrency": configuration.joke_batch_max_concurrency},
+            ),
+        )
+        jokes += [response.joke for response in responses]
+
+    return {"jokes": jokes}
+
+
 # select best joke
-def select_best_joke(state: OverallJokeState):
-    feedback = state.get("feedback", "")
-    jokes = state.get("jokes", [])
+def select_best_joke(state: OverallJokeState, config: RunnableConfig):
+    """Rank the jokes once, then offer the next best after each rejection."""
+    update = _next_ranked_joke(state)
+    if update is not None:
+        return update
+
+    candidates = _ranking_candidates(state)
+    response = _structured("select_best_joke", config, JokeRanking).invoke(
+        _rank_jokes_prompt(state, candidates),
+        _intermediate(config),
+    )
+
+    return _ranking_update(state, candidates, response.ranking)
+
 
-    best_joke_prompt = SELECT_BEST_JOKE_PROMPT.format(feedback=feedback, jokes=jokes)
+async def aselect_best_joke(state: OverallJokeState, config: RunnableConfig):
+    """Async version of select_best_joke."""
+    update = _next_ranked_joke(state)
+    if update is not None:
+        return update
 
-    response = llm.with_structured_output(BestJokeId).invoke(
-        [SystemMessage(content=best_joke_prompt)]
+    candidates = _ranking_candidates(state)
+    response = await _structured("select_best_joke", config, JokeRanking).ainvoke(
+        _rank_jokes_prompt(state, candidates),
+        _intermediate(config),
     )
 
-    return {"best_joke": state["jokes"][response.id]}
+    return _ranking_update(state, candidates, response.ranking)
+
+
+# feedback that turns the joke down without saying anything about what to prefer
+_PLAIN_REJECTIONS = frozenset(
+    ["", "n", "no", "nope", "nah", "next", "another", "another one", "try again"]
+)
+
+
+def _next_ranked_joke(state: OverallJokeState):
+    # a plain "no" moves down the cached ranking instead of asking the llm again
+    feedback = state.get("feedback")
+    ranking = state.get("joke_ranking") or []
+    if feedback is None or len(ranking) < 2:
+        return None
+    if feedback.strip().strip(".!").lower() not in _PLAIN_REJECTIONS:
+        return None
+    ranking = ranking[1:]
+    return {"best_joke": state["jokes"][ranking[0]], "joke_ranking": ranking}
+
+
+def _ranking_candidates(state: OverallJokeState) -> list[int]:
+    # after feedback, rank the jokes not turned down yet; start over once all were
+    ranking = state.get("joke_ranking") or []
+    if state.get("feedback") is not None and len(ranking) > 1:
+        return ranking[1:]
+    return list(range(len(state.get("jokes", []))))
+
+
+def _rank_jokes_prompt(state: OverallJokeState, candidates: list[int]):
+    jokes = "\n".join(f"{i}: {state['jokes'][i]}" for i in candidates)
+    rank_prompt = RANK_JOKES_PROMPT.format(
+        feedback=state.get("feedback") or "", jokes=jokes
+    )
+    return [SystemMessage(content=rank_prompt)]
+
+
+def _ranking_update(state: OverallJokeState, candidates: list[int], ranking: list[int]):
+    # keep valid, unique indexes in the model's order; anything it left out goes last
+    allowed = set(candidates)
+    ordered = list(dict.fromkeys(i for i in ranking if i in allowed))
+    ordered += [i for i in candidates if i not in set(ordered)]
+    return {"best_joke": state["jokes"][ordered[0]], "joke_ranking": ordered}
 
 
 # human confirm node
@@ -224,42 +811,132 @@ def tell_best_joke(state: OverallJokeState):
 # TODO MANAGER NODES
 
 
-# todo manager
-def todo_manager(state: ToDoManagerState, config: RunnableConfig, store: BaseStore):
-    """Load memories from the store and use them to personalize the chatbot's response. Either updating memories or responding to the user and ending."""
+# latest conversation text, that todos are ranked against
+def _todo_query(state: ToDoManagerState, turns: int = 3) -> str:
+    return " ".join(
+        m.content
+        for m in state["messages"][-turns:]
+        if m.type in ("human", "ai") and isinstance(m.content, str)
+    )
 
-    # get user id from config
-    user_id = config["configurable"]["user_id"]
 
-    # get user profile from store
-    profile_object = store.search(("profile", user_id))
-    if profile_object:
-        user_profile = profile_object[0].value
-    else:
-        user_profile = None
+# todos relevant to the latest messages plus those due soon (all of them for short lists),
+# shown in the todo_manager prompt; update_todos works on all of them
+def _todos_shown(
+    state: ToDoManagerState, snapshot: MemorySnapshot, config: RunnableConfig
+):
+    configuration = Configuration.from_runnable_config(config)
+    return snapshot.select_todos(
+        _todo_query(state),
+        configuration.todo_retrieval_k,
+        timedelta(hours=configuration.todo_due_soon_hours),
+    )
+
 
-    # get todo list from store
-    todos_object = store.search(("todo", user_id))
-    todos = "\n".join(
-        f"{{'key': {todo.key}, 'value': {todo.value}}}" for todo in todos_object
+# todo manager prompt: static instructions, then memory sections from most to least stable, then chat
+def _todo_manager_prompt(
+    state: ToDoManagerState, snapshot: MemorySnapshot, config: RunnableConfig
+):
+    return assemble_prompt(
+        TODO_MANAGER_SYSTEM_PROMPT,
+        sections=[
+            TODO_MANAGER_INSTRUCTIONS_SECTION.format(
+                instructions=snapshot.render("instructions")
+            ),
+            TODO_MANAGER_PROFILE_SECTION.format(
+                user_profile=snapshot.render("profile")
+            ),
+            TODO_MANAGER_TODOS_SECTION.format(
+                todos=render_todos(_todos_shown(state, snapshot, config))
+            ),
+        ],
+        history=_summary_messages(state) + state["messages"],
+    )
+
+
+# load a user's profile, todos and instructions (cached per user, see memory_snapshots)
+def _memory_snapshot(store: BaseStore, config: RunnableConfig):
+    configuration = Configuration.from_runnable_config(config)
+    return memory_snapshots.load(
+        store, configuration.user_id, cached=configuration.memory_snapshot_cache
     )
 
-    # get instructions from store
-    instructions_object = store.search(("instructions", user_id))
-    if instructions_object:
-        instructions = instructions_object[0].value
-    else:
-        instructions = None
 
-    # add info to system prompt
-    system_prompt = TODO_MANAGER_SYSTEM_PROMPT.format(
-        user_profile=user_profile, todos=todos, instructions=instructions
+async def _amemory_snapshot(store: BaseStore, config: RunnableConfig):
+    configuration = Configuration.from_runnable_config(config)
+    return await memory_snapshots.aload(
+        store, configuration.user_id, cached=configuration.memory_snapshot_cache
     )
 
-    # call llm (with update memory tool) passing in system prompt + chat history
-    response = llm.bind_tools([UpdateMemory]).invoke(
-        [SystemMessage(content=system_prompt)] + state["messages"]
+
+# prep system prompt and chat history as input for trustcall (minus last chat message which is a tool call)
+def _trustcall_messages(state: ToDoManagerState):
+    system_prompt = TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
+    return list(
+        merge_message_runs(
+            messages=[SystemMessage(content=system_prompt)] + state["messages"][:-1]
+        )
+    )
+
+
+# turn trustcall responses into one batch of store puts (keyed by the doc they patch, or a new id)
+def _extracted_puts(result, namespace: tuple[str, str]):
+    return [
+        PutOp(
+            namespace,
+            response_metadata.get("json_doc_id", str(uuid.uuid4())),
+            response.model_dump(mode="json"),
+        )
+        for response, response_metadata in zip(
+            result["responses"], result["response_metadata"]
+        )
+    ]
+
+
+# prep system prompt and chat history for the instructions update
+def _instructions_messages(state: ToDoManagerState, instructions):
+    system_prompt = CREATE_INSTRUCTIONS.format(
+        current_instructions=instructions.value if instructions else None
     )
+    return (
+        [SystemMessage(content=system_prompt)]
+        + state["messages"][:-1]
+        + [
+            HumanMessage(
+                content="Please update the instructions based on the conversation"
+            )
+        ]
+    )
+
+
+# todo manager
+def todo_manager(state: ToDoManagerState, config: RunnableConfig, store: BaseStore):
+    """Load memories from the store and use them to personalize the chatbot's response. Either updating memories or responding to the user and ending."""
+
+    # get user profile, todo list and instructions (one batched store read, cached per user)
+    snapshot = _memory_snapshot(store, config)
+
+    # call llm (with update memory tool) passing in system prompt (with memories) + chat history
+    response = registry.with_tools(_llm("todo_manager", config), [UpdateMemory]).invoke(
+        _todo_manager_prompt(state, snapshot, config),
+        config,
+    )
+
+    return {"messages": [response]}
+
+
+async def atodo_manager(
+    state: ToDoManagerState, config: RunnableConfig, store: BaseStore
+):
+    """Async version of todo_manager."""
+
+    # get user profile, todo list and instructions (one batched store read, cached per user)
+    snapshot = await _amemory_snapshot(store, config)
+
+    # call llm (with update memory tool) passing in system prompt (with memories) + chat history
+    response = await registry.with_tools(
+        _llm("todo_manager", config), [UpdateMemory]
+    ).ainvoke(_todo_manager_prompt(state, snapshot, config), config)
 
     return {"messages": [response]}
 
@@ -271,8 +948,8 @@ def update_profile(state: ToDoManagerState, config: RunnableConfig, store: BaseS
     # get user id from config
     user_id = config["configurable"]["user_id"]
 
-    # get user profile from store
-    profile_object = store.search(("profile", user_id))
+    # get user profile from memory snapshot
+    profile_object = _memory_snapshot(store, config).items("profile")
 
     # format user_profile for trust call extractor
     profile_object = (
@@ -281,31 +958,19 @@ def update_profile(state: ToDoManagerState, config: RunnableConfig, store: BaseS
         else None
     )
 
-    # prep system prompt and chat history as input (minus last chat message which is a tool call)
-    system_prompt = TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    messages = list(
-        merge_message_runs(
-            messages=[SystemMessage(content=system_prompt)] + state["messages"][:-1]
-        )
+    # trustcall extractor for updating user profile (built once per llm)
+    profile_extractor = registry.extractor(
+        _llm("update_profile", config), tools=[Profile], tool_choice="Profile"
     )
 
-    # create trustcall extractor for updating user profile
-    profile_extractor = create_extractor(llm, tools=[Profile], tool_choice="Profile")
-
     # invoke trustcall extractor to update user profile based on chat history
     result = profile_extractor.invoke(
-        {"messages": messages, "existing": profile_object}
+        {"messages": _trustcall_messages(state), "existing": profile_object},
+        _intermediate(config),
     )
 
-    # update user profile in store (item by item in profile json object)
-    for response, response_metadata in zip(
-        result["responses"], result["response_metadata"]
-    ):
-        store.put(
-            ("profile", user_id),
-            response_metadata.get("json_doc_id", str(uuid.uuid4())),
-            response.model_dump(mode="json"),
-        )
+    # write all profile updates to the store in one batch
+    memory_snapshots.batch(store, _extracted_puts(result, ("profile", user_id)))
 
     # Update the tool call made in todo_manager, with profile updated message
     return {
@@ -315,7 +980,46 @@ def update_profile(state: ToDoManagerState, config: RunnableConfig, store: BaseS
         )
     }
 
-    # return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_calls[0]['id']}]}
+
+async def aupdate_profile(
+    state: ToDoManagerState, config: RunnableConfig, store: BaseStore
+):
+    """Async version of update_profile."""
+
+    # get user id from config
+    user_id = config["configurable"]["user_id"]
+
+    # get user profile from memory snapshot
+    profile_object = (await _amemory_snapshot(store, config)).items("profile")
+
+    # format user_profile for trust call extractor
+    profile_object = (
+        [(item.key, "Profile", item.value) for item in profile_object]
+        if profile_object
+        else None
+    )
+
+    # trustcall extractor for updating user profile (built once per llm)
+    profile_extractor = registry.extractor(
+        _llm("update_profile", config), tools=[Profile], tool_choice="Profile"
+    )
+
+    # invoke trustcall extractor to update user profile based on chat history
+    result = await profile_extractor.ainvoke(
+        {"messages": _trustcall_messages(state), "existing": profile_object},
+        _intermediate(config),
+    )
+
+    # write all profile updates to the store in one batch
+    await memory_snapshots.abatch(store, _extracted_puts(result, ("profile", user_id)))
+
+    # Update the tool call made in todo_manager, with profile updated message
+    return {
+        "messages": ToolMessage(
+            content="Profile updated",
+            tool_call_id=state["messages"][-1].tool_calls[0]["id"],
+        )
+    }
 
 
 # update todo list node
@@ -329,7 +1033,7 @@ def update_todos(state: ToDoManagerState, config: RunnableConfig, store: BaseSto
     tool_call = state["messages"][-1].tool_calls[0]
     todo_item_key = tool_call["args"].get("todo_item_key", None)
     if todo_item_key:
-        store.delete(("todo", user_id), todo_item_key)
+        memory_snapshots.delete(store, ("todo", user_id), todo_item_key)
         return {
             "messages": [
                 ToolMessage(
@@ -339,43 +1043,95 @@ def update_todos(state: ToDoManagerState, config: RunnableConfig, store: BaseSto
             ]
         }
 
-    # get todos from store
-    todos = store.search(("todo", user_id))
+    # get all the user's todos from the memory snapshot: trustcall can only patch
+    # todos it is given, and inserts duplicates of the ones it doesn't see
+    todos = _memory_snapshot(store, config).items("todo")
 
     # format todos for trust call extractor
     todos = [(item.key, "ToDo", item.value) for item in todos] if todos else None
 
-    # prep system prompt and chat history as input (minus last chat message which is a tool call)
-    system_prompt = TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    messages = list(
-        merge_message_runs(
-            messages=[SystemMessage(content=system_prompt)] + state["messages"][:-1]
-        )
+    # capture the tool calls made by trustcall as they complete
+    capture = ToolCallCapture(schema_name="ToDo")
+
+    # trustcall extractor for updating todos (built once per llm)
+    todo_extractor = registry.extractor(
+        _llm("update_todos", config),
+        tools=[ToDo],
+        tool_choice="ToDo",
+        enable_inserts=True,
     )
 
-    # instantiate spy to inspect tool calls made by trustcall
-    spy = Spy()
+    # invoke the extractor (keeping the node's callbacks, plus the capture)
+    result = todo_extractor.invoke(
+        {"messages": _trustcall_messages(state), "existing": todos},
+        merge_configs(_intermediate(config), {"callbacks": [capture]}),
+    )
 
-    # create trustcall extractor for updating todos
-    todo_extractor = create_extractor(
-        llm, tools=[ToDo], tool_choice="ToDo", enable_inserts=True
-    ).with_listeners(on_end=spy)
+    # write all todo updates to the store in one batch
+    memory_snapshots.batch(store, _extracted_puts(result, ("todo", user_id)))
 
-    # invoke the extractor
-    result = todo_extractor.invoke({"messages": messages, "existing": todos})
+    # changes made by trustcall to todo list
+    todos_changes = capture.summary()
 
-    # update todos in store (item by item in todo json object)
-    for response, response_metadata in zip(
-        result["responses"], result["response_metadata"]
-    ):
-        store.put(
-            ("todo", user_id),
-            response_metadata.get("json_doc_id", str(uuid.uuid4())),
-            response.model_dump(mode="json"),
+    # update the tool call made by todo_manager, with todos changes message
+    return {
+        "messages": ToolMessage(
+            content=todos_changes,
+            tool_call_id=tool_call["id"],
         )
+    }
+
+
+async def aupdate_todos(
+    state: ToDoManagerState, config: RunnableConfig, store: BaseStore
+):
+    """Async version of update_todos."""
 
-    # extract changes made by trustcall to todo list
-    todos_changes = extract_tool_info(spy.called_tools, schema_name="ToDo")
+    # get user id from config
+    user_id = config["configurable"]["user_id"]
+
+    # if todo item key is provided in last message tool call args, delete item and return "item deleted"
+    tool_call = state["messages"][-1].tool_calls[0]
+    todo_item_key = tool_call["args"].get("todo_item_key", None)
+    if todo_item_key:
+        await memory_snapshots.adelete(store, ("todo", user_id), todo_item_key)
+        return {
+            "messages": [
+                ToolMessage(
+                    content=f"Item {todo_item_key} deleted",
+                    tool_call_id=tool_call["id"],
+                )
+            ]
+        }
+
+    # get all the user's todos from the memory snapshot (see update_todos)
+    todos = (await _amemory_snapshot(store, config)).items("todo")
+
+    # format todos for trust call extractor
+    todos = [(item.key, "ToDo", item.value) for item in todos] if todos else None
+
+    # capture the tool calls made by trustcall as they complete
+    capture = ToolCallCapture(schema_name="ToDo")
+
+    # trustcall extractor for updating todos (built once per llm)
+    todo_extractor = registry.extractor(
+        _llm("update_todos", config),
+        tools=[ToDo],
+        tool_choice="ToDo",
+        enable_inserts=True,
+    )
+
+    # invoke the extractor (keeping the node's callbacks, plus the capture)
+    result = await todo_extractor.ainvoke(
+        {"messages": _trustcall_messages(state), "existing": todos},
+        merge_configs(_intermediate(config), {"callbacks": [capture]}),
+    )
+
+    # write all todo updates to the store in one batch
+    await memory_snapshots.abatch(store, _extracted_puts(result, ("todo", user_id)))
+
+    # changes made by trustcall to todo list
+    todos_changes = capture.summary()
 
     # update the tool call made by todo_manager, with todos changes message
     return {
@@ -395,27 +1151,58 @@ def update_instructions(
     # get user id from config
     user_id = config["configurable"]["user_id"]
 
-    # get existing instructions from store
-    instructions = store.get(("instructions", user_id), "user_instructions")
-
-    # prep system prompt
-    system_prompt = CREATE_INSTRUCTIONS.format(
-        current_instructions=instructions.value if instructions else None
+    # get existing instructions from memory snapshot
+    instructions = _memory_snapshot(store, config).get(
+        "instructions", "user_instructions"
     )
 
     # call model with system prompt and chat history to get new instructions set
-    response = llm.invoke(
-        [SystemMessage(content=system_prompt)]
-        + state["messages"][:-1]
-        + [
-            HumanMessage(
-                content="Please update the instructions based on the conversation"
+    response = _llm("update_instructions", config).invoke(
+        _instructions_messages(state, instructions),
+        _intermediate(config),
+    )
+
+    # update instructions in store
+    memory_snapshots.put(
+        store,
+        ("instructions", user_id),
+        "user_instructions",
+        {"instructions": response.content},
+    )
+
+    # update tool call made by todo_manager, with instructions updated message
+    return {
+        "messages": [
+            ToolMessage(
+                content="Instructions updated",
+                tool_call_id=state["messages"][-1].tool_calls[0]["id"],
             )
         ]
+    }
+
+
+async def aupdate_instructions(
+    state: ToDoManagerState, config: RunnableConfig, store: BaseStore
+):
+    """Async version of update_instructions."""
+
+    # get user id from config
+    user_id = config["configurable"]["user_id"]
+
+    # get existing instructions from memory snapshot
+    instructions = (await _amemory_snapshot(store, config)).get(
+        "instructions", "user_instructions"
+    )
+
+    # call model with system prompt and chat history to get new instructions set
+    response = await _llm("update_instructions", config).ainvoke(
+        _instructions_messages(state, instructions),
+        _intermediate(config),
     )
 
     # update instructions in store
-    store.put(
+    await memory_snapshots.aput(
+        store,
         ("instructions", user_id),
         "user_instructions",
         {"instructions": response.content},
@@ -430,3 +1217,27 @@ def update_instructions(
             )
         ]
     }
+
+
+def warmup_runnables(graph: str):
+    """Prebuild the default runnables `graph` uses, so its first run doesn't pay for them."""
+    config = {"configurable": {}}
+    if graph == "web_searcher":
+        _llm_with_tools(config)
+    elif graph == "joke_generator":
+        _structured("decide_joke_route", config, RouteOutput)
+        _structured("plan_joke", config, JokePlan)
+        _structured("generate_subjects", config, Subjects)
+        _structured("generate_joke", config, Joke)
+        _structured("select_best_joke", config, JokeRanking)
+    elif graph == "todos_manager":
+        registry.with_tools(_llm("todo_manager", config), [UpdateMemory])
+        registry.extractor(
+            _llm("update_profile", config), tools=[Profile], tool_choice="Profile"
+        )
+        registry.extractor(
+            _llm("update_todos", config),
+            tools=[ToDo],
+            tool_choice="ToDo",
+            enable_inserts=True,
+        )
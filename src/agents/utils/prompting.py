@@ -0,0 +1,91 @@
+"""Prompt assembly for provider prefix caching, and its hit ratio."""
+
+import threading
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+
+from agents.utils.metrics import _replayed_from_cache
+
+
+def assemble_prompt(
+    static: str,
+    sections: Sequence[str] = (),
+    history: Sequence[BaseMessage] = (),
+    volatile: Sequence[str] = (),
+) -> list[BaseMessage]:
+    """Build a prompt ordered from most to least stable content.
+
+    Providers cache prompts by exact prefix (tool schemas are sent ahead of
+    the messages), so the layout is: one system message with the `static`
+    instructions followed by `sections` (pass them in order of decreasing
+    stability), then the chat `history`, then a trailing system message with
+    `volatile` content such as the current time.
+    """
+    system_prompt = "\n\n".join(part.strip("\n") for part in [static, *sections])
+    messages: list[BaseMessage] = [SystemMessage(content=system_prompt)]
+    messages.extend(history)
+    if volatile:
+        messages.append(SystemMessage(content="\n".join(volatile)))
+    return messages
+
+
+_lock = threading.Lock()
+
+# per graph: chat model calls with usage data, input tokens and provider-cached input tokens
+prompt_cache_stats: dict[str, dict[str, int]] = {}
+
+
+class PromptCacheTracker(BaseCallbackHandler):
+    """Record prompt and provider-cached input tokens for every chat model call in a graph.
+
+    Attach one per graph at compile time with
+    `builder.compile().with_config(callbacks=[PromptCacheTracker("name")])`;
+    totals for all graphs are kept in `prompt_cache_stats`.
+    """
+
+    def __init__(self, graph: str):
+        """Track calls made in `graph`."""
+        self.graph = graph
+        prompt_cache_stats.setdefault(
+            graph, {"calls": 0, "input_tokens": 0, "cached_tokens": 0}
+        )
+
+    def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Add a call's input and provider-cached tokens to its graph's totals."""
+        input_tokens = cached_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if not usage or _replayed_from_cache(usage):
+                    continue
+                input_tokens += usage.get("input_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get(
+                    "cache_read", 0
+                ) or 0
+        if input_tokens:
+            with _lock:
+                stats = prompt_cache_stats[self.graph]
+                stats["calls"] += 1
+                stats["input_tokens"] += input_tokens
+                stats["cached_tokens"] += cached_tokens
+
+
+def prompt_cache_hit_ratio(graph: str) -> float:
+    """Return the share of input tokens served from the provider's prompt cache."""
+    stats = prompt_cache_stats.get(graph)
+    if not stats or not stats["input_tokens"]:
+        return 0.0
+    return stats["cached_tokens"] / stats["input_tokens"]
@@ -1,8 +1,30 @@
+"""Prompt templates of the graphs."""
+
 # WEB SEARCHER PROMPTS
 MODEL_SYSTEM_PROMPT = """
 You are a helpful assistant.
+"""
 
-Current Time: {time}
+# volatile prompt content, sent after the chat history so it doesn't break provider prefix caching
+CURRENT_TIME_PROMPT = """Current Time: {time}"""
+
+# CONVERSATION COMPACTION PROMPTS
+
+SUMMARIZE_CONVERSATION_PROMPT = """
+You maintain a running summary of a conversation between a user and an assistant.
+
+Extend the existing summary with the new messages below. Keep every fact, name, date, decision, open question and tool result that later turns may depend on. Be concise and write in the third person.
+
+Existing summary (may be empty):
+{summary}
+
+New messages:
+{messages}
+"""
+
+CONVERSATION_SUMMARY = """
+Summary of the earlier conversation (older messages have been compacted):
+{summary}
 """
 
 # JOKE GENERATOR PROMPTS
@@ -30,14 +52,36 @@ GENERATE_SUBJECTS_PROMPT = (
     """Generate comma separated list of between 2 to 5 subjects related to: {topic}"""
 )
 
+JOKE_PLANNER_PROMPT = """
+You plan jokes for a joke generator.
+
+Instructions:
+- If the message is clearly a request for a joke, set "route" to "generate_joke",
+  "topic" to the joke topic as a short phrase or word, and "subjects" to between
+  2 to 5 subjects related to that topic.
+- For anything else (e.g., questions, facts, opinions), set "route" to
+  "reject_joke_request" and leave "topic" and "subjects" empty.
+
+Message: "{last_message}"
+"""
+
 GENERATE_JOKE_PROMPT = """Generate a joke about {subject}"""
 
-SELECT_BEST_JOKE_PROMPT = """
+GENERATE_JOKES_PROMPT = """
+Generate one joke for each of the subjects below.
+
+Return exactly one joke per subject, in the same order as the subjects are listed.
+
+Subjects:
+{subjects}
+"""
+
+RANK_JOKES_PROMPT = """
 You're an expert at selecting the funniest jokes.
 
-Below are a bunch of jokes, as well as human feedback (which may be empty).
+Below are a bunch of jokes, each with its index, as well as human feedback (which may be empty).
 
-Factoring in the human feedback (if any) and your own judgment, select the best joke by returning the index of the best joke, starting with 0.
+Factoring in the human feedback (if any) and your own judgment, rank the jokes by returning the indexes of all of them, from the funniest to the least funny.
 
 Human feedback:
 {feedback}
@@ -48,7 +92,7 @@ Jokes:
 
 # TODO MANAGER PROMPTS
 
-# todo manager system prompt
+# todo manager system prompt (static part; memory sections are appended after it, most stable first)
 TODO_MANAGER_SYSTEM_PROMPT = """
 You are designed to be a companion to a user, helping them keep track of their ToDo list.
 
@@ -57,20 +101,7 @@ You have a long term memory which keeps track of three things:
 2. The user's ToDo list
 3. General instructions for updating the ToDo list
 
-Here is the current User Profile (may be empty if no information has been collected yet):
-<user_profile>
-{user_profile}
-</user_profile>
-
-Here is the current ToDo List (may be empty if no tasks have been added yet):
-<todo>
-{todos}
-</todo>
-
-Here are the current user-specified preferences for updating the ToDo list (may be empty if no preferences have been specified yet):
-<instructions>
-{instructions}
-</instructions>
+The current contents of your long term memory are given at the end of this message.
 
 Here are your instructions for reasoning about the user's messages:
 
@@ -90,6 +121,27 @@ Here are your instructions for reasoning about the user's messages:
 4. Respond naturally to user after a tool call was made to save memories, or if no tool call was made.
 """
 
+TODO_MANAGER_INSTRUCTIONS_SECTION = """
+Here are the current user-specified preferences for updating the ToDo list (may be empty if no preferences have been specified yet):
+<instructions>
+{instructions}
+</instructions>
+"""
+
+TODO_MANAGER_PROFILE_SECTION = """
+Here is the current User Profile (may be empty if no information has been collected yet):
+<user_profile>
+{user_profile}
+</user_profile>
+"""
+
+TODO_MANAGER_TODOS_SECTION = """
+Here is the current ToDo List (may be empty if no tasks have been added yet):
+<todo>
+{todos}
+</todo>
+"""
+
 # trustcall data updater
 TRUSTCALL_INSTRUCTION = """
 Reflect on following interaction. 
@@ -0,0 +1,150 @@
+"""BM25 retrieval and due-date lookups over a user's todos."""
+
+import math
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# words that say nothing about which todo a message is about
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from have i in is it me my of on or so "
+    "that the this to up want we with you your".split()
+)
+
+# statuses whose deadlines no longer matter
+_CLOSED = ("done", "archived")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase words, without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def todo_text(value: dict[str, Any]) -> str:
+    """Return the text a todo is indexed by: its task and solutions."""
+    solutions = value.get("solutions") or []
+    return " ".join([str(value.get("task", "")), *map(str, solutions)])
+
+
+def parse_deadline(value: dict[str, Any]) -> Optional[float]:
+    """Return an open todo's deadline as a UTC timestamp, or None."""
+    deadline = value.get("deadline")
+    if not deadline or value.get("status") in _CLOSED:
+        return None
+    try:
+        # fromisoformat only accepts "Z" from Python 3.11
+        parsed = datetime.fromisoformat(str(deadline).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class TodoIndex:
+    """BM25 index over a user's todos, updated one item at a time.
+
+    Each todo is a row: its term frequencies live in per-term postings and
+    its length and deadline in NumPy arrays, so a put or delete only touches
+    that todo's terms and a query scores every row with a few vectorized
+    operations per query term. Rows of deleted todos are reused.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """Create an empty index with BM25 parameters `k1` and `b`."""
+        self.k1 = k1
+        self.b = b
+        self._rows: dict[str, int] = {}
+        self._keys: list[Optional[str]] = []
+        self._free: list[int] = []
+        self._terms: dict[int, Counter] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._lengths = np.zeros(0, dtype=np.float64)
+        self._deadlines = np.zeros(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Return the number of todos indexed."""
+        return len(self._rows)
+
+    def _row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._keys)
+        self._keys.append(None)
+        if row >= len(self._lengths):
+            size = max(16, 2 * len(self._lengths))
+            self._lengths = np.resize(self._lengths, size)
+            self._deadlines = np.resize(self._deadlines, size)
+        return row
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """Index a todo, replacing any previous version of `key`."""
+        self.delete(key)
+        row = self._row()
+        terms = Counter(tokenize(todo_text(value)))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[row] = tf
+        self._rows[key] = row
+        self._keys[row] = key
+        self._terms[row] = terms
+        self._lengths[row] = sum(terms.values())
+        deadline = parse_deadline(value)
+        self._deadlines[row] = np.nan if deadline is None else deadline
+
+    def delete(self, key: str) -> None:
+        """Remove a todo from the index, if present."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        for term in self._terms.pop(row):
+            postings = self._postings[term]
+            del postings[row]
+            if not postings:
+                del self._postings[term]
+        self._keys[row] = None
+        self._lengths[row] = 0.0
+        self._deadlines[row] = np.nan
+        self._free.append(row)
+
+    def search(self, query: str, k: int) -> list[str]:
+        """Return up to `k` keys of the todos most relevant to `query`, best first."""
+        if not self._rows or k <= 0:
+            return []
+        size = len(self._keys)
+        lengths = self._lengths[:size]
+        average = lengths.sum() / len(self._rows) or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / average)
+        scores = np.zeros(size)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            rows = np.fromiter(postings.keys(), dtype=np.intp, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            idf = math.log(
+                1 + (len(self._rows) - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        return [
+            self._keys[row]
+            for row in matched[np.argsort(-scores[matched], kind="stable")]
+        ]
+
+    def due(self, within: timedelta, now: Optional[datetime] = None) -> list[str]:
+        """Return keys of open todos due within `within` of `now` (or overdue), soonest first."""
+        now = now or datetime.now(timezone.utc)
+        size = len(self._keys)
+        deadlines = self._deadlines[:size]
+        # nan (no deadline, or a free row) never compares as due
+        rows = np.flatnonzero(deadlines <= (now + within).timestamp())
+        return [
+            self._keys[row] for row in rows[np.argsort(deadlines[rows], kind="stable")]
+        ]
@@ -0,0 +1,129 @@
+"""Graph node helpers and a registry of derived runnables."""
+
+import inspect
+import os
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langgraph.config import get_store
+
+from agents.utils.cache import TTLCache
+
+
+def sync_async_node(
+    func: Callable[..., Any],
+    afunc: Callable[..., Awaitable[Any]],
+    name: Optional[str] = None,
+) -> Runnable:
+    """Build a graph node that runs `func` under invoke/stream and `afunc` under ainvoke/astream.
+
+    The config is passed when the sync signature takes one, and the graph's
+    store when it takes `store`, so both functions must accept the same arguments.
+    """
+    name = name or func.__name__
+    if "store" not in inspect.signature(func).parameters:
+        return RunnableLambda(func, afunc, name=name)
+
+    def with_store(state: Any, config: RunnableConfig):
+        return func(state, config, store=get_store())
+
+    async def awith_store(state: Any, config: RunnableConfig):
+        return await afunc(state, config, store=get_store())
+
+    return RunnableLambda(with_store, awith_store, name=name)
+
+
+def _freeze(value: Any) -> Hashable:
+    # turn option values into a hashable key; unhashable objects (models, tools) key by identity
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return value
+
+
+class RunnableRegistry:
+    """Build derived runnables once per (model, schema, options) and reuse them across runs.
+
+    `with_structured_output`, `bind_tools` and trustcall's `create_extractor`
+    all regenerate tool JSON schemas when called, so nodes fetch them from
+    here instead of rebuilding them on every execution. Models and tools key
+    by identity, so at most `maxsize` runnables are kept, least recently used
+    first out, in case callers keep passing new objects.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """Start with no runnables, keeping up to `maxsize` of them."""
+        self._runnables = TTLCache(maxsize)
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, build: Callable[[], Any], *refs: Any, **options: Any):
+        key = (kind, _freeze(refs), _freeze(options))
+        entry = self._runnables.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._runnables.get(key)
+                if entry is None:
+                    # keep refs alive while the entry is cached, so identity-based keys
+                    # can't be reused by new objects
+                    entry = (build(), refs)
+                    self._runnables.set(key, entry)
+        return entry[0]
+
+    def variant(self, model: Any, **update: Any):
+        """Return `model.model_copy(update=update)`, e.g. `cache=False`."""
+        return self._get(
+            "variant", lambda: model.model_copy(update=update), model, **update
+        )
+
+    def structured(self, model: Any, schema: Any, **options: Any):
+        """Return `model.with_structured_output(schema, **options)`."""
+        return self._get(
+            "structured",
+            lambda: model.with_structured_output(schema, **options),
+            model,
+            schema,
+            **options,
+        )
+
+    def with_tools(self, model: Any, tools: list, **options: Any):
+        """Return `model.bind_tools(tools, **options)`."""
+        return self._get(
+            "with_tools",
+            lambda: model.bind_tools(tools, **options),
+            model,
+            *tools,
+            **options,
+        )
+
+    def extractor(self, model: Any, tools: list, **options: Any):
+        """Return trustcall's `create_extractor(model, tools=tools, **options)`."""
+        from trustcall import create_extractor
+
+        return self._get(
+            "extractor",
+            lambda: create_extractor(model, tools=tools, **options),
+            model,
+            *tools,
+            **options,
+        )
+
+    def clear(self) -> None:
+        """Drop every runnable built so far."""
+        with self._lock:
+            self._runnables.clear()
+
+    def __len__(self) -> int:
+        """Return the number of runnables built."""
+        return len(self._runnables)
+
+
+# shared by all graphs
+registry = RunnableRegistry(
+    maxsize=int(os.environ.get("RUNNABLE_REGISTRY_MAXSIZE", 256))
+)
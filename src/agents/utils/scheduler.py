@@ -0,0 +1,384 @@
+"""Fair per-user scheduling and token buckets for outbound LLM and search calls."""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from agents.configuration import Configuration
+from agents.utils.compaction import estimate_tokens
+from agents.utils.metrics import _context_user_id, metrics
+
+scheduler_queue_depth = metrics.gauge(
+    "agent_scheduler_queue_depth",
+    "Outbound calls waiting for rate limit capacity.",
+    ("resource",),
+)
+scheduler_wait = metrics.histogram(
+    "agent_scheduler_wait_seconds",
+    "Time an outbound call waited for rate limit capacity.",
+    ("resource", "user_id"),
+)
+scheduler_throttled = metrics.counter(
+    "agent_scheduler_throttled_total",
+    "Outbound calls that had to wait for rate limit capacity.",
+    ("resource", "user_id"),
+)
+
+# idle per-user buckets kept before full ones are dropped
+_MAX_IDLE_USERS = 4096
+
+
+@dataclass
+class RateLimit:
+    """Requests and tokens per minute; None leaves that dimension unlimited."""
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        """Return whether any dimension is limited."""
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute`, holding `burst_seconds` of it.
+
+    `take` may drive the bucket negative (e.g. when a call used more tokens
+    than estimated); later calls then wait until the debt is refilled.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0):
+        """Start full."""
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Return seconds until `amount` (capped at capacity) is available."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        """Remove `amount`, possibly going into debt."""
+        self._refill(now)
+        self.tokens -= amount
+
+    def full(self, now: float) -> bool:
+        """Return whether the bucket has refilled completely."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Limits:
+    def __init__(self, limit: RateLimit, burst_seconds: float):
+        self.requests = (
+            TokenBucket(limit.requests_per_minute, burst_seconds)
+            if limit.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(limit.tokens_per_minute, burst_seconds)
+            if limit.tokens_per_minute
+            else None
+        )
+
+    def delay(self, tokens: float, now: float) -> float:
+        return max(
+            self.requests.delay(1, now) if self.requests else 0.0,
+            self.tokens.delay(tokens, now) if self.tokens else 0.0,
+        )
+
+    def take(self, requests: int, tokens: float, now: float) -> None:
+        if self.requests and requests:
+            self.requests.take(requests, now)
+        if self.tokens and tokens:
+            self.tokens.take(tokens, now)
+
+    def full(self, now: float) -> bool:
+        return all(b.full(now) for b in (self.requests, self.tokens) if b is not None)
+
+
+class _Waiter:
+    __slots__ = ("user", "tokens", "granted", "event", "loop", "future")
+
+    def __init__(self, user: str, tokens: float, loop=None):
+        self.user = user
+        self.tokens = tokens
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class FairScheduler(BaseRateLimiter):
+    """Rate limiter with global and per-user token buckets and fair queueing across users.
+
+    Calls are admitted while the global buckets and the calling user's
+    buckets have capacity; otherwise they queue per user, and users take
+    turns (round robin) as capacity frees up, so one user's burst can delay
+    the others by at most one call per turn. The user is read from the
+    `user_id` of the running config. Buckets hold `burst_seconds` of their
+    rate, since providers enforce per-minute limits over shorter windows.
+
+    Set it as a chat model's `rate_limiter` and add `usage` to the model's
+    callbacks, which estimates each call's prompt tokens before it is
+    admitted and charges the difference to the actual usage afterwards.
+    Without `usage` (e.g. for search) only requests are counted.
+    """
+
+    def __init__(
+        self,
+        resource: str,
+        limit: RateLimit = RateLimit(),
+        user_limit: RateLimit = RateLimit(),
+        burst_seconds: float = 1.0,
+    ):
+        """Limit `resource` by `limit` overall and by `user_limit` per user."""
+        self.resource = resource
+        self.limit = limit
+        self.user_limit = user_limit
+        self.burst_seconds = burst_seconds
+        self.usage = TokenUsage(self)
+        self._global = _Limits(limit, burst_seconds)
+        self._users: dict[str, _Limits] = {}
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self._depth = 0
+        self._lock = threading.Lock()
+        # (run id, user, estimated tokens) of the call about to acquire, set by `usage`
+        self._pending: ContextVar[Optional[tuple]] = ContextVar(
+            f"scheduler_pending_{resource}", default=None
+        )
+        # run id -> (user, tokens charged) for admitted calls awaiting usage
+        self._admitted: dict[UUID, tuple[str, float]] = {}
+
+    def _user_limits(self, user: str, now: float) -> _Limits:
+        limits = self._users.get(user)
+        if limits is None:
+            if len(self._users) >= _MAX_IDLE_USERS:
+                # buckets that refilled completely hold no state worth keeping
+                for idle in [
+                    u
+                    for u, b in self._users.items()
+                    if u not in self._queues and b.full(now)
+                ]:
+                    del self._users[idle]
+            limits = self._users[user] = _Limits(self.user_limit, self.burst_seconds)
+        return limits
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """Admit queued calls in round-robin user order; return the next wake-up delay."""
+        wake = None
+        progressed = True
+        while progressed and self._queues:
+            progressed = False
+            for user, queue in self._queues.items():
+                waiter = queue[0]
+                user_limits = self._user_limits(user, now)
+                delay = max(
+                    self._global.delay(waiter.tokens, now),
+                    user_limits.delay(waiter.tokens, now),
+                )
+                if delay > 0:
+                    wake = delay if wake is None else min(wake, delay)
+                    continue
+                self._global.take(1, waiter.tokens, now)
+                user_limits.take(1, waiter.tokens, now)
+                queue.popleft()
+                if queue:
+                    # served users go to the back of the rotation
+                    self._queues.move_to_end(user)
+                else:
+                    del self._queues[user]
+                self._depth -= 1
+                waiter.grant()
+                progressed = True
+                wake = None
+                break
+        scheduler_queue_depth.set(self._depth, self.resource)
+        return wake
+
+    def _admission(self) -> tuple[Optional[UUID], str, float]:
+        pending = self._pending.get()
+        if pending is not None:
+            self._pending.set(None)
+            return pending
+        return None, _context_user_id() or Configuration.user_id, 0.0
+
+    def _enqueue(self, waiter: _Waiter) -> Optional[float]:
+        with self._lock:
+            self._queues.setdefault(waiter.user, deque()).append(waiter)
+            self._depth += 1
+            return self._dispatch(time.monotonic())
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                return
+            queue = self._queues.get(waiter.user)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[waiter.user]
+                self._depth -= 1
+                scheduler_queue_depth.set(self._depth, self.resource)
+
+    def _admitted_call(self, run_id, waiter: _Waiter, start: float) -> bool:
+        waited = time.perf_counter() - start
+        scheduler_wait.observe(waited, self.resource, waiter.user)
+        if waited > 0.001:
+            scheduler_throttled.inc(1, self.resource, waiter.user)
+        if run_id is not None:
+            with self._lock:
+                self._admitted[run_id] = (waiter.user, waiter.tokens)
+        return True
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Wait for capacity for one call of the current user; see `BaseRateLimiter`."""
+        run_id, user, tokens = self._admission()
+        waiter = _Waiter(user, tokens)
+        start = time.perf_counter()
+        wake = self._enqueue(waiter)
+        if not waiter.granted and not blocking:
+            self._cancel(waiter)
+            return False
+        while not waiter.event.wait(timeout=wake):
+            # capacity refills with time, so whoever wakes first hands it out
+            with self._lock:
+                wake = self._dispatch(time.monotonic())
+        return self._admitted_call(run_id, waiter, start)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Async `acquire`; a cancelled wait leaves the queue."""
+        run_id, user, tokens = self._admission()
+        waiter = _Waiter(user, tokens, loop=asyncio.get_running_loop())
+        start = time.perf_counter()
+        wake = self._enqueue(waiter)
+        if not waiter.granted and not blocking:
+            self._cancel(waiter)
+            return False
+        try:
+            while not waiter.future.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), wake)
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        wake = self._dispatch(time.monotonic())
+        except BaseException:
+            self._cancel(waiter)
+            raise
+        return self._admitted_call(run_id, waiter, start)
+
+    def settle(self, run_id: UUID, tokens: Optional[float]) -> None:
+        """Charge an admitted call's actual token usage in place of its estimate."""
+        with self._lock:
+            admitted = self._admitted.pop(run_id, None)
+            if admitted is None or tokens is None:
+                return
+            user, estimated = admitted
+            now = time.monotonic()
+            self._global.take(0, tokens - estimated, now)
+            self._user_limits(user, now).take(0, tokens - estimated, now)
+
+    def stats(self) -> dict[str, Any]:
+        """Return queue depth and the number of users queued and tracked."""
+        with self._lock:
+            return {
+                "queued": self._depth,
+                "users_queued": len(self._queues),
+                "users_tracked": len(self._users),
+            }
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Model callback feeding a FairScheduler the prompt estimate and actual usage of each call."""
+
+    # must run in the caller's context, right before the model acquires
+    run_inline = True
+
+    def __init__(self, scheduler: FairScheduler):
+        """Feed `scheduler`."""
+        self.scheduler = scheduler
+
+    def on_chat_model_start(
+        self,
+        serialized: Any,
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Estimate the call's prompt tokens for the scheduler to admit it by."""
+        # LangGraph copies configurable values into the run metadata
+        user = (
+            (metadata or {}).get("user_id")
+            or _context_user_id()
+            or Configuration.user_id
+        )
+        estimate = sum(estimate_tokens(m) for m in messages)
+        self.scheduler._pending.set((run_id, user, float(estimate)))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Charge the call's actual token usage."""
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    tokens += usage.get("total_tokens", 0)
+        self.scheduler.settle(run_id, tokens or None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        """Settle a failed call."""
+        # the estimate stays charged
+        self.scheduler.settle(run_id, None)
+
+
+def _env_limit(prefix: str) -> RateLimit:
+    rpm = os.environ.get(f"{prefix}_RPM")
+    tpm = os.environ.get(f"{prefix}_TPM")
+    return RateLimit(float(rpm) if rpm else None, float(tpm) if tpm else None)
+
+
+def scheduler_from_env(resource: str, prefix: str) -> Optional[FairScheduler]:
+    """Build a scheduler from {prefix}_RPM/_TPM and {prefix}_USER_RPM/_TPM, or None if all unset."""
+    limit = _env_limit(prefix)
+    user_limit = _env_limit(f"{prefix}_USER")
+    if not limit and not user_limit:
+        return None
+    return FairScheduler(
+        resource,
+        limit,
+        user_limit,
+        burst_seconds=float(os.environ.get(f"{prefix}_BURST_SECONDS", 1)),
+    )
@@ -1,3 +1,5 @@
+"""Structured output and memory schemas."""
+
 from typing import Literal, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -9,6 +11,19 @@ class RouteOutput(BaseModel):
         description="Route to follow based on user intent. Use 'generate_joke' if the user is asking for a joke. Use 'reject_joke_request' for anything else."
     )
 
+class JokePlan(BaseModel):
+    """Route for the user's message and, for a joke request, its topic and subjects."""
+
+    route: Literal["generate_joke", "reject_joke_request"] = Field(
+        description="Route to follow based on user intent. Use 'generate_joke' if the user is asking for a joke. Use 'reject_joke_request' for anything else."
+    )
+    topic: str = Field(
+        description="The joke topic as a short phrase or word. Empty if the request is rejected."
+    )
+    subjects: list[str] = Field(
+        description="List of between 2 to 5 joke subjects related to the topic. Empty if the request is rejected."
+    )
+
 class Subjects(BaseModel):
     subjects: list[str] = Field(
         description="List of between 2 to 5 joke subjects related to the topic."
@@ -18,8 +33,20 @@ class Joke(BaseModel):
     joke: str = Field(description="A joke about the subject.")
 
 
-class BestJokeId(BaseModel):
-    id: int = Field(description="Index of the best joke, starting with 0")
+class Jokes(BaseModel):
+    """Jokes for the given subjects."""
+
+    jokes: list[Joke] = Field(
+        description="One joke per subject, in the same order as the subjects."
+    )
+
+
+class JokeRanking(BaseModel):
+    """Ranking of the candidate jokes."""
+
+    ranking: list[int] = Field(
+        description="Indexes of all the jokes, from the funniest to the least funny"
+    )
 
 # TODOS MANAGER SCHEMAS
 
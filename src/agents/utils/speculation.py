@@ -0,0 +1,135 @@
+"""Tracking of speculative node work, used or wasted."""
+
+import threading
+import time
+from typing import Any
+
+from agents.utils.metrics import metrics
+
+speculation_runs = metrics.counter(
+    "agent_speculation_total",
+    "Speculative executions by outcome (used, wasted).",
+    ("node", "outcome"),
+)
+speculation_wasted_calls = metrics.counter(
+    "agent_speculation_wasted_calls_total",
+    "LLM calls started speculatively and then cancelled or discarded.",
+    ("node",),
+)
+speculation_wasted_seconds = metrics.counter(
+    "agent_speculation_wasted_seconds_total",
+    "Time spent on speculative work that was cancelled or discarded.",
+    ("node",),
+)
+speculation_saved_seconds = metrics.histogram(
+    "agent_speculation_saved_seconds",
+    "Latency saved per used speculation: sequential time minus overlapped time.",
+    ("node",),
+)
+
+
+class SpeculationCancelled(Exception):
+    """Raised inside speculative work that was discarded before its next call."""
+
+
+class Speculation:
+    """Track one piece of work started before it is known to be needed.
+
+    The speculative side calls `start_call()` before each LLM call and
+    `done()` when it finishes or stops; the deciding side calls `used()` or
+    `discard()` once the decision is made. Discarded work that is still
+    running is recorded as wasted when it stops, so its time includes the
+    call in flight. Both sides may run on different threads.
+    """
+
+    def __init__(self, node: str):
+        """Start tracking speculative work for `node`, timed from now."""
+        self.node = node
+        self.start = time.perf_counter()
+        self.calls = 0
+        self.finished = None
+        self._discarded = False
+        self._lock = threading.Lock()
+
+    def start_call(self) -> None:
+        """Count an LLM call, or raise SpeculationCancelled if discarded."""
+        with self._lock:
+            if self._discarded:
+                raise SpeculationCancelled(self.node)
+            self.calls += 1
+
+    def done(self) -> None:
+        """Mark the speculative work finished; later calls are ignored."""
+        with self._lock:
+            if self.finished is not None:
+                return
+            self.finished = time.perf_counter()
+            discarded = self._discarded
+        if discarded:
+            self._wasted()
+
+    def used(self, decided: float) -> None:
+        """Record the latency saved, given when the decision was made (`perf_counter`)."""
+        now = time.perf_counter()
+        sequential = (decided - self.start) + ((self.finished or now) - self.start)
+        saved = max(0.0, sequential - (now - self.start))
+        speculation_runs.inc(1, self.node, "used")
+        speculation_saved_seconds.observe(saved, self.node)
+        speculation_metrics.record(used=True, calls=self.calls, seconds=saved)
+
+    def discard(self) -> None:
+        """Stop the work's further calls and record it as wasted once it stops."""
+        with self._lock:
+            self._discarded = True
+            finished = self.finished is not None
+        if finished:
+            self._wasted()
+
+    def _wasted(self) -> None:
+        calls = self.calls
+        wasted = self.finished - self.start
+        speculation_runs.inc(1, self.node, "wasted")
+        speculation_wasted_calls.inc(calls, self.node)
+        speculation_wasted_seconds.inc(wasted, self.node)
+        speculation_metrics.record(used=False, calls=calls, seconds=wasted)
+
+
+class SpeculationMetrics:
+    """Running totals of speculative work used and wasted, across all nodes."""
+
+    def __init__(self):
+        """Start all totals at zero."""
+        self.used = 0
+        self.wasted = 0
+        self.calls_used = 0
+        self.calls_wasted = 0
+        self.seconds_saved = 0.0
+        self.seconds_wasted = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, used: bool, calls: int, seconds: float) -> None:
+        """Record one speculation's outcome."""
+        with self._lock:
+            if used:
+                self.used += 1
+                self.calls_used += calls
+                self.seconds_saved += seconds
+            else:
+                self.wasted += 1
+                self.calls_wasted += calls
+                self.seconds_wasted += seconds
+
+    def stats(self) -> dict[str, Any]:
+        """Return the totals and the time saved per used speculation."""
+        return {
+            "used": self.used,
+            "wasted": self.wasted,
+            "calls_used": self.calls_used,
+            "calls_wasted": self.calls_wasted,
+            "seconds_saved": self.seconds_saved,
+            "seconds_wasted": self.seconds_wasted,
+            "saved_per_used": self.seconds_saved / self.used if self.used else 0.0,
+        }
+
+
+speculation_metrics = SpeculationMetrics()
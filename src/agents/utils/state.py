@@ -12,6 +12,9 @@ import operator
 class State(MessagesState):
     name: str
     birthday: str
+    # running summary of compacted messages, and the estimated tokens it replaced
+    summary: str
+    summarized_tokens: int
 
 # JOKE GENERATOR STATE
 
@@ -32,6 +35,8 @@ class OverallJokeState(MessagesState):
     subjects: list[str]
     jokes: Annotated[list[str], list_with_reset_reducer]
     best_joke: str
+    # indexes of the jokes not yet turned down, best first; best_joke is the head
+    joke_ranking: list[int]
     feedback: str | None = None
 
 
@@ -44,3 +49,7 @@ class JokeSubjectState(TypedDict):
 class ToDoManagerState(MessagesState):
     """State for the todo manager."""
 
+    # running summary of compacted messages, and the estimated tokens it replaced
+    summary: str
+    summarized_tokens: int
+
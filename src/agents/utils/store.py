@@ -0,0 +1,330 @@
+"""Indexed SQLite store for long term memory."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    -- insertion order, which searches return items in (as InMemoryStore does)
+    id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+-- lookups, upserts and per-namespace listing only touch the namespace's rows
+CREATE UNIQUE INDEX IF NOT EXISTS store_prefix_key ON store (prefix, key);
+"""
+
+# sqlite's default limit on bound parameters is 999 on older builds
+_MAX_VARS = 900
+
+_OPERATORS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def _matches(value: Any, condition: Any) -> bool:
+    """Match a stored value against a search filter, as InMemoryStore does."""
+    if isinstance(condition, dict):
+        if any(k.startswith("$") for k in condition):
+            return all(_OPERATORS[op](value, arg) for op, arg in condition.items())
+        return isinstance(value, dict) and all(
+            _matches(value.get(k), v) for k, v in condition.items()
+        )
+    return value == condition
+
+
+def _condition_matches(condition: Any, namespace: tuple[str, ...]) -> bool:
+    path = tuple(condition.path)
+    if len(namespace) < len(path):
+        return False
+    labels = (
+        namespace[: len(path)]
+        if condition.match_type == "prefix"
+        else namespace[-len(path) :]
+    )
+    return all(p == "*" or p == label for p, label in zip(path, labels))
+
+
+def _prefix(namespace: tuple[str, ...]) -> str:
+    # labels joined by "." with dots and backslashes in labels escaped, so a dotted
+    # label (e.g. an email user_id) can't read as several labels or match another's prefix
+    return ".".join(
+        label.replace("\\", "\\\\").replace(".", "\\.") for label in namespace
+    )
+
+
+def _namespace(prefix: str) -> tuple[str, ...]:
+    if not prefix:
+        return ()
+    labels, label = [], []
+    chars = iter(prefix)
+    for char in chars:
+        if char == "\\":
+            label.append(next(chars, ""))
+        elif char == ".":
+            labels.append("".join(label))
+            label = []
+        else:
+            label.append(char)
+    labels.append("".join(label))
+    return tuple(labels)
+
+
+def _datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def _prefix_clause(namespace_prefix: tuple[str, ...]) -> tuple[str, list[str]]:
+    """Return a WHERE clause matching a namespace and its children through the index."""
+    if not namespace_prefix:
+        return "1", []
+    prefix = _prefix(namespace_prefix)
+    # children sort between "a.b." and "a.b/" ("/" follows "."); an escaped dot
+    # continues the label with "\\", which sorts after "/"
+    return "(prefix = ? OR (prefix > ? AND prefix < ?))", [
+        prefix,
+        prefix + ".",
+        prefix + "/",
+    ]
+
+
+def _chunks(items: list, size: int) -> Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class SQLiteStore(BaseStore):
+    """Long term memory store persisted in a SQLite database in WAL mode.
+
+    A drop-in for `InMemoryStore` in the `store` argument of the todo manager
+    nodes: same namespaces, item order and filter semantics, but it survives
+    restarts and keeps no items in RAM. Rows are indexed on (namespace, key),
+    so gets, upserts and per-namespace searches read only that user's rows
+    however many users there are. Each `batch` runs its reads with one query
+    per namespace, then applies all its puts and deletes in one transaction.
+    Memory stays bounded by SQLite's page cache (`cache_kib`), and searches
+    stop reading at `offset + limit`. Semantic `query` search needs an
+    embeddings index and is ignored here, as in an unindexed InMemoryStore.
+    """
+
+    def __init__(self, path: str = "store.sqlite", *, cache_kib: int = 16384):
+        """Open (on first use) the database at `path` with `cache_kib` of page cache."""
+        self.path = path
+        self.cache_kib = cache_kib
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The database connection, opened and migrated on first use."""
+        # opened on first use, so importing a graph that selects it stays side-effect free
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute(f"PRAGMA cache_size=-{int(self.cache_kib)}")
+                    conn.executescript(_SCHEMA)
+                    conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        """Close the connection; the next call reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Run gets, searches and namespace listings, then apply puts in one transaction."""
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+        gets: dict[tuple[str, ...], list[int]] = {}
+        # last write per item wins, as in InMemoryStore
+        puts: dict[tuple[tuple[str, ...], str], PutOp] = {}
+        for i, op in enumerate(ops):
+            if isinstance(op, GetOp):
+                gets.setdefault(op.namespace, []).append(i)
+            elif isinstance(op, PutOp):
+                puts[(op.namespace, op.key)] = op
+            elif not isinstance(op, (SearchOp, ListNamespacesOp)):
+                raise ValueError(f"Unknown operation type: {type(op)}")
+
+        conn = self.conn
+        with self._lock:
+            # reads see the store as it was before this batch's writes
+            for namespace, indexes in gets.items():
+                found = self._get_many(namespace, {ops[i].key for i in indexes})
+                for i in indexes:
+                    results[i] = found.get(ops[i].key)
+            for i, op in enumerate(ops):
+                if isinstance(op, SearchOp):
+                    results[i] = self._search(op)
+                elif isinstance(op, ListNamespacesOp):
+                    results[i] = self._list_namespaces(op)
+            if puts:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO store (prefix, key, value, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (prefix, key) DO UPDATE "
+                        "SET value = excluded.value, updated_at = excluded.updated_at",
+                        [
+                            (_prefix(ns), key, json.dumps(op.value), now, now)
+                            for (ns, key), op in puts.items()
+                            if op.value is not None
+                        ],
+                    )
+                    conn.executemany(
+                        "DELETE FROM store WHERE prefix = ? AND key = ?",
+                        [
+                            (_prefix(ns), key)
+                            for (ns, key), op in puts.items()
+                            if op.value is None
+                        ],
+                    )
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Async `batch`, run in a worker thread."""
+        # sqlite3 blocks, so run off the event loop
+        return await asyncio.to_thread(self.batch, list(ops))
+
+    def _get_many(self, namespace: tuple[str, ...], keys: set[str]) -> dict[str, Item]:
+        found = {}
+        for chunk in _chunks(sorted(keys), _MAX_VARS):
+            rows = self.conn.execute(
+                "SELECT key, value, created_at, updated_at FROM store "
+                f"WHERE prefix = ? AND key IN ({', '.join('?' * len(chunk))})",
+                [_prefix(namespace), *chunk],
+            )
+            for key, value, created_at, updated_at in rows:
+                found[key] = Item(
+                    value=json.loads(value),
+                    key=key,
+                    namespace=namespace,
+                    created_at=_datetime(created_at),
+                    updated_at=_datetime(updated_at),
+                )
+        return found
+
+    def _search(self, op: SearchOp) -> list[SearchItem]:
+        where, params = _prefix_clause(op.namespace_prefix)
+        query = (
+            "SELECT prefix, key, value, created_at, updated_at FROM store "
+            f"WHERE {where} ORDER BY id"
+        )
+        if not op.filter:
+            query += " LIMIT ? OFFSET ?"
+            params += [op.limit, op.offset]
+        items: list[SearchItem] = []
+        skipped = 0
+        for prefix, key, value, created_at, updated_at in self.conn.execute(
+            query, params
+        ):
+            value = json.loads(value)
+            if op.filter:
+                if not all(_matches(value.get(k), v) for k, v in op.filter.items()):
+                    continue
+                if skipped < op.offset:
+                    skipped += 1
+                    continue
+            items.append(
+                SearchItem(
+                    namespace=_namespace(prefix),
+                    key=key,
+                    value=value,
+                    created_at=_datetime(created_at),
+                    updated_at=_datetime(updated_at),
+                )
+            )
+            if len(items) >= op.limit:
+                break
+        return items
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        # narrow the index scan with the first literal prefix condition, if any
+        literal = next(
+            (
+                c.path
+                for c in op.match_conditions or ()
+                if c.match_type == "prefix" and "*" not in c.path
+            ),
+            (),
+        )
+        where, params = _prefix_clause(tuple(literal))
+        namespaces = set()
+        for (prefix,) in self.conn.execute(
+            f"SELECT DISTINCT prefix FROM store WHERE {where}", params
+        ):
+            namespace = _namespace(prefix)
+            if all(_condition_matches(c, namespace) for c in op.match_conditions or ()):
+                namespaces.add(
+                    namespace[: op.max_depth] if op.max_depth is not None else namespace
+                )
+        return sorted(namespaces)[op.offset : op.offset + op.limit]
+
+    def size(self) -> dict[str, int]:
+        """Return the number of items and the database size in bytes."""
+        with self._lock:
+            items = self.conn.execute("SELECT COUNT(*) FROM store").fetchone()[0]
+            pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        return {"items": items, "bytes": pages * page_size}
+
+
+_store: Any = None
+
+
+def get_store() -> Optional[BaseStore]:
+    """Return the long term memory store selected through env, shared by all graphs.
+
+    STORE is "memory" (InMemoryStore), "sqlite" (SQLiteStore at STORE_DB) or
+    unset, which leaves the store to the LangGraph server.
+    """
+    global _store
+    kind = os.environ.get("STORE", "").lower()
+    if not kind:
+        return None
+    if _store is None:
+        if kind == "memory":
+            from langgraph.store.memory import InMemoryStore
+
+            _store = InMemoryStore()
+        elif kind == "sqlite":
+            _store = SQLiteStore(
+                os.environ.get("STORE_DB", "store.sqlite"),
+                cache_kib=int(os.environ.get("STORE_CACHE_KIB", 16384)),
+            )
+        else:
+            raise ValueError(f"Unknown STORE: {kind}")
+    return _store
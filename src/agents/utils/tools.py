@@ -1,10 +1,41 @@
+"""Tools bound to the graph models."""
+
+import os
 from typing import Annotated, Literal, Optional, TypedDict
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.types import Command, interrupt
+from pydantic import BaseModel, Field
+
+from agents.utils.cache import CachedTool
+from agents.utils.clients import tavily_api_wrapper
+from agents.utils.scheduler import scheduler_from_env
+
+
+class WebSearchInput(BaseModel):
+    """Input for the Tavily tool."""
+
+    query: str = Field(description="search query to look up")
+
+
+# Tavily client is built on first search (needs TAVILY_API_KEY), not at import
+def _tavily_search():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=2, api_wrapper=tavily_api_wrapper())
+
 
-web_search = TavilySearchResults(max_results=2)
+# web search with a short-lived result cache; identical in-flight queries share one request
+web_search = CachedTool(
+    _tavily_search,
+    name="tavily_search_results_json",
+    description="A search engine optimized for comprehensive, accurate, and trusted results. Useful for when you need to answer questions about current events. Input should be a search query.",
+    args_schema=WebSearchInput,
+    maxsize=int(os.environ.get("SEARCH_CACHE_MAXSIZE", 512)),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", 300)),
+    # fair per-user scheduling of searches (SEARCH_RPM / SEARCH_USER_RPM); unset is unlimited
+    rate_limiter=scheduler_from_env("search", "SEARCH"),
+)
 
 
 @tool
@@ -49,44 +80,14 @@ class UpdateMemory(TypedDict):
     todo_item_key: str | None
 
 
-# extract trustcall tool call info
-def extract_tool_info(tool_calls, schema_name="Memory"):
-    """Extract information from tool calls for both patches and new memories.
-
-    Args:
-        tool_calls: List of tool calls from the model
-        schema_name: Name of the schema tool (e.g., "Memory", "ToDo", "Profile")
-    """
-
-    # Initialize list of changes
-    changes = []
-
-    for call_group in tool_calls:
-        for call in call_group:
-            if call["name"] == "PatchDoc":
-                changes.append(
-                    {
-                        "type": "update",
-                        "doc_id": call["args"]["json_doc_id"],
-                        "planned_edits": call["args"]["planned_edits"],
-                        "value": call["args"]["patches"][0]["value"],
-                    }
-                )
-            elif call["name"] == schema_name:
-                changes.append({"type": "new", "value": call["args"]})
-
-    # Format results as a single string
-    result_parts = []
-    for change in changes:
-        if change["type"] == "update":
-            result_parts.append(
-                f"Document {change['doc_id']} updated:\n"
-                f"Plan: {change['planned_edits']}\n"
-                f"Added content: {change['value']}"
-            )
-        else:
-            result_parts.append(
-                f"New {schema_name} created:\n" f"Content: {change['value']}"
-            )
-
-    return "\n\n".join(result_parts)
+def format_tool_change(call, schema_name="Memory"):
+    """Describe a trustcall tool call (a patch or a new document), or None for other tools."""
+    if call["name"] == "PatchDoc":
+        return (
+            f"Document {call['args']['json_doc_id']} updated:\n"
+            f"Plan: {call['args']['planned_edits']}\n"
+            f"Added content: {call['args']['patches'][0]['value']}"
+        )
+    elif call["name"] == schema_name:
+        return f"New {schema_name} created:\n" f"Content: {call['args']}"
+    return None
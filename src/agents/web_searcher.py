@@ -1,29 +1,50 @@
+"""Web searcher graph."""
+
+import os
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import ToolNode
 
-from agents.utils.nodes import call_llm, human_review_node, web_search_tool, human_assistance_tool
+from agents.utils.nodes import acall_llm, acompact_messages, call_llm, compact_messages, human_review_node, warmup_runnables
+from agents.utils.checkpoint import get_checkpointer
+from agents.utils.metrics import NodeMetrics, start_metrics_exporter
+from agents.utils.prompting import PromptCacheTracker
+from agents.utils.runnables import sync_async_node
 from agents.utils.state import State
+from agents.utils.tools import human_assistance, web_search
 from agents.utils.edges import route_after_llm
 
 # add graph state
 builder = StateGraph(State)
 
 # add nodes
-builder.add_node('call_llm', call_llm)
-builder.add_node('web_search_tool', web_search_tool)
+builder.add_node('compact_messages', sync_async_node(compact_messages, acompact_messages))
+builder.add_node('call_llm', sync_async_node(call_llm, acall_llm))
+builder.add_node('web_search_tool', ToolNode([web_search]))
 builder.add_node('human_review_node', human_review_node)
-builder.add_node('human_assistance_tool', human_assistance_tool)
+builder.add_node('human_assistance_tool', ToolNode([human_assistance]))
 
 # add edges
-builder.add_edge(START, 'call_llm')
+builder.add_edge(START, 'compact_messages')
+builder.add_edge('compact_messages', 'call_llm')
 builder.add_conditional_edges('call_llm', route_after_llm)
 # builder.add_conditional_edges('call_llm', should_continue)
 builder.add_edge('web_search_tool', 'call_llm')
 builder.add_edge('human_assistance_tool', 'call_llm')
 
 # add memory
-memory = MemorySaver()
+# memory = MemorySaver()
+
+# optionally prebuild bound models and extractors before the first run
+if os.environ.get("WARMUP_RUNNABLES"):
+    warmup_runnables("web_searcher")
 
 # compile graph
 # graph = builder.compile(checkpointer=memory)
-graph = builder.compile()
+# checkpointer from CHECKPOINTER (memory / sqlite); unset leaves it to the LangGraph server
+# track provider prompt-cache hits and per-node latency, tokens and cost per graph
+graph = builder.compile(checkpointer=get_checkpointer()).with_config(
+    callbacks=[PromptCacheTracker("web_searcher"), NodeMetrics("web_searcher")]
+)
+
+# optionally export node metrics (METRICS_PORT / METRICS_FILE)
+start_metrics_exporter()
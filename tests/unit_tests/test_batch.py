@@ -0,0 +1,124 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from agents.batch import BatchRunner, finished_ids, read_items, run_batch
+from agents.utils import nodes
+
+sys.path.insert(0, str(Path(__file__).parents[2] / "benchmarks"))
+from fakes import ScriptedChatModel  # noqa: E402
+
+OPTIONS = {"graph": "joke_generator", "configurable": {"llm_cache": False}}
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    monkeypatch.delenv("CHECKPOINTER", raising=False)
+    monkeypatch.delenv("STORE", raising=False)
+    monkeypatch.setattr(nodes, "llm", ScriptedChatModel())
+
+
+def _write(path: Path, lines: list) -> None:
+    path.write_text(
+        "".join(
+            line if isinstance(line, str) else json.dumps(line) + "\n" for line in lines
+        )
+    )
+
+
+def _records(path: Path) -> dict[str, dict]:
+    return {r["id"]: r for r in map(json.loads, path.read_text().splitlines())}
+
+
+def _run(input_path: Path, output_path: Path, **options):
+    options = {**OPTIONS, "job": "test", **options}
+    return asyncio.run(run_batch(str(input_path), str(output_path), options, 4))
+
+
+def test_default_ids_are_line_numbers(tmp_path):
+    path = tmp_path / "in.jsonl"
+    _write(path, [{"message": "a"}, "\n", {"id": 7, "message": "b"}])
+    assert [i for i, _ in read_items(str(path))] == ["line-1", "7"]
+
+
+def test_runs_answer_interrupts_and_resume_skips_finished(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write(
+        input_path,
+        [
+            {"id": "a", "message": "Tell me a joke about cats"},
+            {"id": "b", "message": "Tell me a joke about dogs"},
+            {"id": "bad", "text": "neither input nor message"},
+        ],
+    )
+    counts = _run(input_path, output_path)
+    assert counts == {"done": 2, "error": 1, "skipped": 0}
+    records = _records(output_path)
+    assert records["a"]["status"] == "done" and records["a"]["resumes"] == 1
+    assert records["a"]["state"]["feedback"] == "yes"
+    assert "ValueError" in records["bad"]["error"]
+    assert finished_ids(str(output_path)) == {"a", "b"}
+
+    # a rerun skips finished ids and runs errors again
+    counts = _run(input_path, output_path)
+    assert counts == {"error": 1, "skipped": 2}
+
+
+def test_torn_last_line_is_repaired(tmp_path):
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write(
+        input_path,
+        [
+            {"id": "a", "message": "joke about a"},
+            {"id": "b", "message": "joke about b"},
+        ],
+    )
+    _write(
+        output_path,
+        [{"id": "a", "status": "done"}, '{"id": "b", "sta'],
+    )
+    assert finished_ids(str(output_path)) == {"a"}
+    counts = _run(input_path, output_path)
+    assert counts == {"done": 1, "skipped": 1}
+    lines = output_path.read_text().splitlines()
+    assert lines[1] == '{"id": "b", "sta'
+    assert json.loads(lines[2])["id"] == "b"
+    assert finished_ids(str(output_path)) == {"a", "b"}
+
+
+def test_interrupt_policies():
+    item = {"message": "Tell me a joke about cats"}
+    skipped = asyncio.run(
+        BatchRunner(job="skip", interrupts="skip", **OPTIONS).run("1", item)
+    )
+    assert skipped["status"] == "interrupted" and skipped["resumes"] == 0
+    assert skipped["interrupts"][0]["node"] == "human_feedback"
+
+    # "no" sends the graph back to select_best_joke, which interrupts again
+    runner = BatchRunner(
+        job="limit",
+        answers={"human_feedback": {"feedback": "no"}},
+        max_resumes=2,
+        **OPTIONS,
+    )
+    limited = asyncio.run(runner.run("1", item))
+    assert limited["status"] == "interrupted" and limited["resumes"] == 2
+
+
+def test_in_memory_threads_are_deleted_once_written():
+    runner = BatchRunner(job="mem", interrupts="skip", **OPTIONS)
+    assert not runner.persistent
+    item = {"message": "Tell me a joke about cats"}
+    asyncio.run(runner.run("waiting", item))
+    asyncio.run(runner.run("bad", {}))
+    runner.interrupts = "auto"
+    asyncio.run(runner.run("done", item))
+    threads = {
+        c.config["configurable"]["thread_id"]
+        for c in runner.graph.checkpointer.list(None)
+    }
+    # only the run left waiting for a human keeps its thread
+    assert threads == {"mem:waiting"}
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.tools import tool
+
+from agents.utils.cache import CachedTool, TTLCache
+
+
+def _search_tool(delay: float = 0.1, fail: bool = False):
+    calls = []
+
+    @tool(response_format="content_and_artifact")
+    def search(query: str) -> tuple[str, list]:
+        """Search the web."""
+        calls.append(query)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError("search failed")
+        return f"results for {query}", [query]
+
+    return search, calls
+
+
+def test_ttl_cache_evicts_lru_and_expires():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_concurrent_sync_calls_share_one_request():
+    search, calls = _search_tool()
+    cached = CachedTool(search)
+    barrier = threading.Barrier(8)
+
+    def call(query):
+        barrier.wait()
+        return cached.invoke({"query": query})
+
+    queries = ["Cats", "cats", " CATS ", "cats"] * 2
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(call, queries))
+
+    assert calls == [calls[0]]
+    assert len(set(results)) == 1
+    assert cached.stats()["misses"] == 1
+    assert cached.stats()["coalesced"] + cached.stats()["hits"] == 7
+
+
+def test_concurrent_async_calls_share_one_request():
+    search, calls = _search_tool()
+    cached = CachedTool(search)
+
+    async def main():
+        return await asyncio.gather(
+            *(cached.ainvoke({"query": q}) for q in ["dogs", "Dogs", "dogs "])
+        )
+
+    assert len(set(asyncio.run(main()))) == 1
+    assert len(calls) == 1
+    assert cached.stats()["coalesced"] == 2
+    # and later calls are served from the cache
+    cached.invoke({"query": "DOGS"})
+    assert len(calls) == 1
+    assert cached.stats()["hits"] == 1
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    search, calls = _search_tool(fail=True)
+    cached = CachedTool(search)
+    barrier = threading.Barrier(4)
+
+    def call(_):
+        barrier.wait()
+        with pytest.raises(RuntimeError, match="search failed"):
+            cached.invoke({"query": "cats"})
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(call, range(4)))
+    assert len(calls) == 1
+    assert len(cached.cache) == 0
+
+    with pytest.raises(RuntimeError):
+        cached.invoke({"query": "cats"})
+    assert len(calls) == 2
+
+
+def test_cached_tool_keeps_the_wrapped_schema():
+    search, _ = _search_tool()
+    cached = CachedTool(search)
+    assert cached.name == search.name
+    assert cached.tool_call_schema.model_json_schema() == (
+        search.tool_call_schema.model_json_schema()
+    )
+
+
+def test_creative_nodes_skip_llm_cache_by_default(monkeypatch):
+    from langchain_core.language_models import FakeListChatModel
+
+    from agents.utils import nodes
+
+    model = FakeListChatModel(responses=["ok"], cache=nodes.llm_cache)
+    monkeypatch.setattr(nodes, "llm", model)
+    assert nodes._llm("decide_joke_route", {}).cache is nodes.llm_cache
+    for node in ("plan_joke", "generate_subjects", "generate_joke", "generate_jokes"):
+        assert nodes._llm(node, {}).cache is False
+    config = {"configurable": {"llm_cache_skip_nodes": []}}
+    assert nodes._llm("generate_joke", config).cache is nodes.llm_cache
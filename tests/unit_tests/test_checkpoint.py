@@ -0,0 +1,80 @@
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, StateGraph, add_messages
+
+from agents.utils.checkpoint import SQLiteSaver
+
+
+class State(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+    turns: int
+
+
+def reply(state: State) -> dict:
+    return {
+        "messages": [AIMessage(f"reply {len(state['messages'])}")],
+        "turns": state.get("turns", 0) + 1,
+    }
+
+
+def _builder() -> StateGraph:
+    builder = StateGraph(State)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    return builder
+
+
+def _run(checkpointer, turns: int, thread_id: str = "t", start: int = 0) -> dict:
+    graph = _builder().compile(checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(start, start + turns):
+        graph.invoke({"messages": [("user", f"message {i}")]}, config)
+    return graph.get_state(config).values
+
+
+def _contents(values: dict) -> list[tuple[str, str]]:
+    return [(m.type, m.content) for m in values["messages"]]
+
+
+def test_state_matches_memory_saver_after_compaction_and_reopen(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    # short delta chains and frequent compaction, so both happen several times
+    saver = SQLiteSaver(path, snapshot_every=3, compact_every=4, keep_checkpoints=3)
+    values = _run(saver, 15)
+    expected = _run(MemorySaver(), 15)
+    assert _contents(values) == _contents(expected)
+    assert values["turns"] == 15
+    saver.close()
+
+    reopened = SQLiteSaver(path)
+    config = {"configurable": {"thread_id": "t"}}
+    state = _builder().compile(checkpointer=reopened).get_state(config)
+    assert _contents(state.values) == _contents(expected)
+    assert len(list(reopened.list(config))) <= 3 + 4
+
+    # and the thread keeps going from the compacted history
+    values = _run(reopened, 2, start=15)
+    assert _contents(values) == _contents(_run(MemorySaver(), 17))
+
+
+def test_compact_on_demand_keeps_latest_checkpoints(tmp_path):
+    saver = SQLiteSaver(
+        str(tmp_path / "checkpoints.sqlite"), compact_every=None, keep_checkpoints=2
+    )
+    expected = _contents(_run(saver, 10))
+    rows = saver.size()["checkpoint_rows"]
+    saver.compact()
+    assert saver.size()["checkpoint_rows"] == 2 < rows
+    config = {"configurable": {"thread_id": "t"}}
+    assert _contents(saver.get_tuple(config).checkpoint["channel_values"]) == expected
+
+
+def test_delete_thread_leaves_other_threads(tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "checkpoints.sqlite"))
+    _run(saver, 2, "a")
+    expected = _contents(_run(saver, 2, "b"))
+    saver.delete_thread("a")
+    assert saver.get_tuple({"configurable": {"thread_id": "a"}}) is None
+    assert _contents(_run(saver, 0, "b")) == expected
@@ -0,0 +1,31 @@
+from langgraph.types import Send
+
+from agents.utils.edges import route_joke_plan, should_generate_joke
+
+
+def test_should_generate_joke_ignores_planning_mode():
+    config = {
+        "configurable": {
+            "joke_planning_mode": "speculative",
+            "joke_generation_mode": "batch",
+        }
+    }
+    state = {"joke_route": "generate_joke", "subjects": ["cats"]}
+    assert should_generate_joke(state) == "generate_subjects"
+    assert route_joke_plan(state, config) == "generate_jokes"
+
+
+def test_route_joke_plan():
+    fanout = {"configurable": {"joke_generation_mode": "fanout"}}
+    assert route_joke_plan({"joke_route": "generate_joke", "subjects": []}, fanout) == (
+        "generate_subjects"
+    )
+    assert route_joke_plan(
+        {"joke_route": "reject_joke_request", "subjects": ["cats"]}, fanout
+    ) == ("reject_joke_request")
+    assert route_joke_plan(
+        {"joke_route": "generate_joke", "subjects": ["cats", "dogs"]}, fanout
+    ) == [
+        Send("generate_joke", {"subject": "cats"}),
+        Send("generate_joke", {"subject": "dogs"}),
+    ]
@@ -0,0 +1,120 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from agents.utils.hedging import _MIN_SAMPLES, HedgePolicy, Hedger
+
+
+def _slow_first(delay: float):
+    """Sync and async functions whose first call takes `delay`, the rest answer at once."""
+    calls = itertools.count()
+
+    def func(x):
+        if next(calls) == 0:
+            time.sleep(delay)
+            return "primary"
+        return "hedge"
+
+    async def afunc(x):
+        if next(calls) == 0:
+            await asyncio.sleep(delay)
+            return "primary"
+        return "hedge"
+
+    return RunnableLambda(func, afunc)
+
+
+def _failing_first():
+    calls = itertools.count()
+
+    def func(x):
+        if next(calls) == 0:
+            raise RuntimeError("provider error")
+        return "ok"
+
+    return RunnableLambda(func)
+
+
+def _warm(hedger: Hedger, node: str, latency: float = 0.01) -> None:
+    hedger._stats(node).latencies.extend([latency] * _MIN_SAMPLES)
+
+
+def test_hedge_answers_when_primary_straggles():
+    hedger = Hedger()
+    _warm(hedger, "node")
+    runnable = hedger.wrap("node", _slow_first(1.0), HedgePolicy(retries=0))
+    start = time.monotonic()
+    assert runnable.invoke("x") == "hedge"
+    assert time.monotonic() - start < 0.5
+    stats = hedger.stats()["node"]
+    assert (stats["calls"], stats["hedges"], stats["hedge_wins"]) == (1, 1, 1)
+
+
+def test_async_hedge_cancels_the_loser():
+    hedger = Hedger()
+    _warm(hedger, "node")
+    runnable = hedger.wrap("node", _slow_first(1.0), HedgePolicy(retries=0))
+
+    async def main():
+        start = time.monotonic()
+        assert await runnable.ainvoke("x") == "hedge"
+        assert time.monotonic() - start < 0.5
+        # the primary (still a second from answering) was cancelled
+        await asyncio.sleep(0.05)
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(main())
+    assert hedger.stats()["node"]["hedge_wins"] == 1
+
+
+def test_no_hedge_before_enough_samples():
+    hedger = Hedger()
+    runnable = hedger.wrap("node", _slow_first(0.1), HedgePolicy(retries=0))
+    assert runnable.invoke("x") == "primary"
+    assert hedger.stats()["node"]["hedges"] == 0
+
+
+def test_hedges_stay_under_max_ratio():
+    hedger = Hedger()
+    policy = HedgePolicy(max_ratio=0.5, retries=0)
+    for _ in range(4):
+        # keep the slow primaries from raising the hedging threshold
+        _warm(hedger, "node")
+        hedger.wrap("node", _slow_first(0.1), policy).invoke("x")
+    stats = hedger.stats()["node"]
+    assert stats["calls"] == 4
+    assert stats["hedges"] == 2
+
+
+def test_failed_call_is_retried():
+    hedger = Hedger()
+    runnable = hedger.wrap("node", _failing_first(), HedgePolicy(hedge=False))
+    assert runnable.invoke("x") == "ok"
+    stats = hedger.stats()["node"]
+    assert (stats["retries"], stats["failures"]) == (1, 0)
+
+
+def test_out_of_retries_raises_the_error():
+    hedger = Hedger()
+    policy = HedgePolicy(hedge=False, retries=0)
+    with pytest.raises(RuntimeError, match="provider error"):
+        hedger.wrap("node", _failing_first(), policy).invoke("x")
+    assert hedger.stats()["node"]["failures"] == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_budget_bounds_the_call(use_async):
+    hedger = Hedger()
+    runnable = hedger.wrap(
+        "node", _slow_first(1.0), HedgePolicy(hedge=False, budget=0.1)
+    )
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match="0.1s budget"):
+        if use_async:
+            asyncio.run(runnable.ainvoke("x"))
+        else:
+            runnable.invoke("x")
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,47 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.store.memory import InMemoryStore
+
+from agents.utils.memory import MemorySnapshotCache
+
+
+def test_concurrent_loads_share_one_snapshot():
+    store = InMemoryStore()
+    snapshots = MemorySnapshotCache()
+    barrier = threading.Barrier(8)
+
+    def load(_):
+        barrier.wait()
+        return snapshots.load(store, "alice")
+
+    with ThreadPoolExecutor(8) as pool:
+        loaded = list(pool.map(load, range(8)))
+    assert all(snapshot is loaded[0] for snapshot in loaded)
+    assert sum(snapshots.stats().values()) == 8
+
+
+def test_concurrent_writes_all_reach_the_snapshot():
+    store = InMemoryStore()
+    snapshots = MemorySnapshotCache(todo_limit=100)
+    snapshot = snapshots.load(store, "alice")
+
+    def write(i):
+        snapshots.put(store, ("todo", "alice"), f"todo-{i}", {"task": f"task {i}"})
+        snapshot.render("todo")
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(write, range(50)))
+    assert len(snapshot.items("todo")) == 50
+    assert snapshot.render("todo").count("'key'") == 50
+
+
+def test_other_processes_writes_show_up_after_ttl():
+    store = InMemoryStore()
+    snapshots = MemorySnapshotCache(ttl=0.01)
+    assert snapshots.load(store, "alice").items("todo") == []
+    # written by another worker, bypassing this process's snapshots
+    store.put(("todo", "alice"), "dentist", {"task": "book the dentist"})
+    time.sleep(0.02)
+    assert [i.key for i in snapshots.load(store, "alice").items("todo")] == ["dentist"]
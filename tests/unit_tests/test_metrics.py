@@ -0,0 +1,70 @@
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph import START, MessagesState, StateGraph
+
+from agents.utils.cache import LLMCache
+from agents.utils.metrics import NodeMetrics, node_cost, node_tokens
+from agents.utils.prompting import PromptCacheTracker, prompt_cache_stats
+
+USAGE = {
+    "input_tokens": 1000,
+    "output_tokens": 100,
+    "total_tokens": 1100,
+    "input_token_details": {"cache_read": 400},
+}
+
+
+class UsageChatModel(BaseChatModel):
+    """Chat model answering with fixed usage, counting the calls that reach it."""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-fake"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": "gpt-4o-mini"}
+
+    def _generate(
+        self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        self.calls += 1
+        message = AIMessage("hi", usage_metadata=dict(USAGE))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _graph(model: BaseChatModel, name: str):
+    def reply(state: MessagesState) -> dict:
+        return {"messages": [model.invoke(state["messages"])]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    return builder.compile().with_config(
+        callbacks=[NodeMetrics(name), PromptCacheTracker(name)]
+    )
+
+
+def test_cache_hits_add_no_tokens_or_cost():
+    model = UsageChatModel(cache=LLMCache())
+    graph = _graph(model, "cache-hits")
+    config = {"metadata": {"user_id": "alice"}}
+    for _ in range(3):
+        graph.invoke({"messages": [("user", "hello")]}, config)
+    assert model.calls == 1
+
+    labels = ("cache-hits", "reply", "alice")
+    # token histograms: [bucket counts, sum, count]; only the first run used any
+    assert node_tokens._series[(*labels, "prompt")][1:] == [1000, 1]
+    assert node_tokens._series[(*labels, "cached")][1:] == [400, 1]
+    assert node_cost._series[labels] == (600 * 0.15 + 400 * 0.075 + 100 * 0.6) / 1e6
+    assert prompt_cache_stats["cache-hits"] == {
+        "calls": 1,
+        "input_tokens": 1000,
+        "cached_tokens": 400,
+    }
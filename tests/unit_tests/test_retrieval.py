@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from agents.utils.retrieval import TodoIndex, parse_deadline, tokenize
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def _index(todos: dict) -> TodoIndex:
+    index = TodoIndex()
+    for key, value in todos.items():
+        index.put(key, value)
+    return index
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("Book the DENTIST, for my teeth!") == ["book", "dentist", "teeth"]
+
+
+def test_search_ranks_by_bm25():
+    index = _index(
+        {
+            "dentist": {"task": "Book the dentist", "solutions": ["call the dentist"]},
+            "groceries": {"task": "Buy groceries", "solutions": ["milk", "eggs"]},
+            "car": {"task": "Book a car service"},
+            "essay": {"task": "Write an essay about the dentist strike and unions"},
+        }
+    )
+    # term frequency and shorter todos win; rare terms outweigh common ones
+    assert index.search("dentist appointment", k=4) == ["dentist", "essay"]
+    assert index.search("book the car", k=4) == ["car", "dentist"]
+    assert index.search("book", k=1) == ["car"]
+    assert index.search("holiday", k=4) == []
+    assert index.search("dentist", k=0) == []
+
+
+def test_updates_and_deletes_reuse_rows():
+    index = _index({"a": {"task": "walk the dog"}, "b": {"task": "feed the cat"}})
+    index.put("a", {"task": "wash the car"})
+    assert index.search("dog", k=2) == []
+    assert index.search("car", k=2) == ["a"]
+
+    index.delete("b")
+    index.delete("missing")
+    assert len(index) == 1
+    assert index.search("cat", k=2) == []
+    index.put("c", {"task": "feed the cat"})
+    assert index.search("cat", k=2) == ["c"]
+    assert len(index._keys) == 2
+
+
+def test_due_lists_open_todos_soonest_first():
+    index = _index(
+        {
+            "later": {"task": "a", "deadline": "2026-01-12T00:00:00Z"},
+            "overdue": {"task": "b", "deadline": "2026-01-01T00:00:00+00:00"},
+            "soon": {"task": "c", "deadline": "2026-01-11T00:00:00"},
+            "far": {"task": "d", "deadline": "2026-03-01T00:00:00Z"},
+            "done": {"task": "e", "deadline": "2026-01-11", "status": "done"},
+            "none": {"task": "f"},
+        }
+    )
+    assert index.due(timedelta(days=3), now=NOW) == ["overdue", "soon", "later"]
+    index.delete("soon")
+    assert index.due(timedelta(days=3), now=NOW) == ["overdue", "later"]
+
+
+def test_parse_deadline_skips_closed_and_invalid():
+    assert parse_deadline({"deadline": "2026-01-10"}) == NOW.timestamp()
+    assert parse_deadline({"deadline": "soon"}) is None
+    assert parse_deadline({"deadline": "2026-01-10", "status": "archived"}) is None
@@ -0,0 +1,60 @@
+import asyncio
+
+from langgraph.graph import START, StateGraph
+from langgraph.store.base import BaseStore
+from langgraph.store.memory import InMemoryStore
+from typing_extensions import TypedDict
+
+from agents.utils.runnables import RunnableRegistry, sync_async_node
+
+
+class Model:
+    def __init__(self):
+        self.copies = 0
+
+    def model_copy(self, update):
+        self.copies += 1
+        return (self, update)
+
+
+def test_registry_reuses_and_evicts_least_recently_used():
+    registry = RunnableRegistry(maxsize=2)
+    a, b, c = Model(), Model(), Model()
+    first = registry.variant(a, cache=False)
+    assert registry.variant(a, cache=False) is first
+    registry.variant(b, cache=False)
+    registry.variant(a, cache=False)
+    registry.variant(c, cache=False)
+    assert len(registry) == 2
+    # b was least recently used, so it is built again
+    registry.variant(b, cache=False)
+    registry.variant(c, cache=False)
+    assert (a.copies, b.copies, c.copies) == (1, 2, 1)
+
+
+class State(TypedDict):
+    path: str
+    value: str
+
+
+def _node(state: State, config, store: BaseStore):
+    return {"path": "sync", "value": store.get(("ns",), "k").value["v"]}
+
+
+async def _anode(state: State, config, store: BaseStore):
+    item = await store.aget(("ns",), "k")
+    return {"path": "async", "value": item.value["v"]}
+
+
+def test_sync_async_node_runs_the_matching_function_with_the_store():
+    store = InMemoryStore()
+    store.put(("ns",), "k", {"v": "stored"})
+    builder = StateGraph(State)
+    builder.add_node(sync_async_node(_node, _anode, name="node"))
+    builder.add_edge(START, "node")
+    graph = builder.compile(store=store)
+    assert graph.invoke({"path": ""}) == {"path": "sync", "value": "stored"}
+    assert asyncio.run(graph.ainvoke({"path": ""})) == {
+        "path": "async",
+        "value": "stored",
+    }
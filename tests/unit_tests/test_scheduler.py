@@ -0,0 +1,86 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from agents.utils.scheduler import FairScheduler, RateLimit, TokenBucket, _Waiter
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(per_minute=60, burst_seconds=2)
+    now = bucket.updated
+    assert bucket.capacity == 2
+    bucket.take(3, now)
+    assert bucket.delay(1, now) == pytest.approx(2.0)
+    assert bucket.delay(1, now + 2) == 0.0
+    assert not bucket.full(now + 2)
+    assert bucket.full(now + 3)
+
+
+def test_users_take_turns():
+    # one request per second, no burst
+    scheduler = FairScheduler("test", RateLimit(requests_per_minute=60))
+    alice = [_Waiter("alice", 0.0) for _ in range(4)]
+    bob = _Waiter("bob", 0.0)
+    for waiter in [*alice, bob]:
+        scheduler._enqueue(waiter)
+    order = [w for w in alice if w.granted]
+    now = time.monotonic()
+    for second in range(1, 5):
+        with scheduler._lock:
+            scheduler._dispatch(now + second)
+        order += [w for w in [*alice, bob] if w.granted and w not in order]
+
+    # bob queued behind alice's burst but waits for only one more of her calls
+    assert order == [alice[0], alice[1], bob, alice[2], alice[3]]
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_non_blocking_acquire_leaves_nothing_queued():
+    scheduler = FairScheduler("test", RateLimit(requests_per_minute=60))
+    assert scheduler.acquire(blocking=False)
+    assert not scheduler.acquire(blocking=False)
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler("test", RateLimit(requests_per_minute=60))
+
+    async def main():
+        await scheduler.aacquire()
+        task = asyncio.ensure_future(scheduler.aacquire())
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert scheduler.stats() == {"queued": 0, "users_queued": 0, "users_tracked": 1}
+
+
+def test_settle_charges_actual_tokens():
+    # 100 tokens per second
+    scheduler = FairScheduler("test", RateLimit(tokens_per_minute=6000))
+    bucket = scheduler._global.tokens
+    run_id = uuid.uuid4()
+    scheduler._pending.set((run_id, "alice", 10.0))
+    scheduler.acquire()
+    assert bucket.tokens == pytest.approx(90, abs=1)
+
+    scheduler.settle(run_id, 50)
+    assert bucket.tokens == pytest.approx(50, abs=1)
+    # settled once: a repeated or unknown settle changes nothing
+    scheduler.settle(run_id, 50)
+    scheduler.settle(uuid.uuid4(), 50)
+    assert bucket.tokens == pytest.approx(50, abs=1)
+
+
+def test_settle_without_usage_keeps_the_estimate():
+    scheduler = FairScheduler("test", RateLimit(tokens_per_minute=6000))
+    run_id = uuid.uuid4()
+    scheduler._pending.set((run_id, "alice", 10.0))
+    scheduler.acquire()
+    scheduler.settle(run_id, None)
+    assert scheduler._global.tokens.tokens == pytest.approx(90, abs=1)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.utils import nodes
+from agents.utils.speculation import (
+    Speculation,
+    SpeculationCancelled,
+    SpeculationMetrics,
+)
+
+
+@pytest.fixture
+def totals(monkeypatch):
+    totals = SpeculationMetrics()
+    monkeypatch.setattr("agents.utils.speculation.speculation_metrics", totals)
+    return totals
+
+
+def test_discarded_work_is_wasted_until_it_stops(totals):
+    speculation = Speculation("node")
+    release = threading.Event()
+
+    def work():
+        speculation.start_call()
+        release.wait()
+        speculation.start_call()
+
+    future = nodes._speculate(speculation, work)
+    time.sleep(0.02)
+    speculation.discard()
+    # the call in flight keeps running, so nothing is recorded yet
+    assert totals.stats()["wasted"] == 0
+    time.sleep(0.05)
+    release.set()
+    with pytest.raises(SpeculationCancelled):
+        future.result()
+    time.sleep(0.01)
+    stats = totals.stats()
+    assert (stats["wasted"], stats["calls_wasted"]) == (1, 1)
+    assert stats["seconds_wasted"] >= 0.07
+
+
+def test_discard_after_finishing_records_once(totals):
+    speculation = Speculation("node")
+    speculation.done()
+    speculation.discard()
+    speculation.done()
+    assert totals.stats()["wasted"] == 1
+
+
+def test_cancelled_task_is_wasted_when_cancelled(totals):
+    async def main():
+        speculation = Speculation("node")
+
+        async def work():
+            speculation.start_call()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(work())
+        task.add_done_callback(lambda _: speculation.done())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        speculation.discard()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    stats = totals.stats()
+    assert (stats["wasted"], stats["calls_wasted"]) == (1, 1)
+    assert 0.02 <= stats["seconds_wasted"] < 1
+
+
+def test_speculate_runs_nothing_without_a_free_thread(monkeypatch):
+    monkeypatch.setattr(nodes, "_speculation_slots", threading.BoundedSemaphore(1))
+    release = threading.Event()
+    first = nodes._speculate(Speculation("node"), release.wait)
+    assert nodes._speculate(Speculation("node"), release.wait) is None
+    release.set()
+    first.result()
+    second = nodes._speculate(Speculation("node"), lambda: "ran")
+    assert second.result() == "ran"
@@ -0,0 +1,122 @@
+import pytest
+from langgraph.store.base import GetOp, ListNamespacesOp, PutOp, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from agents.utils.store import SQLiteStore, _namespace, _prefix
+
+
+def test_dotted_labels_stay_one_label(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite"))
+    # the todo nodes write through batch(), which takes any label, as InMemoryStore does
+    store.batch(
+        [
+            PutOp(("todo", "john.smith@x.com"), "a", {"task": "smith's"}),
+            PutOp(("todo", "john"), "b", {"task": "john's"}),
+        ]
+    )
+
+    # and reads through batch() too (MemoryCache loads snapshots with SearchOps)
+    john, smith, missing, namespaces = store.batch(
+        [
+            SearchOp(("todo", "john")),
+            SearchOp(("todo", "john.smith@x.com")),
+            GetOp(("todo", "john"), "a"),
+            ListNamespacesOp(),
+        ]
+    )
+    assert [item.key for item in john] == ["b"]
+    assert [(item.namespace, item.key) for item in smith] == [
+        (("todo", "john.smith@x.com"), "a")
+    ]
+    assert missing is None
+    assert namespaces == [("todo", "john"), ("todo", "john.smith@x.com")]
+
+
+def test_namespace_encoding_round_trips():
+    for namespace in [("todo", "a.b"), ("a\\", ".b."), ("x\\.y",), ("todo", "plain")]:
+        assert _namespace(_prefix(namespace)) == namespace
+    assert _prefix(("todo", "plain")) == "todo.plain"
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """The same items in an InMemoryStore and a SQLiteStore."""
+    memory = InMemoryStore()
+    sqlite = SQLiteStore(str(tmp_path / "store.sqlite"))
+    for store in (memory, sqlite):
+        for i in range(10):
+            store.put(
+                ("todo", "alice"),
+                f"t{i}",
+                {
+                    "task": f"task {i}",
+                    "time_to_complete": i,
+                    "status": "done" if i % 3 == 0 else "not started",
+                },
+            )
+        store.put(("todo", "bob"), "t0", {"task": "bob's", "time_to_complete": 5})
+        store.put(("profile", "alice"), "p", {"name": "Alice", "meta": {"tz": "UTC"}})
+        store.put(("todo", "alice"), "t4", {"task": "updated", "time_to_complete": 40})
+        store.delete(("todo", "alice"), "t7")
+    yield memory, sqlite
+    sqlite.close()
+
+
+def _rows(items):
+    return [(item.namespace, item.key, item.value) for item in items]
+
+
+@pytest.mark.parametrize(
+    "namespace,kwargs",
+    [
+        (("todo", "alice"), {}),
+        (("todo",), {}),
+        ((), {"limit": 100}),
+        (("todo", "alice"), {"limit": 3, "offset": 2}),
+        (("todo", "alice"), {"filter": {"status": "done"}}),
+        (
+            ("todo", "alice"),
+            {"filter": {"status": {"$ne": "done"}}, "limit": 2, "offset": 1},
+        ),
+        (("todo",), {"filter": {"time_to_complete": {"$gte": 5, "$lt": 9}}}),
+        (("profile",), {"filter": {"meta": {"tz": "UTC"}}}),
+        (("todo", "carol"), {}),
+    ],
+)
+def test_search_matches_in_memory_store(stores, namespace, kwargs):
+    memory, sqlite = stores
+    assert _rows(sqlite.search(namespace, **kwargs)) == _rows(
+        memory.search(namespace, **kwargs)
+    )
+
+
+def test_get_matches_in_memory_store(stores):
+    memory, sqlite = stores
+    for key in ("t0", "t4", "t7", "missing"):
+        expected = memory.get(("todo", "alice"), key)
+        item = sqlite.get(("todo", "alice"), key)
+        assert (item and item.value) == (expected and expected.value)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"prefix": ("todo",)},
+        {"suffix": ("alice",)},
+        {"prefix": ("*", "alice")},
+        {"max_depth": 1},
+        {"limit": 1, "offset": 1},
+    ],
+)
+def test_list_namespaces_matches_in_memory_store(stores, kwargs):
+    memory, sqlite = stores
+    assert sqlite.list_namespaces(**kwargs) == memory.list_namespaces(**kwargs)
+
+
+def test_items_survive_reopen(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    store = SQLiteStore(path)
+    store.put(("todo", "alice"), "t0", {"task": "persisted"})
+    store.close()
+    assert SQLiteStore(path).get(("todo", "alice"), "t0").value == {"task": "persisted"}